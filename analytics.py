@@ -0,0 +1,494 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import pandas as pd
+
+from bucketing import GRANULARITIES, TimeBuckets
+from downsample import DEFAULT_MAX_POINTS, downsample_series
+from metric_cube import MetricCube
+from metrics import (
+    PLATFORM_COLS,
+    PLATFORM_NAMES,
+    TOTAL_COLUMNS,
+    frame_memory,
+    last_n_days,
+    slice_days,
+)
+from refresher import Refresher
+from rolling import ROLLING_WINDOWS, RollingWindows
+from sources import (
+    BRANCH_COLUMN,
+    build_source,
+    default_source_config,
+    source_config_from_env,
+    source_config_from_secrets_file,
+)
+
+# ======================
+# الحسابات كلها من غير Streamlit: التحميل، الفلترة، والتجميعات اللي كل view محتاجها
+# الداشبورد والـ CLI والـ HTTP endpoint بيستخدموا نفس الدوال دي
+# ======================
+QUICK_RANGES = ["Today", "Last 7 days", "This month", "All time"]
+
+# الفترات اللي مش من الـ Quick Range بتتحفظ في LRU بالحجم ده لكل version
+CUSTOM_RANGE_CACHE = 64
+
+# آخر داتا سليمة على الديسك عشان الـ restart يعرض على طول (CLINIC_WARM_DIR= فاضي بيقفله)
+# جنب الكود مش في الـ CWD: الداشبورد والـ CLI والـ bench بيشتغلوا من أي مكان ويلاقوا نفس الـ cache
+DEFAULT_WARM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".clinic_cache")
+
+SENTIMENT_LABELS = {
+    "negative": "Negative (Not interested)",
+    "neutral": "Neutral (Asked about dates)",
+    "positive": "Positive (Bookings + Interested)",
+}
+
+
+class Dataset:
+    # الداتا + الـ cube + مفاتيح الفترات لنسخة واحدة (version) من الداتا
+    def __init__(self, frame, version, branches=None, previous=None):
+        self.frame = frame
+        self.version = version
+        self.cube = MetricCube.from_frame(frame)
+        self.buckets = TimeBuckets(self.cube)
+        # previous: الـ Dataset بتاع الـ version اللي قبلها، الـ rolling windows بتكمل منه
+        self.rolling = RollingWindows(self.cube, previous.rolling if previous is not None else None)
+        self._previous_subsets = {} if previous is None else {b: s.rolling for b, s in previous._subsets.items()}
+        # أسماء الفروع بالترتيب بتاع الإعدادات ([] لو مصدر واحد)
+        self.branches = list(branches) if branches is not None else frame_branches(frame)
+        self._subsets = {}
+        self._lock = threading.Lock()
+        # نتايج كل فترة: الـ presets محسوبة مرة واحدة، والباقي LRU
+        self._presets = {}
+        self._custom = OrderedDict()
+        self.range_stats = {"preset_hits": 0, "custom_hits": 0, "misses": 0, "evictions": 0}
+
+    def subset(self, branches):
+        # Dataset لفروع معينة بس، بيتبني مرة واحدة لكل اختيار ويتشارك بين الـ reruns
+        branches = tuple(b for b in self.branches if b in set(branches))
+        if not self.branches or branches == tuple(self.branches):
+            return self
+        with self._lock:
+            if branches not in self._subsets:
+                mask = self.frame[BRANCH_COLUMN].isin(branches).to_numpy()
+                subset = Dataset(self.frame[mask], f"{self.version}:{'+'.join(branches)}", branches)
+                previous_rolling = self._previous_subsets.pop(branches, None)
+                if previous_rolling is not None:
+                    subset.rolling = RollingWindows(subset.cube, previous_rolling)
+                if self._presets:
+                    subset.materialize_presets()
+                self._subsets[branches] = subset
+            return self._subsets[branches]
+
+    def materialize_presets(self):
+        # بعد التحميل على طول: كل Quick Range بأرقامه اللي الصفحة بتعرضها أول ما تفتح
+        if self.frame.empty:
+            return self
+        presets = {}
+        for name in QUICK_RANGES:
+            start, end = preset_range(name, self.min_date, self.max_date)
+            presets[(start, end)] = RangeResults(self, start, end).warm()
+        self._presets = presets
+        return self
+
+    def range(self, start, end):
+        key = (start, end)
+        results = self._presets.get(key)
+        if results is not None:
+            self.range_stats["preset_hits"] += 1
+            return results
+        with self._lock:
+            results = self._custom.get(key)
+            if results is not None:
+                self._custom.move_to_end(key)
+                self.range_stats["custom_hits"] += 1
+                return results
+            self.range_stats["misses"] += 1
+            results = self._custom[key] = RangeResults(self, start, end)
+            if len(self._custom) > CUSTOM_RANGE_CACHE:
+                self._custom.popitem(last=False)
+                self.range_stats["evictions"] += 1
+            return results
+
+    @property
+    def min_date(self):
+        return self.frame.index[0].date()
+
+    @property
+    def max_date(self):
+        return self.frame.index[-1].date()
+
+
+class RangeResults:
+    # كل الأرقام لفترة واحدة، كل واحد بيتحسب أول مرة يتطلب وبعدين lookup
+    # (النتايج متشاركة بين السيشنز: محدش يعدل فيها)
+    def __init__(self, ds, start, end):
+        self.ds = ds
+        self.start = start
+        self.end = end
+        self._memo = {}
+
+    def _get(self, key, compute):
+        try:
+            return self._memo[key]
+        except KeyError:
+            return self._memo.setdefault(key, compute())
+
+    @property
+    def rows(self):
+        return self._get("rows", lambda: self.ds.cube.row_count(self.start, self.end))
+
+    @property
+    def kpis(self):
+        return self._get("kpis", lambda: kpis(self.ds, self.start, self.end))
+
+    @property
+    def sentiment(self):
+        return self._get("sentiment", lambda: sentiment(self.kpis))
+
+    @property
+    def branch_kpis(self):
+        return self._get("branch_kpis", lambda: kpis_by_branch(self.ds, self.start, self.end))
+
+    @property
+    def comparison(self):
+        return self._get("comparison", lambda: comparison(self.ds, self.start, self.end))
+
+    @property
+    def rolling(self):
+        return self._get("rolling", lambda: rolling_averages(self.ds, self.end, TOTAL_COLUMNS))
+
+    def platform(self, platform):
+        return self._get(("platform", platform), lambda: platform_metrics(self.ds, self.start, self.end, platform))
+
+    def platform_comparison(self, platform):
+        return self._get(
+            ("platform_comparison", platform),
+            lambda: platform_comparison(self.ds, self.start, self.end, platform),
+        )
+
+    def platform_rolling(self, platform):
+        return self._get(
+            ("platform_rolling", platform), lambda: platform_rolling(self.ds, self.end, platform)
+        )
+
+    def distribution(self, outcome):
+        return self._get(("distribution", outcome), lambda: platform_distribution(self.ds, self.start, self.end, outcome))
+
+    def trend(self, max_points=DEFAULT_MAX_POINTS):
+        return self._get(("trend", max_points), lambda: trend(self.ds, self.start, self.end, max_points))
+
+    def trend_by_branch(self, max_points=DEFAULT_MAX_POINTS):
+        return self._get(
+            ("trend_by_branch", max_points), lambda: trend_by_branch(self.ds, self.start, self.end, max_points)
+        )
+
+    def periods(self, granularity, platform, periods=None):
+        return self._get(
+            ("periods", granularity, platform, periods),
+            lambda: period_series(self.ds, granularity, self.start, self.end, platform, periods=periods),
+        )
+
+    def last_days(self, platform, n=7):
+        return self._get(("last_days", platform, n), lambda: last_days(self.ds, self.start, self.end, platform, n))
+
+    def summary(self, platform=None):
+        return self._get(("summary", platform), lambda: summary(self.ds, self.start, self.end, platform))
+
+    def warm(self):
+        # الحاجات اللي الصفحة بتطلبها بالـ defaults بتاعتها
+        for name in ("rows", "kpis", "sentiment", "comparison", "rolling"):
+            getattr(self, name)
+        self.trend()
+        for outcome in ("total", "bookings"):
+            self.distribution(outcome)
+        for platform in PLATFORM_NAMES:
+            self.platform(platform)
+            self.platform_comparison(platform)
+            self.platform_rolling(platform)
+            self.periods("Week", platform, 4)
+            self.last_days(platform, 7)
+        if len(self.ds.branches) > 1:
+            getattr(self, "branch_kpis")
+        return self
+
+
+def frame_branches(frame):
+    if BRANCH_COLUMN not in frame.columns:
+        return []
+    column = frame[BRANCH_COLUMN]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return list(column.cat.categories)
+    return sorted(column.dropna().unique())
+
+
+# ======================
+# مصدر الداتا
+# ======================
+def resolve_source_config(secrets_path=os.path.join(".streamlit", "secrets.toml")):
+    # نفس ترتيب الداشبورد: [data_source] في secrets.toml، بعدين CLINIC_DATA_SOURCE، بعدين الشيت
+    return (
+        source_config_from_secrets_file(secrets_path)
+        or source_config_from_env()
+        or default_source_config()
+    )
+
+
+def build_refresher(config):
+    config = dict(config)
+    interval = float(config.pop("refresh_interval", 5))
+    snapshot_dir = config.pop("snapshot_dir", None) or os.environ.get("CLINIC_SNAPSHOT_DIR")
+    warm_dir = config.pop("warm_dir", None) or os.environ.get("CLINIC_WARM_DIR", DEFAULT_WARM_DIR)
+    if warm_dir:
+        # فولدر لكل مصدر: snapshot شيت تاني ميتعرضش بالغلط لو المصدر اتغير
+        key = hashlib.sha256(repr(sorted(config.items())).encode("utf-8")).hexdigest()[:12]
+        warm_dir = os.path.join(warm_dir, key)
+    source = build_source(config)
+    # لو في أكتر من process: واحد بس بيحمل، والباقي بيقروا snapshot مشترك على الديسك
+    if snapshot_dir:
+        from shared_snapshot import SharedSnapshotSource
+
+        source = SharedSnapshotSource(source, snapshot_dir)
+    return Refresher(source, interval=interval, warm_dir=warm_dir)
+
+
+def load_dataset(config=None, start=None, end=None):
+    source = build_source(config or resolve_source_config())
+    # مع الأرشيف الشهري: فترة معروفة = الشهور اللي بتقاطعها بس
+    # بنقرا من أول الفترة اللي قبلها / أول الـ 28 يوم عشان المقارنة والـ rolling يطلعوا زي من غير أرشيف
+    if start is not None and end is not None and hasattr(source, "load_range"):
+        return Dataset(source.load_range(context_start(start, end), end), f"range:{start}:{end}")
+    frame, version = source.load()
+    return Dataset(frame, version)
+
+
+# ======================
+# الفترة الزمنية
+# ======================
+def preset_range(name, min_date, max_date):
+    today = max_date
+    if name == "Today":
+        return today, today
+    if name == "Last 7 days":
+        return today - timedelta(days=6), today
+    if name == "This month":
+        return today.replace(day=1), today
+    if name == "All time":
+        return min_date, max_date
+    raise ValueError(f"Unknown quick range: {name!r}")
+
+
+def resolve_range(ds, start=None, end=None, preset=None):
+    if preset:
+        return preset_range(preset, ds.min_date, ds.max_date)
+    start = date.fromisoformat(start) if isinstance(start, str) else (start or ds.min_date)
+    end = date.fromisoformat(end) if isinstance(end, str) else (end or ds.max_date)
+    if start > end:
+        start, end = end, start
+    return start, end
+
+
+# ======================
+# التجميعات
+# ======================
+def kpis(ds, start, end):
+    return ds.cube.sums(start, end, TOTAL_COLUMNS)
+
+
+def kpis_by_branch(ds, start, end):
+    return {branch: kpis(ds.subset([branch]), start, end) for branch in ds.branches}
+
+
+def sentiment(kpi_values):
+    return {
+        SENTIMENT_LABELS["negative"]: kpi_values["total_not_interested"],
+        SENTIMENT_LABELS["neutral"]: kpi_values["total_asked_dates"],
+        SENTIMENT_LABELS["positive"]: kpi_values["total_new_bookings"] + kpi_values["total_interested"],
+    }
+
+
+def platform_metrics(ds, start, end, platform):
+    return ds.cube.platform_sums(start, end, platform)
+
+
+def platform_distribution(ds, start, end, outcome="total"):
+    return ds.cube.by_platform(start, end, outcome)
+
+
+def trend(ds, start, end, max_points=DEFAULT_MAX_POINTS):
+    daily = ds.cube.daily(start, end, ["total_interactions"])
+    points = downsample_series(daily, "Date", "total_interactions", max_points)
+    # متوسط آخر 7 أيام عند كل نقطة (lookup في الـ rolling windows)
+    points["avg_7d"] = ds.rolling.series(points["Date"].to_numpy(), 7, "total_interactions")
+    return points, len(daily)
+
+
+def trend_by_branch(ds, start, end, max_points=DEFAULT_MAX_POINTS):
+    # خط لكل فرع (كل واحد متقلل لوحده) في DataFrame واحد فيه عمود Branch
+    parts = []
+    for branch in ds.branches:
+        points, _ = trend(ds.subset([branch]), start, end, max_points)
+        parts.append(points.assign(**{BRANCH_COLUMN: branch}))
+    if not parts:
+        return pd.DataFrame(columns=["Date", "total_interactions", BRANCH_COLUMN])
+    return pd.concat(parts, ignore_index=True)
+
+
+# ======================
+# مقارنة بالفترة اللي قبلها + معدل التحويل + متوسطات rolling
+# كله من الـ cube: كل رقم = فرق صفين من الـ cumsum
+# ======================
+def previous_range(start, end):
+    # الفترة اللي قبل start على طول وبنفس عدد الأيام
+    length = end - start + timedelta(days=1)
+    return start - length, start - timedelta(days=1)
+
+
+def context_start(start, end):
+    # أول يوم أرقام الفترة بتعتمد عليه: الفترة اللي قبلها (المقارنة) وآخر 28 يوم لحد end (rolling)
+    prev_start, _ = previous_range(start, end)
+    return min(prev_start, end - timedelta(days=max(ROLLING_WINDOWS) - 1))
+
+
+def conversion_rate(bookings, total):
+    return bookings / total if total else None
+
+
+def pct_change(current, previous):
+    return (current - previous) / previous if previous else None
+
+
+def _compare(current, previous, has_previous, to_conversion, prev_start, prev_end):
+    current_conversion, previous_conversion = to_conversion(current), to_conversion(previous)
+    return {
+        "start": prev_start,
+        "end": prev_end,
+        "has_data": has_previous,
+        "values": previous,
+        "change": {
+            key: pct_change(current[key], previous[key]) if has_previous else None for key in current
+        },
+        "conversion": previous_conversion,
+        # فرق نقط مئوية مش نسبة تغيير
+        "conversion_change": (
+            current_conversion - previous_conversion
+            if has_previous and current_conversion is not None and previous_conversion is not None
+            else None
+        ),
+    }
+
+
+def comparison(ds, start, end):
+    prev_start, prev_end = previous_range(start, end)
+    has_previous = ds.cube.row_count(prev_start, prev_end) > 0
+    return _compare(
+        kpis(ds, start, end), kpis(ds, prev_start, prev_end), has_previous, kpi_conversion, prev_start, prev_end
+    )
+
+
+def platform_comparison(ds, start, end, platform):
+    prev_start, prev_end = previous_range(start, end)
+    has_previous = ds.cube.row_count(prev_start, prev_end) > 0
+    return _compare(
+        platform_metrics(ds, start, end, platform),
+        platform_metrics(ds, prev_start, prev_end, platform),
+        has_previous,
+        lambda values: conversion_rate(values["bookings"], values["total"]),
+        prev_start,
+        prev_end,
+    )
+
+
+def kpi_conversion(kpi_values):
+    return conversion_rate(kpi_values["total_new_bookings"], kpi_values["total_interactions"])
+
+
+def rolling_averages(ds, end, columns):
+    # متوسط اليوم في آخر 7 / 28 يوم لحد آخر يوم في الفترة
+    return {f"{window}d": ds.rolling.averages(end, window, columns) for window in ROLLING_WINDOWS}
+
+
+def platform_rolling(ds, end, platform):
+    cols_map = PLATFORM_COLS[platform]
+    averages = rolling_averages(ds, end, list(cols_map.values()))
+    return {
+        window: {metric: values[col] for metric, col in cols_map.items()}
+        for window, values in averages.items()
+    }
+
+
+def period_series(ds, granularity, start, end, platform, periods=None):
+    # periods = آخر كام فترة؛ None أو 0 = كلهم (نفس القاعدة للـ CLI والـ API)
+    if periods is not None and periods < 0:
+        raise ValueError("periods must be >= 0")
+    periods = periods or None
+    cols_map = PLATFORM_COLS[platform]
+    return ds.buckets.series(
+        granularity, start, end, [cols_map["total"], cols_map["bookings"]], periods=periods
+    )
+
+
+def last_days(ds, start, end, platform, n=7):
+    # آخر n أيام فيها داتا جوه الفترة، مجمعة يوم بيوم (None لو مفيش صفوف)
+    df_last = last_n_days(slice_days(ds.frame, start, end), n)
+    if df_last.empty:
+        return None
+    cols_map = PLATFORM_COLS[platform]
+    agg_cols = [c for c in (cols_map["total"], cols_map["bookings"]) if c in df_last.columns]
+    day_agg = df_last.groupby(level="Day")[agg_cols].sum()
+    day_agg.index = day_agg.index.strftime("%Y-%m-%d").rename("Day")
+    return day_agg
+
+
+def summary(ds, start, end, platform=None):
+    # نفس أرقام الداشبورد كـ dict جاهز لـ JSON
+    kpi_values = kpis(ds, start, end)
+    platforms = [platform] if platform else PLATFORM_NAMES
+    platform_values = {p: platform_metrics(ds, start, end, p) for p in platforms}
+    previous = comparison(ds, start, end)
+    result = {
+        "version": ds.version,
+        "range": {"start": start.isoformat(), "end": end.isoformat()},
+        "rows": ds.cube.row_count(start, end),
+        "kpis": kpi_values,
+        "sentiment": sentiment(kpi_values),
+        "platforms": platform_values,
+        "distribution": {
+            "interactions": platform_distribution(ds, start, end, "total"),
+            "bookings": platform_distribution(ds, start, end, "bookings"),
+        },
+        "conversion": {
+            "all": kpi_conversion(kpi_values),
+            "platforms": {p: conversion_rate(v["bookings"], v["total"]) for p, v in platform_values.items()},
+        },
+        "previous": {
+            "range": {"start": previous["start"].isoformat(), "end": previous["end"].isoformat()},
+            "kpis": previous["values"],
+            "change": previous["change"],
+            "conversion": previous["conversion"],
+        },
+        "rolling": rolling_averages(ds, end, TOTAL_COLUMNS),
+    }
+    if ds.branches:
+        result["branches"] = kpis_by_branch(ds, start, end)
+    return result
+
+
+def memory_report(ds):
+    # الـ frame + الـ cube (الاتنين متشاركين بين كل السيشنز في الـ process)
+    report = frame_memory(ds.frame)
+    report["cube_bytes"] = int(ds.cube.cum.nbytes + ds.cube.rows_cum.nbytes)
+    report["rolling_bytes"] = int(ds.rolling.nbytes)
+    return report
+
+
+def frame_records(frame):
+    # DataFrame صغير (فترات / أيام) → list of dicts للـ JSON
+    out = frame.reset_index()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime("%Y-%m-%d")
+    return out.to_dict(orient="records")
@@ -0,0 +1,145 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import analytics
+import http_client
+from metrics import PLATFORM_NAMES
+
+# ======================
+# HTTP JSON endpoint صغير فوق analytics: نفس أرقام الداشبورد من غير صفحة ولا متصفح
+#   GET /kpis?start=2024-01-01&end=2024-01-31&platform=Instagram   (أو range=This month)
+#   GET /periods?granularity=Week&periods=4&platform=Instagram   (periods=0 = all)
+#   GET /last-days?days=7&platform=Instagram
+#   GET /kpis?branch=Downtown&branch=Maadi   (فروع معينة بس)
+#   GET /health
+# ======================
+
+
+class DatasetCache:
+    # Dataset واحد لكل version من الداتا، بيتبني تاني بس لما الـ Refresher يجيب داتا جديدة
+    def __init__(self, refresher):
+        self.refresher = refresher
+        self._dataset = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        frame, version, _ = self.refresher.get()
+        with self._lock:
+            if self._dataset is None or self._dataset.version != version:
+                self._dataset = analytics.Dataset(frame, version, previous=self._dataset).materialize_presets()
+            return self._dataset
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def _int_param(query, name, default):
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer") from None
+
+
+def _range(ds, query):
+    preset = _param(query, "range")
+    if preset and preset not in analytics.QUICK_RANGES:
+        raise BadRequest(f"range must be one of {analytics.QUICK_RANGES}")
+    try:
+        return analytics.resolve_range(ds, _param(query, "start"), _param(query, "end"), preset)
+    except ValueError:
+        raise BadRequest("start / end must be YYYY-MM-DD") from None
+
+
+def _platform(query, default=None):
+    platform = _param(query, "platform", default)
+    if platform is not None and platform not in PLATFORM_NAMES:
+        raise BadRequest(f"platform must be one of {PLATFORM_NAMES}")
+    return platform
+
+
+def handle(datasets, path, query):
+    if path == "/health":
+        health = datasets.refresher.health()
+        snapshot = datasets.refresher.snapshot
+        health["version"] = snapshot[1] if snapshot else None
+        health["http"] = http_client.shared_client().report()
+        return health
+    if path not in ("/kpis", "/periods", "/last-days"):
+        return None
+    ds = datasets.get()
+    branches = query.get("branch")
+    if branches:
+        unknown = sorted(set(branches) - set(ds.branches))
+        if unknown:
+            raise BadRequest(f"unknown branch(es) {unknown}; available: {ds.branches}")
+        ds = ds.subset(branches)
+    start, end = _range(ds, query)
+    if path == "/kpis":
+        return ds.range(start, end).summary(_platform(query))
+    if path == "/periods":
+        granularity = _param(query, "granularity", "Week")
+        if granularity not in analytics.GRANULARITIES:
+            raise BadRequest(f"granularity must be one of {analytics.GRANULARITIES}")
+        platform = _platform(query, PLATFORM_NAMES[0])
+        periods = _int_param(query, "periods", 4)
+        if periods < 0:
+            raise BadRequest("periods must be >= 0")
+        series = ds.range(start, end).periods(granularity, platform, periods)
+        return {"version": ds.version, "granularity": granularity, "platform": platform,
+                "periods": analytics.frame_records(series)}
+    if path == "/last-days":
+        platform = _platform(query, PLATFORM_NAMES[0])
+        day_agg = ds.range(start, end).last_days(platform, _int_param(query, "days", 7))
+        return {"version": ds.version, "platform": platform,
+                "days": [] if day_agg is None else analytics.frame_records(day_agg)}
+
+
+def make_handler(datasets):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            try:
+                body = handle(datasets, url.path.rstrip("/") or "/", parse_qs(url.query))
+                status = 200 if body is not None else 404
+                if body is None:
+                    body = {"error": f"unknown endpoint {url.path}"}
+            except BadRequest as e:
+                status, body = 400, {"error": str(e)}
+            except RuntimeError as e:
+                # أول تحميل للداتا فشل
+                status, body = 503, {"error": str(e)}
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(config, host="127.0.0.1", port=8080):
+    refresher = analytics.build_refresher(config).start()
+    server = ThreadingHTTPServer((host, port), make_handler(DatasetCache(refresher)))
+    print(f"serving clinic KPIs on http://{host}:{port}/kpis")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        refresher.stop()
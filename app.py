@@ -1,7 +1,20 @@
 import streamlit as st
 import pandas as pd
-import altair as alt
-from datetime import datetime, timedelta, date
+import hashlib
+import os
+import time
+from datetime import datetime
+
+rerun_started = time.perf_counter()
+
+import analytics
+import chart_specs
+import http_client
+from bucketing import GRANULARITIES
+from downsample import DEFAULT_MAX_POINTS
+from metrics import PLATFORM_COLS, PLATFORM_NAMES
+from perf import PROCESS_STARTED, RECORDER, WINDOW, export, span
+from sources import default_source_config, source_config_from_env, source_layers
 
 # ======================
 # إعدادات الصفحة (لازم تبقى أول حاجة في الكود)
@@ -14,221 +27,137 @@ st.set_page_config(
 
 # ======================
 # Modern CSS Styling
+# الـ CSS في static/dashboard.css: المتصفح بيجيبه مرة ويكيّشه بدل ما يتبعت كله في كل rerun
+# (الـ ?v= بيتغير لما الملف يتغير). لو الـ static serving مقفول بنرجع لـ <style> inline
 # ======================
-st.markdown("""
-<style>
-    /* Modern card design with gradients */
-    .modern-card {
-        background: white;
-        padding: 20px;
-        border-radius: 16px;
-        box-shadow: 0 4px 20px rgba(0, 0, 0, 0.08);
-        border: 1px solid #f0f0f0;
-        text-align: center;
-        transition: transform 0.2s ease;
-        margin: 5px;
-        position: relative;
-        overflow: hidden;
-    }
-    .modern-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 4px;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    }
-    .modern-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 25px rgba(0, 0, 0, 0.12);
-    }
-    .card-icon {
-        font-size: 28px;
-        margin-bottom: 12px;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    .card-title {
-        font-size: 12px;
-        font-weight: 700;
-        color: #666;
-        margin-bottom: 8px;
-        text-transform: uppercase;
-        letter-spacing: 0.8px;
-    }
-    .card-value {
-        font-size: 32px;
-        font-weight: 800;
-        color: #2c3e50;
-        margin: 0;
-        background: linear-gradient(135deg, #2c3e50 0%, #3498db 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    .card-subtitle {
-        font-size: 11px;
-        color: #888;
-        margin-top: 5px;
-        font-weight: 500;
-    }
-    
-    /* Gradient background cards for platform metrics */
-    .gradient-card {
-        padding: 20px;
-        border-radius: 15px;
-        color: white;
-        text-align: center;
-        box-shadow: 0 6px 20px rgba(0, 0, 0, 0.15);
-        margin: 5px;
-        min-height: 120px;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-        align-items: center;
-        position: relative;
-        overflow: hidden;
-    }
-    .gradient-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: rgba(255, 255, 255, 0.1);
-        z-index: 1;
-    }
-    .gradient-title {
-        font-size: 12px;
-        font-weight: 600;
-        margin-bottom: 8px;
-        opacity: 0.9;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        position: relative;
-        z-index: 2;
-    }
-    .gradient-value {
-        font-size: 36px;
-        font-weight: 800;
-        margin: 0;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.2);
-        position: relative;
-        z-index: 2;
-    }
-    
-    /* General dashboard styling */
-    .main .block-container {
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+CSS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "dashboard.css")
 
-# ======================
-# رابط الـ CSV بتاع Google Sheets
-# ======================
-GOOGLE_SHEET_CSV_URL = (
-    "https://docs.google.com/spreadsheets/d/e/"
-    "2PACX-1vTbn8mE8Z8QSRfb73Lk63htHUK31I59W5ZDaDTb81dtVK0Q61tczvnfGgGVQMYndidyxG8IdKuuVZ4o/"
-    "pub?gid=551101663&single=true&output=csv"
-)
+
+@st.cache_resource
+def dashboard_css():
+    with open(CSS_FILE, encoding="utf-8") as f:
+        css = f.read()
+    if st.get_option("server.enableStaticServing"):
+        digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+        return f'<link rel="stylesheet" href="app/static/dashboard.css?v={digest}">'
+    return f"<style>\n{css}</style>"
+
+
+st.markdown(dashboard_css(), unsafe_allow_html=True)
 
 # ======================
 # دوال مساعدة
 # ======================
-def safe_sum_per_row(df, cols):
-    existing = [c for c in cols if c in df.columns]
-    if not existing:
-        return 0
-    return df[existing].sum(axis=1)
-
-def safe_col_sum(df, col_name):
-    return int(df[col_name].sum()) if col_name in df.columns else 0
+# مصدر الداتا بيتحدد من [data_source] في st.secrets، أو CLINIC_DATA_SOURCE،
+# وإلا الشيت المنشور على Google
+def get_source_config():
+    try:
+        if "data_source" in st.secrets:
+            return dict(st.secrets["data_source"])
+    except FileNotFoundError:
+        pass
+    return source_config_from_env() or default_source_config()
+
+# Refresher واحد مشترك بين كل السيشنز: بيجيب الداتا في الخلفية كل ٥ ثواني
+# (طلب مشروط، ومش بيعمل parse تاني غير لو الداتا اتغيرت)
+# والسيشنز بتقرا آخر snapshot سليم من غير ما تستنى الشبكة
+@st.cache_resource(on_release=lambda refresher: refresher.stop())
+def get_refresher():
+    return analytics.build_refresher(get_source_config()).start()
 
-@st.cache_data(ttl=5)
 def load_data():
-    df = pd.read_csv(GOOGLE_SHEET_CSV_URL)
-
-    # نتأكد إن اسم العمود Date مكتوب صح
-    if "Date" not in df.columns:
-        raise ValueError("Column 'Date' not found in sheet. تأكد إن أول عمود اسمه Date بالظبط.")
-
-    # نحول التاريخ
-    df["Date"] = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
-    df = df.dropna(subset=["Date"]).sort_values("Date")
-
-    # نعمل أعمدة إجمالية
-    df["total_interactions"] = safe_sum_per_row(
-        df,
-        [
-            "Total Calls Received",
-            "WhatsApp Answered",
-            "Instagram Answered",
-            "TikTok Answered",
-        ],
-    )
-
-    df["total_new_bookings"] = safe_sum_per_row(
-        df,
-        [
-            "New Bookings - Insta",
-            "New Bookings - Call",
-            "New Bookings - Whats",
-            "New Bookings - TikTok",
-        ],
-    )
-
-    df["total_interested"] = safe_sum_per_row(
-        df,
-        [
-            "Interested - Insta",
-            "Interested - Whats",
-            "Interested - TikTok",
-        ],
-    )
-
-    df["total_not_interested"] = safe_sum_per_row(
-        df,
-        [
-            "Not Interested - Insta",
-            "Not Interested - Whats",
-            "Not Interested - TikTok",
-        ],
-    )
+    frame, version, _ = get_refresher().get()
+    return frame, version
+
+# بعد restart الصفحة بتترسم من الـ warm snapshot؛ أول ما التحميل من المصدر يخلص نعمل rerun مرة واحدة
+@st.fragment(run_every=2)
+def wait_for_fresh_data():
+    if not get_refresher().warm:
+        st.rerun()
+
+# الـ cube ومفاتيح الفترات بيتبنوا مرة واحدة لكل version من الداتا ويتشاركوا بين كل السيشنز،
+# ونتايج الـ Quick Ranges بتتحسب هنا كمان: فتح الصفحة بعد كده = dict lookup
+# الـ Vega-Lite specs الجاهزة (متشاركة بين كل السيشنز، LRU)
+@st.cache_resource
+def get_spec_cache():
+    return chart_specs.SpecCache(int(get_setting("chart_cache_size", "CLINIC_CHART_CACHE_SIZE", chart_specs.CHART_SPEC_CACHE)))
+
+def show_chart(key, build):
+    # key = (version, view, start, end, platform, اسم الـ chart, ...)؛ build بيتنادى بس أول مرة
+    st.vega_lite_chart(get_spec_cache().get(key, build), width="stretch")
+
+# وقت أول صفحة اترسمت في الـ process (time-to-first-render في لوحة الـ debug)
+@st.cache_resource
+def get_first_render():
+    return {}
+
+# آخر Dataset اتبنى: الـ version الجاية بتكمل منه الـ rolling windows (الأيام الجديدة بس)
+@st.cache_resource
+def get_latest_dataset():
+    return {}
+
+@st.cache_resource(max_entries=2)
+def get_dataset(data_version, _df):
+    latest = get_latest_dataset()
+    ds = analytics.Dataset(_df, data_version, previous=latest.get("dataset")).materialize_presets()
+    latest["dataset"] = ds
+    return ds
+
+def get_setting(name, env_name, default=None):
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except FileNotFoundError:
+        pass
+    return os.environ.get(env_name, default)
+
+# لوحة الـ debug بتظهر بـ ?debug=1 أو debug = true في st.secrets أو CLINIC_DEBUG=1
+def debug_enabled():
+    if st.query_params.get("debug") == "1":
+        return True
+    return str(get_setting("debug", "CLINIC_DEBUG", "")).lower() in ("1", "true", "yes")
 
-    df["total_asked_dates"] = safe_sum_per_row(
-        df,
-        [
-            "Asked About Dates - Insta",
-            "Asked About Dates - Whats",
-            "Asked About Dates - TikTok",
-        ],
-    )
-
-    # هنا استخدمنا نفس الـ apostrophe اللي في الشيت: Didn’t
-    df["total_no_reply"] = safe_sum_per_row(
-        df,
-        [
-            "Didn’t Answer - Insta",
-            "Didn’t Answer - Whats",
-            "Didn’t Answer - TikTok",
-            "Didn’t Answer - Call",   # لو العمود موجود للكولز
-        ],
-    )
-
-    return df
+# ======================
+# سطور المقارنة تحت كل كارت: التغيير عن الفترة اللي قبلها + متوسط آخر 7 / 28 يوم
+# higher_is_better=False للأرقام اللي زيادتها وحشة (Not interested / Didn't answer)
+# ======================
+def change_text(change, points=False):
+    if change is None:
+        return "—"
+    arrow = "▲" if change > 0 else "▼" if change < 0 else "■"
+    return f"{arrow} {abs(change) * 100:.1f} pts" if points else f"{arrow} {abs(change):.1%}"
+
+def change_class(change, higher_is_better=True):
+    if not change:
+        return ""
+    return "good" if (change > 0) == higher_is_better else "bad"
+
+def rolling_text(averages, key):
+    week, month = averages["7d"][key], averages["28d"][key]
+    if week is None:
+        return ""
+    return f"7d avg {week:,.1f} · 28d avg {month:,.1f} /day"
+
+def previous_label(start, end):
+    days = (end - start).days + 1
+    return "vs previous day" if days == 1 else f"vs previous {days} days"
+
+# أوقات الـ rerun ده (بالإضافة للـ rolling window اللي في RECORDER)
+rerun_timings = {}
 
 # ======================
 # تحميل الداتا
 # ======================
-df = load_data()
-min_date = df["Date"].min().date()
-max_date = df["Date"].max().date()
+try:
+    with span("load_data", rerun_timings):
+        df, data_version = load_data()
+except RuntimeError as e:
+    st.error(f"مش قادرين نحمل الداتا: {e}")
+    st.stop()
+with span("cube", rerun_timings):
+    ds = get_dataset(data_version, df)
+min_date = ds.min_date
+max_date = ds.max_date
 
 # ======================
 # الـ Sidebar – فلاتر الزمن
@@ -238,24 +167,11 @@ with st.sidebar:
 
     quick_range = st.radio(
         "Quick Range",
-        ["Today", "Last 7 days", "This month", "All time"],
+        analytics.QUICK_RANGES,
         index=2,
     )
 
-    today = max_date
-
-    if quick_range == "Today":
-        default_start = today
-        default_end = today
-    elif quick_range == "Last 7 days":
-        default_start = today - timedelta(days=6)
-        default_end = today
-    elif quick_range == "This month":
-        default_start = today.replace(day=1)
-        default_end = today
-    else:  # All time
-        default_start = min_date
-        default_end = max_date
+    default_start, default_end = analytics.preset_range(quick_range, min_date, max_date)
 
     start_date = st.date_input(
         "Start date",
@@ -275,11 +191,86 @@ with st.sidebar:
         st.warning("Start date بعد End date – تم تعديله تلقائيًا.")
         start_date, end_date = end_date, start_date
 
-# نفلتر الداتا
-mask = (df["Date"].dt.date >= start_date) & (df["Date"].dt.date <= end_date)
-df_filtered = df.loc[mask].copy()
+    # الفروع (لو المصدر فيه أكتر من شيت): فلتر + مقارنة لما يتختار أكتر من فرع
+    if ds.branches:
+        selected_branches = st.multiselect("Branch", ds.branches, default=ds.branches)
+    else:
+        selected_branches = []
 
-if df_filtered.empty:
+    # حالة الـ Refresher: الداتا معروضة لحد إمتى، وآخر تحميل نجح ولا لأ
+    st.markdown("---")
+    refresher = get_refresher()
+    health = refresher.health()
+    if health["as_of"] is not None:
+        st.caption(f"🕒 Data as of {datetime.fromtimestamp(health['as_of']):%Y-%m-%d %H:%M:%S}")
+    if health["status"] == "ok":
+        st.caption(f"🟢 Auto-refresh every {health['interval']:g}s")
+    elif health["status"] == "warm":
+        st.caption("🟡 Showing the last saved data while fresh data loads…")
+        wait_for_fresh_data()
+    else:
+        st.caption(
+            f"🟠 Refresher {health['status']}: {health['consecutive_failures']} failed attempt(s) — "
+            f"showing last good data. {health['last_error'] or ''}"
+        )
+    layers, base_source = source_layers(refresher.source)
+    if "shared" in layers:
+        st.caption(f"🗂️ Shared snapshot ({layers['shared'].role})")
+    # كل فرع ممكن يبقى ملفوف في أرشيف لوحده
+    branch_sources = base_source.sources if base_source.kind == "multi" else {"": refresher.source}
+    branch_layers = {name: source_layers(source) for name, source in branch_sources.items()}
+    for name, (wrappers, _) in branch_layers.items():
+        archive_source = wrappers.get("archive")
+        if archive_source is not None:
+            months = archive_source.archive.months()
+            prefix = f"{name}: " if name else ""
+            st.caption(
+                f"🗄️ {prefix}Archive: {len(months)} closed month(s) read from disk; the sheet is still "
+                f"fetched, but only its rows after {months[-1] if months else '—'} are used"
+            )
+    for branch, error in getattr(base_source, "branch_errors", {}).items():
+        st.caption(f"🟠 {branch}: {error} — showing last good data.")
+
+    # طلبات الشيت (HTTP client المشترك): السرعة والفشل، ولو host واقع والـ breaker مفتوح
+    http = http_client.shared_client().report()
+    if http["fetches"] or http["failures"]:
+        st.caption(
+            f"🌐 Sheet fetch p50 {http['p50_ms'] or 0:,.0f} ms · p95 {http['p95_ms'] or 0:,.0f} ms · "
+            f"{http['fetches']} ok ({http['not_modified']} unchanged) · {http['failures']} failed · "
+            f"{http['retries']} retries"
+        )
+    for host, breaker in http["breakers"].items():
+        if breaker["state"] != "closed":
+            st.caption(f"⛔ {host} unreachable — next try in {breaker['retry_in']:.0f}s")
+
+    # القراية بالـ chunks (type = "stream") بتسجل الصفوف اللي فيها مشاكل بدل ما تتشال في صمت
+    reports = {name: getattr(source, "report", None) for name, (_, source) in branch_layers.items()}
+    for name, report in reports.items():
+        if report is not None and (report.problems or report.missing_columns):
+            prefix = f"{name}: " if name else ""
+            st.caption(
+                f"⚠️ {prefix}{report.problems} bad value(s) in {report.rows:,} sheet rows "
+                f"(counted as 0 / row skipped)"
+                + (f"; missing columns: {', '.join(report.missing_columns)}" if report.missing_columns else "")
+            )
+            if report.issues:
+                with st.expander(f"{prefix}Data problems"):
+                    st.dataframe(pd.DataFrame(report.issues).set_index("row"), width="stretch")
+
+if ds.branches:
+    if not selected_branches:
+        st.warning("اختار فرع واحد على الأقل.")
+        st.stop()
+    ds = ds.subset(selected_branches)
+# المقارنة بين الفروع بتظهر بس لما يكون في أكتر من فرع مختار
+compare_branches = ds.branches if len(ds.branches) > 1 else []
+
+# كل الأرقام بتيجي من الـ cube: مجموع أي فترة = lookup واحد
+with span("filter", rerun_timings):
+    results = ds.range(start_date, end_date)
+    has_rows = results.rows > 0
+
+if not has_rows:
     st.warning("لا توجد بيانات في الفترة الزمنية المختارة.")
     st.stop()
 
@@ -293,22 +284,46 @@ st.title("📊 AL-Basma Clinic ")
 # ======================
 st.subheader("📊 Overview Metrics")
 
-total_interactions = int(df_filtered["total_interactions"].sum())
-total_new_bookings = int(df_filtered["total_new_bookings"].sum())
-total_interested = int(df_filtered["total_interested"].sum())
-total_not_interested = int(df_filtered["total_not_interested"].sum())
-total_no_reply = int(df_filtered["total_no_reply"].sum())
+kpis_started = time.perf_counter()
+kpis = results.kpis
+branch_kpis = results.branch_kpis if compare_branches else {}
+kpi_changes = results.comparison
+kpi_rolling = results.rolling
+vs_previous = previous_label(start_date, end_date)
+
+total_interactions = kpis["total_interactions"]
+total_new_bookings = kpis["total_new_bookings"]
+total_interested = kpis["total_interested"]
+total_not_interested = kpis["total_not_interested"]
+total_no_reply = kpis["total_no_reply"]
 
 metrics_data = [
-    {"icon": "💬", "title": "TOTAL INTERACTIONS", "value": total_interactions, "subtitle": "customer engagements"},
-    {"icon": "✅", "title": "NEW BOOKINGS", "value": total_new_bookings, "subtitle": "confirmed appointments"},
-    {"icon": "🎯", "title": "INTERESTED", "value": total_interested, "subtitle": "potential clients"},
-    {"icon": "❌", "title": "NOT INTERESTED", "value": total_not_interested, "subtitle": "declined offers"},
-    {"icon": "⏸️", "title": "DIDN'T ANSWER", "value": total_no_reply, "subtitle": "no response"},
+    {"icon": "💬", "title": "TOTAL INTERACTIONS", "value": total_interactions, "subtitle": "customer engagements", "column": "total_interactions"},
+    {"icon": "✅", "title": "NEW BOOKINGS", "value": total_new_bookings, "subtitle": "confirmed appointments", "column": "total_new_bookings"},
+    {"icon": "🎯", "title": "INTERESTED", "value": total_interested, "subtitle": "potential clients", "column": "total_interested"},
+    {"icon": "❌", "title": "NOT INTERESTED", "value": total_not_interested, "subtitle": "declined offers", "column": "total_not_interested", "higher_is_better": False},
+    {"icon": "⏸️", "title": "DIDN'T ANSWER", "value": total_no_reply, "subtitle": "no response", "column": "total_no_reply", "higher_is_better": False},
 ]
+# معدل التحويل (bookings ÷ interactions) تحت كارت الحجوزات
+booking_conversion = analytics.kpi_conversion(kpis)
 
 cols = st.columns(5)
 for col, metric in zip(cols, metrics_data):
+    # لما يكون في أكتر من فرع: قيمة كل فرع تحت الإجمالي
+    branch_lines = "<br>".join(
+        f"{branch}: <b>{values[metric['column']]:,}</b>" for branch, values in branch_kpis.items()
+    )
+    if branch_lines:
+        branch_lines = f'<div class="card-branches">{branch_lines}</div>'
+    change = kpi_changes["change"][metric["column"]]
+    delta_class = change_class(change, metric.get("higher_is_better", True))
+    extra_lines = f'<div class="card-rolling">{rolling_text(kpi_rolling, metric["column"])}</div>'
+    if metric["column"] == "total_new_bookings" and booking_conversion is not None:
+        conversion_change = kpi_changes["conversion_change"]
+        extra_lines += (
+            f'<div class="card-rolling">Conversion <b>{booking_conversion:.1%}</b>'
+            f'{f" ({change_text(conversion_change, points=True)})" if conversion_change is not None else ""}</div>'
+        )
     with col:
         st.markdown(f"""
         <div class="modern-card">
@@ -316,9 +331,13 @@ for col, metric in zip(cols, metrics_data):
             <div class="card-title">{metric['title']}</div>
             <div class="card-value">{metric['value']:,}</div>
             <div class="card-subtitle">{metric['subtitle']}</div>
+            <div class="card-delta {delta_class}">{change_text(change)} <span>{vs_previous}</span></div>{extra_lines}{branch_lines}
         </div>
         """, unsafe_allow_html=True)
 
+rerun_timings["kpis"] = time.perf_counter() - kpis_started
+RECORDER.record("kpis", rerun_timings["kpis"])
+
 st.markdown("---")
 
 # ======================
@@ -331,128 +350,85 @@ view = st.radio(
 )
 
 # ======================
-# تعريف خريطة المنصات
+# كل view (وكل جزء فيه selector للمنصة) fragment لوحده:
+# تغيير الـ selector بيعيد تشغيل الجزء بتاعه بس، من غير الـ CSS والـ KPIs وباقي الصفحة
 # ======================
-PLATFORM_COLS = {
-    "Instagram": {
-        "total": "Instagram Answered",
-        "bookings": "New Bookings - Insta",
-        "asked_dates": "Asked About Dates - Insta",
-        "interested": "Interested - Insta",
-        "not_interested": "Not Interested - Insta",
-        "no_reply": "Didn’t Answer - Insta",
-    },
-    "WhatsApp": {
-        "total": "WhatsApp Answered",
-        "bookings": "New Bookings - Whats",
-        "asked_dates": "Asked About Dates - Whats",
-        "interested": "Interested - Whats",
-        "not_interested": "Not Interested - Whats",
-        "no_reply": "Didn’t Answer - Whats",
-    },
-    "TikTok": {
-        "total": "TikTok Answered",
-        "bookings": "New Bookings - TikTok",
-        "asked_dates": "Asked About Dates - TikTok",
-        "interested": "Interested - TikTok",
-        "not_interested": "Not Interested - TikTok",
-        "no_reply": "Didn’t Answer - TikTok",
-    },
-    "Calls": {
-        "total": "Total Calls Received",
-        "bookings": "New Bookings - Call",
-        "asked_dates": "Asked About Dates - Call",
-        "interested": "Interested - Call",
-        "not_interested": "Not Interested - Call",
-        "no_reply": "Didn’t Answer - Call",
-    },
-}
 
 # ======================
 # 1) OVERVIEW VIEW
 # ======================
-if view == "Overview":
+@st.fragment
+@span("view.overview", rerun_timings)
+def overview_view(ds, start_date, end_date):
     col_trend, col_sent = st.columns(2)
 
     with col_trend:
         st.subheader("Inquiry Trends")
-        daily = (
-            df_filtered.groupby("Date")[
-                ["total_interactions", "total_interested",
-                 "total_new_bookings", "total_not_interested"]
-            ]
-            .sum()
-            .reset_index()
-        )
 
-        trend_chart = alt.Chart(daily).mark_line(point=True).encode(
-            x="Date:T",
-            y="total_interactions:Q",
-            tooltip=["Date", "total_interactions"]
-        ).properties(width="container")
-
-        st.altair_chart(trend_chart, use_container_width=True)
+        # عدد النقط اللي بتتبعت للمتصفح ثابت مهما طالت الفترة (LTTB)
+        max_points = int(get_setting("trend_max_points", "CLINIC_TREND_MAX_POINTS", DEFAULT_MAX_POINTS))
+        results = ds.range(start_date, end_date)
+        if compare_branches:
+            # خط لكل فرع
+            show_chart(
+                (ds.version, "overview", start_date, end_date, None, "trend_by_branch", max_points),
+                lambda: chart_specs.trend_chart(results.trend_by_branch(max_points), by_branch=True),
+            )
+        else:
+            trend_points, n_days = results.trend(max_points)
+            if len(trend_points) < n_days:
+                st.caption(f"Showing {len(trend_points)} of {n_days} days (downsampled, peaks kept).")
+            show_chart(
+                (ds.version, "overview", start_date, end_date, None, "trend", max_points),
+                lambda: chart_specs.trend_chart(trend_points),
+            )
 
     with col_sent:
         st.subheader("Customer Sentiment")
 
-        negative_total = int(df_filtered["total_not_interested"].sum())
-        neutral_total = int(df_filtered["total_asked_dates"].sum())
-        positive_total = int(
-            df_filtered["total_new_bookings"].sum()
-            + df_filtered["total_interested"].sum()
+        show_chart(
+            (ds.version, "overview", start_date, end_date, None, "sentiment"),
+            lambda: chart_specs.sentiment_chart(
+                pd.DataFrame(list(results.sentiment.items()), columns=["Sentiment", "Count"])
+            ),
         )
 
-        sentiment_df = pd.DataFrame(
-            {
-                "Sentiment": [
-                    "Negative (Not interested)",
-                    "Neutral (Asked about dates)",
-                    "Positive (Bookings + Interested)",
-                ],
-                "Count": [negative_total, neutral_total, positive_total],
-            }
-        )
-
-        sentiment_chart = alt.Chart(sentiment_df).mark_bar().encode(
-            x="Sentiment:N",
-            y="Count:Q",
-            color="Sentiment:N",
-            tooltip=["Sentiment", "Count"]
-        ).properties(width="container")
-
-        st.altair_chart(sentiment_chart, use_container_width=True)
 
 # ======================
 # 2) PLATFORMS VIEW
 # ======================
-elif view == "Platforms":
-    st.subheader("Platform Breakdown (per platform)")
-
+@st.fragment
+@span("view.platforms.breakdown", rerun_timings)
+def platform_breakdown_section(ds, start_date, end_date):
     selected_platform = st.selectbox(
         "Select Platform:",
-        ["Instagram", "WhatsApp", "TikTok", "Calls"],
+        PLATFORM_NAMES,
         key="platform_breakdown_select",
     )
 
-    cols_map = PLATFORM_COLS[selected_platform]
+    platform_results = ds.range(start_date, end_date)
+    platform_totals = platform_results.platform(selected_platform)
+    platform_changes = platform_results.platform_comparison(selected_platform)
+    platform_rolling = platform_results.platform_rolling(selected_platform)
+    platform_conversion = analytics.conversion_rate(platform_totals["bookings"], platform_totals["total"])
+    vs_previous = previous_label(start_date, end_date)
 
-    total_platform_interactions = safe_col_sum(df_filtered, cols_map["total"])
-    platform_bookings = safe_col_sum(df_filtered, cols_map["bookings"])
-    platform_asked_dates = safe_col_sum(df_filtered, cols_map["asked_dates"])
-    platform_interested = safe_col_sum(df_filtered, cols_map["interested"])
-    platform_not_interested = safe_col_sum(df_filtered, cols_map["not_interested"])
-    platform_no_reply = safe_col_sum(df_filtered, cols_map["no_reply"])
+    total_platform_interactions = platform_totals["total"]
+    platform_bookings = platform_totals["bookings"]
+    platform_asked_dates = platform_totals["asked_dates"]
+    platform_interested = platform_totals["interested"]
+    platform_not_interested = platform_totals["not_interested"]
+    platform_no_reply = platform_totals["no_reply"]
 
     st.subheader(f"📊 {selected_platform} Performance")
 
     platform_metrics = [
-        {"title": "TOTAL INTERACTIONS", "value": total_platform_interactions, "gradient": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"},
-        {"title": "NEW BOOKINGS", "value": platform_bookings, "gradient": "linear-gradient(135deg, #11998e 0%, #38ef7d 100%)"},
-        {"title": "ASKED ABOUT DATES", "value": platform_asked_dates, "gradient": "linear-gradient(135deg, #fc466b 0%, #3f5efb 100%)"},
-        {"title": "INTERESTED", "value": platform_interested, "gradient": "linear-gradient(135deg, #fdbb2d 0%, #22c1c3 100%)"},
-        {"title": "NOT INTERESTED", "value": platform_not_interested, "gradient": "linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%)"},
-        {"title": "DIDN'T ANSWER", "value": platform_no_reply, "gradient": "linear-gradient(135deg, #8A2387 0%, #E94057 50%, #F27121 100%)"},
+        {"title": "TOTAL INTERACTIONS", "value": total_platform_interactions, "metric": "total", "gradient": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"},
+        {"title": "NEW BOOKINGS", "value": platform_bookings, "metric": "bookings", "gradient": "linear-gradient(135deg, #11998e 0%, #38ef7d 100%)"},
+        {"title": "ASKED ABOUT DATES", "value": platform_asked_dates, "metric": "asked_dates", "gradient": "linear-gradient(135deg, #fc466b 0%, #3f5efb 100%)"},
+        {"title": "INTERESTED", "value": platform_interested, "metric": "interested", "gradient": "linear-gradient(135deg, #fdbb2d 0%, #22c1c3 100%)"},
+        {"title": "NOT INTERESTED", "value": platform_not_interested, "metric": "not_interested", "gradient": "linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%)"},
+        {"title": "DIDN'T ANSWER", "value": platform_no_reply, "metric": "no_reply", "gradient": "linear-gradient(135deg, #8A2387 0%, #E94057 50%, #F27121 100%)"},
     ]
 
     row1 = st.columns(3)
@@ -460,54 +436,64 @@ elif view == "Platforms":
     all_cols = row1 + row2
 
     for col, metric in zip(all_cols, platform_metrics):
+        extra_lines = (
+            f'<div class="gradient-extra">{change_text(platform_changes["change"][metric["metric"]])} {vs_previous}</div>'
+            f'<div class="gradient-extra">{rolling_text(platform_rolling, metric["metric"])}</div>'
+        )
+        if metric["metric"] == "bookings" and platform_conversion is not None:
+            extra_lines += f'<div class="gradient-extra">Conversion {platform_conversion:.1%}</div>'
         with col:
             st.markdown(f"""
             <div class="gradient-card" style="background: {metric['gradient']};">
                 <div class="gradient-title">{metric['title']}</div>
-                <div class="gradient-value">{metric['value']}</div>
+                <div class="gradient-value">{metric['value']}</div>{extra_lines}
             </div>
             """, unsafe_allow_html=True)
 
     st.markdown("---")
     st.subheader("Platform Distribution")
 
-    platform_cols_simple = {
-        "Instagram": "Instagram Answered",
-        "WhatsApp": "WhatsApp Answered",
-        "TikTok": "TikTok Answered",
-        "Calls": "Total Calls Received",
-    }
-
-    platform_data = {p: df_filtered[c].sum() for p, c in platform_cols_simple.items() if c in df_filtered.columns}
-    pie_df = pd.DataFrame(list(platform_data.items()), columns=["Platform", "Count"])
-    pie_chart = alt.Chart(pie_df).mark_arc(innerRadius=50).encode(
-        theta="Count:Q", color="Platform:N", tooltip=["Platform", "Count"]
+    show_chart(
+        (ds.version, "platforms", start_date, end_date, None, "pie"),
+        lambda: chart_specs.pie_chart(
+            pd.DataFrame(list(platform_results.distribution("total").items()), columns=["Platform", "Count"])
+        ),
     )
-    st.altair_chart(pie_chart, use_container_width=True)
 
     st.subheader("Performance Summary")
-    platform_summary = pd.DataFrame(
-        {
-            "Metric": [
-                "Total",
-                "New bookings",
-                "Asked dates",
-                "Interested",
-                "Not interested",
-                "Didn't answer",
-            ],
-            "Count": [
-                total_platform_interactions,
-                platform_bookings,
-                platform_asked_dates,
-                platform_interested,
-                platform_not_interested,
-                platform_no_reply,
-            ],
-        }
-    ).set_index("Metric")
-
-    st.bar_chart(platform_summary)
+
+    def summary_chart():
+        platform_summary = pd.DataFrame(
+            {
+                "Metric": [
+                    "Total",
+                    "New bookings",
+                    "Asked dates",
+                    "Interested",
+                    "Not interested",
+                    "Didn't answer",
+                ],
+                "Count": [
+                    total_platform_interactions,
+                    platform_bookings,
+                    platform_asked_dates,
+                    platform_interested,
+                    platform_not_interested,
+                    platform_no_reply,
+                ],
+            }
+        ).set_index("Metric")
+        return chart_specs.bar_chart(platform_summary)
+
+    show_chart((ds.version, "platforms", start_date, end_date, selected_platform, "summary"), summary_chart)
+
+
+@st.fragment
+@span("view.platforms", rerun_timings)
+def platforms_view(ds, start_date, end_date):
+    st.subheader("Platform Breakdown (per platform)")
+
+    platform_breakdown_section(ds, start_date, end_date)
 
     st.markdown("---")
     st.subheader("Platforms Overview")
@@ -516,153 +502,184 @@ elif view == "Platforms":
 
     with col_left:
         st.caption("Interactions per platform")
-        interactions_cols = {}
-        if "Instagram Answered" in df_filtered.columns:
-            interactions_cols["Instagram"] = df_filtered["Instagram Answered"].sum()
-        if "WhatsApp Answered" in df_filtered.columns:
-            interactions_cols["WhatsApp"] = df_filtered["WhatsApp Answered"].sum()
-        if "TikTok Answered" in df_filtered.columns:
-            interactions_cols["TikTok"] = df_filtered["TikTok Answered"].sum()
-        if "Total Calls Received" in df_filtered.columns:
-            interactions_cols["Calls"] = df_filtered["Total Calls Received"].sum()
-
+        interactions_cols = ds.range(start_date, end_date).distribution("total")
         if interactions_cols:
-            interactions_df = (
-                pd.DataFrame(list(interactions_cols.items()), columns=["Platform", "Count"])
-                .set_index("Platform")
+            show_chart(
+                (ds.version, "platforms", start_date, end_date, None, "interactions"),
+                lambda: chart_specs.bar_chart(
+                    pd.DataFrame(list(interactions_cols.items()), columns=["Platform", "Count"])
+                    .set_index("Platform")
+                ),
             )
-            st.bar_chart(interactions_df)
         else:
             st.info("لا توجد أعمدة تفاعل للمنصات في الشيت.")
 
     with col_right:
         st.caption("New bookings per platform")
-        bookings_cols = {}
-        if "New Bookings - Insta" in df_filtered.columns:
-            bookings_cols["Instagram"] = df_filtered["New Bookings - Insta"].sum()
-        if "New Bookings - Whats" in df_filtered.columns:
-            bookings_cols["WhatsApp"] = df_filtered["New Bookings - Whats"].sum()
-        if "New Bookings - TikTok" in df_filtered.columns:
-            bookings_cols["TikTok"] = df_filtered["New Bookings - TikTok"].sum()
-        if "New Bookings - Call" in df_filtered.columns:
-            bookings_cols["Calls"] = df_filtered["New Bookings - Call"].sum()
-
+        bookings_cols = ds.range(start_date, end_date).distribution("bookings")
         if bookings_cols:
-            bookings_df = (
-                pd.DataFrame(list(bookings_cols.items()), columns=["Platform", "Count"])
-                .set_index("Platform")
+            show_chart(
+                (ds.version, "platforms", start_date, end_date, None, "bookings"),
+                lambda: chart_specs.bar_chart(
+                    pd.DataFrame(list(bookings_cols.items()), columns=["Platform", "Count"])
+                    .set_index("Platform")
+                ),
             )
-            st.bar_chart(bookings_df)
         else:
             st.info("لا توجد أعمدة New Bookings للمنصات في الشيت.")
 
+    if compare_branches:
+        st.markdown("---")
+        st.subheader("Branch Comparison")
+
+        def branch_chart():
+            branch_df = pd.DataFrame(
+                {
+                    "Interactions": {b: v["total_interactions"] for b, v in branch_kpis.items()},
+                    "New bookings": {b: v["total_new_bookings"] for b, v in branch_kpis.items()},
+                    "Interested": {b: v["total_interested"] for b, v in branch_kpis.items()},
+                    "Not interested": {b: v["total_not_interested"] for b, v in branch_kpis.items()},
+                }
+            )
+            branch_df.index.name = "Branch"
+            return chart_specs.bar_chart(branch_df, stack=False)
+
+        show_chart((ds.version, "platforms", start_date, end_date, None, "branches"), branch_chart)
+
+        st.caption("Interactions per platform and branch")
+
+        def per_platform_chart():
+            per_platform = pd.DataFrame(
+                {
+                    branch: ds.subset([branch]).range(start_date, end_date).distribution("total")
+                    for branch in compare_branches
+                }
+            )
+            per_platform.index.name = "Platform"
+            return chart_specs.bar_chart(per_platform, stack=False)
+
+        show_chart((ds.version, "platforms", start_date, end_date, None, "branch_platforms"), per_platform_chart)
+
+
 # ======================
 # 3) TIME ANALYSIS VIEW
 # ======================
-else:  # view == "Time analysis"
-    st.subheader("Last 4 weeks (weekly view)")
+@st.fragment
+@span("view.time_analysis.periods", rerun_timings)
+def period_section(ds, start_date, end_date):
+    period_units = {"Day": "day", "Week": "week", "Month": "month", "Quarter": "quarter"}
+
+    col_g, col_n = st.columns(2)
+    with col_g:
+        granularity = st.selectbox(
+            "Granularity:",
+            GRANULARITIES,
+            index=1,
+            key="time_granularity_select",
+        )
+    with col_n:
+        periods = st.number_input(
+            "Number of periods:",
+            min_value=1,
+            max_value=120,
+            value=4,
+            step=1,
+            key="time_periods_input",
+        )
+
+    unit = period_units[granularity]
+    st.subheader(f"Last {periods} {unit}s ({unit} view)")
 
     weekly_platform = st.selectbox(
-        "Choose platform (weekly view):",
-        ["Instagram", "WhatsApp", "TikTok", "Calls"],
+        f"Choose platform ({unit} view):",
+        PLATFORM_NAMES,
         index=0,
         key="weekly_platform_select",
     )
 
     weekly_cols_map = PLATFORM_COLS[weekly_platform]
 
-    df_weeks = df_filtered.copy()
-    df_weeks["week_start"] = df_weeks["Date"].dt.to_period("W").apply(
-        lambda r: r.start_time.date()
-    )
-
-    agg_cols = []
-    if weekly_cols_map["total"] in df_weeks.columns:
-        agg_cols.append(weekly_cols_map["total"])
-    if weekly_cols_map["bookings"] in df_weeks.columns:
-        agg_cols.append(weekly_cols_map["bookings"])
-
-    if agg_cols:
-        week_agg = (
-            df_weeks.groupby("week_start")[agg_cols]
-            .sum()
-            .reset_index()
-            .sort_values("week_start")
-        )
-
-        last_4 = week_agg.tail(4).copy()
-        last_4["Week"] = last_4["week_start"].astype(str)
+    # الفترات بتتجمع من الـ cube: التكلفة على عدد الفترات مش عدد الصفوف
+    period_agg = ds.range(start_date, end_date).periods(granularity, weekly_platform, periods)
 
+    if ds.cube.has(weekly_cols_map["total"]) or ds.cube.has(weekly_cols_map["bookings"]):
         col_w1, col_w2 = st.columns(2)
 
         with col_w1:
-            st.caption("Interactions per week")
+            st.caption(f"Interactions per {unit}")
             total_col = weekly_cols_map["total"]
-            if total_col in last_4.columns:
-                chart_df = last_4[["Week", total_col]].set_index("Week")
-                st.bar_chart(chart_df)
+            if total_col in period_agg.columns:
+                show_chart(
+                    (ds.version, "time_analysis", start_date, end_date, weekly_platform, "periods_total", granularity, periods),
+                    lambda: chart_specs.bar_chart(period_agg[[total_col]]),
+                )
             else:
-                st.info("لا توجد بيانات للتفاعل الأسبوعي لهذا البلاتفورم.")
+                st.info("لا توجد بيانات للتفاعل لهذا البلاتفورم في الفترات دي.")
 
         with col_w2:
-            st.caption("New bookings per week")
+            st.caption(f"New bookings per {unit}")
             book_col = weekly_cols_map["bookings"]
-            if book_col in last_4.columns:
-                chart_df = last_4[["Week", book_col]].set_index("Week")
-                st.bar_chart(chart_df)
+            if book_col in period_agg.columns:
+                show_chart(
+                    (ds.version, "time_analysis", start_date, end_date, weekly_platform, "periods_bookings", granularity, periods),
+                    lambda: chart_specs.bar_chart(period_agg[[book_col]]),
+                )
             else:
-                st.info("لا توجد بيانات للحجوزات الأسبوعية لهذا البلاتفورم.")
+                st.info("لا توجد بيانات للحجوزات لهذا البلاتفورم في الفترات دي.")
     else:
-        st.info("لا توجد أعمدة كافية لحساب بيانات الأسابيع لهذا البلاتفورم.")
+        st.info("لا توجد أعمدة كافية لحساب بيانات الفترات لهذا البلاتفورم.")
+
+    if compare_branches and ds.cube.has(weekly_cols_map["total"]):
+        st.caption(f"Interactions per {unit} by branch")
+
+        def branch_periods_chart():
+            branch_periods = pd.DataFrame(
+                {
+                    branch: ds.subset([branch])
+                    .range(start_date, end_date)
+                    .periods(granularity, weekly_platform, periods)
+                    .get(weekly_cols_map["total"])
+                    for branch in compare_branches
+                }
+            ).fillna(0).sort_index()
+            return chart_specs.bar_chart(branch_periods, stack=False)
+
+        show_chart(
+            (ds.version, "time_analysis", start_date, end_date, weekly_platform, "periods_branches", granularity, periods),
+            branch_periods_chart,
+        )
 
-    st.markdown("---")
 
+@st.fragment
+@span("view.time_analysis.last7", rerun_timings)
+def last7_section(ds, start_date, end_date):
     st.subheader("Last 7 days (daily view)")
 
     daily_platform = st.selectbox(
         "Choose platform (last 7 days – daily view):",
-        ["Instagram", "WhatsApp", "TikTok", "Calls"],
+        PLATFORM_NAMES,
         index=0,
         key="last7_platform_select",
     )
 
     daily_cols_map = PLATFORM_COLS[daily_platform]
 
-    df_days = df_filtered.copy().sort_values("Date")
+    day_agg = ds.range(start_date, end_date).last_days(daily_platform, 7)
 
-    unique_days = df_days["Date"].dt.date.unique()
-    last_7_days = list(unique_days[-7:])
-
-    df_last7 = df_days[df_days["Date"].dt.date.isin(last_7_days)].copy()
-
-    if df_last7.empty:
+    if day_agg is None:
         st.info("لا توجد بيانات لآخر ٧ أيام لهذا البلاتفورم.")
     else:
-        agg_cols = []
-        if daily_cols_map["total"] in df_last7.columns:
-            agg_cols.append(daily_cols_map["total"])
-        if daily_cols_map["bookings"] in df_last7.columns:
-            agg_cols.append(daily_cols_map["bookings"])
-
-        if agg_cols:
-            day_agg = (
-                df_last7.groupby(df_last7["Date"].dt.date)[agg_cols]
-                .sum()
-                .reset_index()
-                .rename(columns={"Date": "day"})
-                .sort_values("day")
-            )
-
-            day_agg["Day"] = day_agg["day"].astype(str)
-
+        if len(day_agg.columns):
             col_d1, col_d2 = st.columns(2)
 
             with col_d1:
                 st.caption("Interactions per day (last 7 days)")
                 total_col = daily_cols_map["total"]
                 if total_col in day_agg.columns:
-                    chart_df = day_agg[["Day", total_col]].set_index("Day")
-                    st.bar_chart(chart_df)
+                    show_chart(
+                        (ds.version, "time_analysis", start_date, end_date, daily_platform, "last7_total"),
+                        lambda: chart_specs.bar_chart(day_agg[[total_col]]),
+                    )
                 else:
                     st.info("لا توجد بيانات للتفاعل اليومي لهذا البلاتفورم.")
 
@@ -670,9 +687,115 @@ else:  # view == "Time analysis"
                 st.caption("New bookings per day (last 7 days)")
                 book_col = daily_cols_map["bookings"]
                 if book_col in day_agg.columns:
-                    chart_df = day_agg[["Day", book_col]].set_index("Day")
-                    st.bar_chart(chart_df)
+                    show_chart(
+                        (ds.version, "time_analysis", start_date, end_date, daily_platform, "last7_bookings"),
+                        lambda: chart_specs.bar_chart(day_agg[[book_col]]),
+                    )
                 else:
                     st.info("لا توجد بيانات للحجوزات اليومية لهذا البلاتفورم.")
         else:
             st.info("لا توجد أعمدة كافية لحساب بيانات آخر ٧ أيام لهذا البلاتفورم.")
+
+
+@st.fragment
+@span("view.time_analysis", rerun_timings)
+def time_analysis_view(ds, start_date, end_date):
+    period_section(ds, start_date, end_date)
+
+    st.markdown("---")
+
+    last7_section(ds, start_date, end_date)
+
+
+if view == "Overview":
+    overview_view(ds, start_date, end_date)
+elif view == "Platforms":
+    platforms_view(ds, start_date, end_date)
+else:  # view == "Time analysis"
+    time_analysis_view(ds, start_date, end_date)
+
+rerun_timings["rerun.total"] = time.perf_counter() - rerun_started
+RECORDER.record("rerun.total", rerun_timings["rerun.total"])
+
+# أول صفحة اترسمت في الـ process: الوقت من بداية الـ process (import + تحميل الداتا + الرسم)
+first_render = get_first_render()
+if not first_render:
+    first_render.update(seconds=time.time() - PROCESS_STARTED, status=health["status"])
+    rerun_timings["startup.first_render"] = first_render["seconds"]
+    RECORDER.record("startup.first_render", first_render["seconds"])
+
+# ======================
+# تصدير القياسات + لوحة الـ debug
+# ======================
+metrics_file = get_setting("metrics_file", "CLINIC_METRICS_FILE")
+if metrics_file:
+    export(metrics_file, rerun_timings)
+
+if debug_enabled():
+    with st.sidebar:
+        with st.expander("⏱️ Performance", expanded=True):
+            summary = RECORDER.summary()
+            perf_df = pd.DataFrame(
+                [
+                    {
+                        "span": name,
+                        "this run (ms)": rerun_timings[name] * 1000 if name in rerun_timings else None,
+                        "p50 (ms)": stats["p50"] * 1000,
+                        "p95 (ms)": stats["p95"] * 1000,
+                        "count": stats["count"],
+                    }
+                    for name, stats in summary.items()
+                ]
+            ).set_index("span")
+            st.dataframe(perf_df.round(2), width="stretch")
+            st.caption(f"p50 / p95 over the last {WINDOW} runs of each span (this process).")
+            st.caption(
+                f"Time to first render: {first_render['seconds'] * 1000:,.0f} ms after process start "
+                f"({'warm snapshot' if first_render['status'] == 'warm' else 'loaded from source'})"
+            )
+            range_stats = get_dataset(data_version, df).range_stats
+            st.caption(
+                f"Range results: {range_stats['preset_hits']} preset hits, "
+                f"{range_stats['custom_hits']} cached custom, {range_stats['misses']} computed, "
+                f"{range_stats['evictions']} evicted (LRU of {analytics.CUSTOM_RANGE_CACHE})"
+            )
+            spec_cache = get_spec_cache()
+            st.caption(
+                f"Chart specs: {spec_cache.stats['hits']} hits, {spec_cache.stats['misses']} built, "
+                f"{spec_cache.stats['evictions']} evicted; {len(spec_cache)}/{spec_cache.max_entries} cached "
+                f"({spec_cache.nbytes / 1024:,.0f} KB of chart data)"
+            )
+            http = http_client.shared_client().report()
+            st.caption(
+                f"HTTP client: {http['requests']} request(s) over {http['connections']} connection(s), "
+                f"{http['wire_bytes'] / 1024:,.0f} KB on the wire, {http['rejected']} rejected by the circuit breaker"
+                + (f"; last error: {http['last_error']}" if http["last_error"] else "")
+            )
+            rolling_stats = get_dataset(data_version, df).rolling.stats
+            st.caption(
+                f"Rolling windows: {rolling_stats['reused_days']} day(s) reused from the previous version, "
+                f"{rolling_stats['computed_days']} computed"
+            )
+            st.download_button(
+                "Download Prometheus metrics",
+                RECORDER.to_prometheus(),
+                file_name="clinic_dashboard.prom",
+                mime="text/plain",
+            )
+
+        # الداتا متحملة مرة واحدة في الـ process، فالرقم ده مش بيتضرب في عدد السيشنز
+        with st.expander("🧠 Memory", expanded=False):
+            memory = analytics.memory_report(get_dataset(data_version, df))
+            mb = 1024 * 1024
+            st.caption(
+                f"{memory['rows']:,} rows · {memory['bytes'] / mb:.2f} MB "
+                f"({memory['bytes_per_row']:.1f} bytes/row) · cube {memory['cube_bytes'] / mb:.2f} MB"
+            )
+            st.caption(
+                f"Same data with 64-bit columns: {memory['wide_bytes'] / mb:.2f} MB "
+                f"({memory['wide_bytes'] / max(memory['rows'], 1):.1f} bytes/row)"
+            )
+            memory_df = pd.DataFrame(
+                [{"column": c, "dtype": dtype, "bytes": size} for c, (dtype, size) in memory["columns"].items()]
+            ).set_index("column")
+            st.dataframe(memory_df, width="stretch")
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from metrics import compact_frame, slice_days
+from perf import span
+
+# ======================
+# أرشيف شهري على الديسك (Parquet): كل شهر خلص بيتكتب مرة واحدة ومبيتغيرش تاني
+# الشيت الحي بيتقارن بس في الشهر المفتوح، والداتا = الأرشيف + ذيل الشيت
+# ولو الشيت نفسه اتمسح منه الشهور القديمة الأرشيف بيفضل فيه التاريخ كله
+# ======================
+PARTITION_RE = re.compile(r"^(\d{4}-\d{2})\.parquet$")
+
+# الشهر بيتقفل بعد ما الشيت يوصل لـ GRACE_DAYS يوم في الشهر اللي بعده
+# (عشان التعديلات المتأخرة على آخر أيام الشهر)
+GRACE_DAYS = 3
+
+
+def next_month(month):
+    return (np.datetime64(month, "M") + 1).astype("datetime64[D]")
+
+
+class MonthArchive:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, month):
+        return os.path.join(self.directory, f"{month}.parquet")
+
+    def months(self):
+        # الملفات نفسها هي الـ manifest: مفيش حاجة تتكتب غير ملف الشهر الجديد
+        found = (PARTITION_RE.match(name) for name in os.listdir(self.directory))
+        return sorted(m.group(1) for m in found if m)
+
+    def write(self, month, frame):
+        path = self._path(month)
+        if os.path.exists(path):
+            return False
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return True
+
+    def read(self, month):
+        return compact_frame(pd.read_parquet(self._path(month)))
+
+    def read_range(self, start, end):
+        # بنقرا بس الشهور اللي بتقاطع الفترة
+        first, last = str(np.datetime64(start, "M")), str(np.datetime64(end, "M"))
+        parts = [self.read(m) for m in self.months() if first <= m <= last]
+        if not parts:
+            return None
+        return slice_days(compact_frame(pd.concat(parts)), start, end)
+
+
+class ArchiveSource:
+    # بيلف حوالين أي مصدر (شيت / ملف) ويكمل الشهور اللي خلصت من الأرشيف
+    kind = "archive"
+
+    def __init__(self, source, directory, grace_days=GRACE_DAYS):
+        self.source = source
+        self.archive = MonthArchive(directory)
+        self.grace_days = grace_days
+        self.frame = None
+        self.version = None
+        self.stats = {"partitions_written": 0, "closed_rows_skipped": 0}
+        self._closed = None
+        self._closed_months = []
+        self._key = None
+        self._lock = threading.Lock()
+
+    def _archive_closed_months(self, live):
+        # كل شهر خلص ومش في الأرشيف بيتكتب مرة واحدة
+        if live.empty:
+            return False
+        last_day = live.index[-1].to_datetime64().astype("datetime64[D]")
+        # اللي قبل آخر شهر في الأرشيف اتأرشف خلاص: بندور بس في الأيام اللي بعده (الشهر المفتوح غالبًا)
+        archived = self.archive.months()
+        start = 0
+        if archived:
+            start = live.index.searchsorted(pd.Timestamp(next_month(archived[-1])), side="left")
+        month_keys = live.index[start:].to_numpy().astype("datetime64[M]")
+        if not len(month_keys) or next_month(month_keys[0]) + self.grace_days > last_day:
+            return False
+        written = False
+        for month in np.unique(month_keys):
+            if next_month(month) + self.grace_days > last_day:
+                break
+            i, j = np.searchsorted(month_keys, month, side="left"), np.searchsorted(month_keys, month, side="right")
+            if self.archive.write(str(month), live.iloc[start + i:start + j]):
+                self.stats["partitions_written"] += 1
+                written = True
+        return written
+
+    def _load_closed(self):
+        months = self.archive.months()
+        if months != self._closed_months:
+            # الشهور القديمة في الذاكرة بتفضل زي ما هي؛ بنقرا الجديد بس
+            new = [m for m in months if m not in self._closed_months]
+            parts = ([self._closed] if self._closed is not None else []) + [self.archive.read(m) for m in new]
+            closed = pd.concat(parts)
+            if not closed["Date"].is_monotonic_increasing:
+                closed = closed.sort_values("Date", kind="stable")
+            self._closed = compact_frame(closed)
+            self._closed_months = months
+        return self._closed
+
+    def _open_start(self):
+        return next_month(self._closed_months[-1]) if self._closed_months else None
+
+    def load(self):
+        with self._lock:
+            live, live_version = self.source.load()
+            with span("load.archive"):
+                self._archive_closed_months(live)
+                closed = self._load_closed()
+                if closed is None:
+                    tail, tail_key = live, live_version
+                else:
+                    # من الشيت بناخد بس الأيام اللي بعد آخر شهر في الأرشيف؛ تعديل في الشهور المقفولة
+                    # في الشيت مبيغيرش الداتا (ولا الـ version)
+                    cut = live.index.searchsorted(pd.Timestamp(self._open_start()), side="left")
+                    self.stats["closed_rows_skipped"] = int(cut)
+                    tail = live.iloc[cut:]
+                    tail_key = hashlib.sha256(pd.util.hash_pandas_object(tail).to_numpy().tobytes()).hexdigest()
+            key = (tail_key, tuple(self._closed_months))
+            if self.frame is not None and key == self._key:
+                return self.frame, self.version
+
+            with span("load.derived"):
+                if closed is None:
+                    frame = live
+                elif not len(tail):
+                    frame = closed
+                elif list(tail.columns) == list(closed.columns):
+                    # الاتنين compact خلاص: concat بس (الـ dtype بيكبر لوحده لو الذيل محتاج)
+                    frame = pd.concat([closed, tail])
+                else:
+                    frame = compact_frame(pd.concat([closed, tail]))
+            self.frame = frame
+            self.version = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+            self._key = key
+            return self.frame, self.version
+
+    def load_range(self, start, end):
+        # للـ CLI / التقارير: الشهور اللي بتقاطع الفترة من الأرشيف، والشيت بس لو الفترة داخلة في الشهر المفتوح
+        with self._lock:
+            months = self.archive.months()
+            open_start = next_month(months[-1]) if months else None
+            if open_start is not None and np.datetime64(end, "D") < open_start:
+                archived = self.archive.read_range(start, end)
+                if archived is not None:
+                    return archived
+
+            live, _ = self.source.load()
+            self._archive_closed_months(live)
+            months = self.archive.months()
+            archived = self.archive.read_range(start, end)
+            cut = 0
+            if months:
+                cut = live.index.searchsorted(pd.Timestamp(next_month(months[-1])), side="left")
+            tail = slice_days(live.iloc[cut:], start, end)
+            if archived is None:
+                return tail
+            return compact_frame(pd.concat([archived, tail]))
+
+    def close(self):
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,285 @@
+"""Drive app.py with concurrent simulated sessions and report rerun latency.
+
+    python bench/load_test.py                              # 1, 4 and 8 sessions on a 100k-row sheet
+    python bench/load_test.py --sessions 1,8,16 --actions 50 --size 1M
+    python bench/load_test.py --max-p95 400                # exit 1 if any level's p95 > 400ms
+
+Every session is its own Streamlit AppTest in its own process (multiprocessing,
+spawn), so sessions never share widget state. Before the clock starts each
+process renders the page once, which loads the sheet and builds its Dataset,
+the way a viewer joins an already running server; the measured reruns then
+compete for the CPU like concurrent viewers do. Each session clicks through
+the three views, the quick ranges and the platform / granularity selectors
+in a seeded random order. A session that fails is recorded with its error
+and the others still count. Per concurrency level it reports p50/p95/p99
+rerun latency, reruns per second and the resident memory of the sessions.
+
+The sheet is a synthetic CSV from bench/synth.py (CLINIC_DATA_SOURCE), so the
+run is offline and repeatable. Results are written as JSON under bench/results/.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_benchmarks import DATA_DIR, RESULTS_DIR, environment  # noqa: E402
+from synth import ensure_sheet  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+VIEWS = ["Overview", "Platforms", "Time analysis"]
+# الـ selectors اللي بتظهر في كل view (بالـ key بتاعها في app.py)
+VIEW_SELECTORS = {
+    "Overview": [],
+    "Platforms": ["platform_breakdown_select"],
+    "Time analysis": ["time_granularity_select", "weekly_platform_select", "last7_platform_select"],
+}
+
+
+def rss_bytes():
+    # الذاكرة الحالية من /proc (Linux)، وإلا الـ peak
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes(who=resource.RUSAGE_SELF):
+    peak = resource.getrusage(who).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    values = np.asarray(latencies) * 1e3
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "mean": values.mean(), "max": values.max()}
+
+
+# ======================
+# session واحدة
+# ======================
+def widget(elements, label=None, key=None):
+    for element in elements:
+        if (label is not None and element.label == label) or (key is not None and element.key == key):
+            return element
+    return None
+
+
+def next_action(at, rng):
+    # بيختار حاجة يدوس عليها زي المستخدم: view، quick range، أو selector في الـ view الحالي
+    view = widget(at.radio, label="View")
+    selectors = [s for s in (widget(at.selectbox, key=k) for k in VIEW_SELECTORS[view.value]) if s is not None]
+    kind = rng.choice(["view", "range"] + (["selector"] * 2 if selectors else []))
+    if kind == "view":
+        return kind, view, rng.choice(VIEWS)
+    if kind == "range":
+        quick_range = widget(at.radio, label="Quick Range")
+        return kind, quick_range, rng.choice(quick_range.options)
+    selector = rng.choice(selectors)
+    return kind, selector, rng.choice(selector.options)
+
+
+def run_session(index, actions, seed, think, timeout, start_barrier, results):
+    # process لوحدها: أي exception بيتسجل في الـ record والـ sessions التانية بتكمل
+    rng = random.Random(seed + index)
+    record = {"first_run": None, "warmup": None, "latencies": [], "by_action": {}, "errors": [], "rss_mb": None}
+    at = None
+    try:
+        from streamlit.testing.v1 import AppTest
+
+        # أول render في الـ process بيحمل الداتا ويبني الـ Dataset (زي سيرفر شغال خلاص)؛ مش بيتقاس
+        started = time.perf_counter()
+        warm = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        warm.run()
+        record["warmup"] = time.perf_counter() - started
+        if warm.exception:
+            raise RuntimeError(warm.exception[0].message)
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    except Exception as e:
+        record["errors"].append(f"session {index}: {type(e).__name__}: {e}")
+    try:
+        # حتى لو الـ setup وقع: الباقيين مستنيين الـ barrier
+        start_barrier.wait(timeout)
+        if at is not None:
+            drive(at, rng, actions, think, record)
+    except Exception as e:
+        record["errors"].append(f"session {index}: {type(e).__name__}: {e}")
+    record["rss_mb"] = rss_bytes() / 2**20
+    results.put(record)
+
+
+def drive(at, rng, actions, think, record):
+    started = time.perf_counter()
+    at.run()
+    record["first_run"] = time.perf_counter() - started
+    if at.exception:
+        record["errors"].append(at.exception[0].message)
+        return
+    if widget(at.radio, label="View") is None:
+        # الصفحة وقفت قبل الـ views (الداتا مثلًا متحملتش)
+        record["errors"].append(at.error[0].value if at.error else "page rendered without the View selector")
+        return
+
+    for _ in range(actions):
+        kind, element, value = next_action(at, rng)
+        element.set_value(value)
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        record["latencies"].append(elapsed)
+        record["by_action"].setdefault(kind, []).append(elapsed)
+        if at.exception:
+            record["errors"].append(at.exception[0].message)
+            break
+        if think:
+            time.sleep(think * rng.uniform(0.5, 1.5))
+
+
+def run_level(sessions, actions, seed, think, timeout):
+    context = multiprocessing.get_context("spawn")
+    start_barrier = context.Barrier(sessions + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=run_session,
+            args=(i, actions, seed, think, timeout, start_barrier, results),
+            name=f"session-{i}",
+        )
+        for i in range(sessions)
+    ]
+    for process in processes:
+        process.start()
+    errors = []
+    try:
+        start_barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        errors.append("sessions didn't start in time")
+    started = time.perf_counter()
+    records = []
+    deadline = time.monotonic() + timeout * (actions + 2) + think * 1.5 * actions
+    while len(records) < sessions and time.monotonic() < deadline:
+        try:
+            records.append(results.get(timeout=0.5))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes) and results.empty():
+                break
+    wall = time.perf_counter() - started
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    # الـ sessions اللي وقعت بتتعد، والأرقام من اللي خلصوا
+    if len(records) < sessions:
+        codes = sorted(p.exitcode for p in processes if p.exitcode)
+        errors.append(f"{sessions - len(records)} session(s) exited without a result (exit codes {codes})")
+    errors += [e for record in records for e in record["errors"]]
+    latencies = [t for record in records for t in record["latencies"]]
+    by_action = {}
+    for record in records:
+        for kind, times in record["by_action"].items():
+            by_action.setdefault(kind, []).extend(times)
+    rss = [record["rss_mb"] for record in records if record["rss_mb"] is not None]
+    return {
+        "sessions": sessions,
+        "failed_sessions": sessions - sum(1 for record in records if not record["errors"]),
+        "reruns": len(latencies),
+        "wall_s": wall,
+        "throughput_rps": len(latencies) / wall if wall else None,
+        "latency_ms": percentiles(latencies),
+        "first_run_ms": percentiles([r["first_run"] for r in records if r["first_run"] is not None]),
+        "warmup_ms": percentiles([r["warmup"] for r in records if r["warmup"] is not None]),
+        "by_action_ms": {kind: percentiles(times) for kind, times in sorted(by_action.items())},
+        "rss_mb": max(rss) if rss else None,
+        "total_rss_mb": sum(rss),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="100k", help="rows in the synthetic sheet (1k, 100k, 1M or a count)")
+    parser.add_argument("--days", type=int, default=3 * 365, help="days of history in the synthetic sheet")
+    parser.add_argument("--sessions", default="1,4,8", help="concurrency levels, comma separated")
+    parser.add_argument("--actions", type=int, default=30, help="interactions per session after the first run")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between interactions (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout (s)")
+    parser.add_argument("--max-p95", type=float, help="fail (exit 1) if any level's p95 is above this (ms)")
+    parser.add_argument("--output", help="JSON file (default: bench/results/load-<timestamp>.json)")
+    args = parser.parse_args()
+
+    csv_path = ensure_sheet(args.size, DATA_DIR, days=args.days)
+    os.environ["CLINIC_DATA_SOURCE"] = csv_path
+    os.environ["CLINIC_DATA_SOURCE_TYPE"] = "csv"
+
+    baseline_rss = rss_bytes()
+    # session واحدة من غير clicks: أول render في process جديدة (تحميل الداتا + الـ Dataset)
+    cold = run_level(1, 0, args.seed, 0, args.timeout)
+    if cold["warmup_ms"]["p50"] is not None:
+        print(f"cold start {cold['warmup_ms']['p50']:.0f}ms, rss {cold['rss_mb']:.0f}MB per session ({csv_path})")
+    for error in cold["errors"][:3]:
+        print(f"      error: {error}")
+
+    report = {
+        "environment": environment(),
+        "sheet": {"size": args.size, "days": args.days},
+        "actions": args.actions,
+        "think_s": args.think,
+        "baseline_rss_mb": baseline_rss / 2**20,
+        "cold_start_ms": cold["warmup_ms"]["p50"],
+        "levels": [],
+    }
+    failed = bool(cold["errors"])
+    for sessions in (int(n) for n in args.sessions.split(",")):
+        level = run_level(sessions, args.actions, args.seed, args.think, args.timeout)
+        report["levels"].append(level)
+        latency = level["latency_ms"]
+        if latency["p50"] is not None:
+            print(
+                f"[{sessions:>3} sessions] {level['reruns']:>5} reruns  "
+                f"p50 {latency['p50']:8.1f}ms  p95 {latency['p95']:8.1f}ms  p99 {latency['p99']:8.1f}ms  "
+                f"{level['throughput_rps']:6.1f} reruns/s  rss {level['rss_mb']:.0f}MB/session",
+                flush=True,
+            )
+        else:
+            print(f"[{sessions:>3} sessions] no reruns", flush=True)
+        if level["failed_sessions"]:
+            print(f"      {level['failed_sessions']} of {sessions} session(s) failed")
+        for kind, timing in level["by_action_ms"].items():
+            print(f"      {kind:<10} p50 {timing['p50']:8.1f}ms  p95 {timing['p95']:8.1f}ms")
+        for error in level["errors"][:3]:
+            print(f"      error: {error}")
+        failed |= bool(level["errors"])
+        if args.max_p95 is not None and latency["p95"] is not None and latency["p95"] > args.max_p95:
+            print(f"      p95 above --max-p95 {args.max_p95:g}ms")
+            failed = True
+    # أكبر session process
+    report["peak_rss_mb"] = peak_rss_bytes(resource.RUSAGE_CHILDREN) / 2**20
+    report["failed"] = failed
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\npeak rss {report['peak_rss_mb']:.0f}MB per session; results written to {output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Time the dashboard's data path on synthetic sheets of growing size.
+
+    python bench/run_benchmarks.py                       # 1k, 100k, 1M, 10M
+    python bench/run_benchmarks.py --sizes 1k,100k --repeat 10
+    python bench/run_benchmarks.py --compare bench/results/old.json
+
+Runs headless: only the data modules are imported (none of them import
+Streamlit), and the view functions below make the same analytics calls
+each branch of app.py makes before it draws anything. Results are written as JSON
+under bench/results/ so two runs can be compared with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analytics  # noqa: E402
+from bucketing import GRANULARITIES, TimeBuckets  # noqa: E402
+from metric_cube import MetricCube  # noqa: E402
+from metrics import TOTAL_COLUMNS, slice_days  # noqa: E402
+from sources import CSVFileSource, ParquetSource, write_snapshot  # noqa: E402
+from synth import ensure_sheet  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# ======================
+# نفس الحسابات اللي كل view بيعملها قبل الرسم
+# ======================
+def overview_data(ds, start, end):
+    kpis = analytics.kpis(ds, start, end)
+    return analytics.trend(ds, start, end), analytics.sentiment(kpis)
+
+
+def platforms_data(ds, start, end, platform="Instagram"):
+    return (
+        analytics.platform_metrics(ds, start, end, platform),
+        analytics.platform_distribution(ds, start, end, "total"),
+        analytics.platform_distribution(ds, start, end, "bookings"),
+    )
+
+
+def time_analysis_data(ds, start, end, platform="Instagram"):
+    return (
+        analytics.period_series(ds, "Week", start, end, platform, periods=4),
+        analytics.last_days(ds, start, end, platform, 7),
+    )
+
+
+def legacy_filter(df, start, end):
+    # الطريقة القديمة (mask على .dt.date + copy) للمقارنة بس
+    mask = (df["Date"].dt.date >= start) & (df["Date"].dt.date <= end)
+    return df.loc[mask].copy()
+
+
+# ======================
+# القياس
+# ======================
+def timed(fn, repeat):
+    runs = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - started)
+    return result, {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "max": max(runs),
+        "runs": len(runs),
+    }
+
+
+def bench_size(size, repeat, load_repeat, days):
+    csv_path = ensure_sheet(size, DATA_DIR, days=days)
+    parquet_path = csv_path[: -len(".csv")] + ".parquet"
+    results = {}
+
+    df, results["load.csv"] = timed(lambda: CSVFileSource(csv_path).load()[0], load_repeat)
+    if not os.path.exists(parquet_path):
+        write_snapshot(df, parquet_path)
+    _, results["load.parquet"] = timed(lambda: ParquetSource(parquet_path).load()[0], load_repeat)
+
+    cube, results["cube.build"] = timed(lambda: MetricCube.from_frame(df), load_repeat)
+
+    def build_buckets():
+        tb = TimeBuckets(cube)
+        for granularity in GRANULARITIES:
+            tb._bucket_edges(granularity)
+        return tb
+
+    time_buckets, results["buckets.build"] = timed(build_buckets, load_repeat)
+    ds = analytics.Dataset(df, "bench")
+    for granularity in GRANULARITIES:
+        ds.buckets._bucket_edges(granularity)
+    _, results["presets.materialize"] = timed(ds.materialize_presets, load_repeat)
+
+    max_date = df.index[-1].date()
+    ranges = {
+        "month": (max_date.replace(day=1), max_date),
+        "all": (df.index[0].date(), max_date),
+        "last7": (max_date - timedelta(days=6), max_date),
+    }
+    for name, (start, end) in ranges.items():
+        _, results[f"filter.slice.{name}"] = timed(lambda: slice_days(df, start, end), repeat)
+        _, results[f"filter.legacy_mask.{name}"] = timed(lambda: legacy_filter(df, start, end), max(1, repeat // 5))
+        _, results[f"kpi.sums.{name}"] = timed(lambda: cube.sums(start, end, TOTAL_COLUMNS), repeat)
+        _, results[f"weekly.bucketing.{name}"] = timed(
+            lambda: time_buckets.series("Week", start, end, ["Instagram Answered"], periods=4), repeat
+        )
+        # صفحة بتفتح على preset: lookup في النتايج المحسوبة
+        _, results[f"page.preset_lookup.{name}"] = timed(lambda: ds.range(start, end).kpis, repeat)
+        _, results[f"view.overview.{name}"] = timed(lambda: overview_data(ds, start, end), repeat)
+        _, results[f"view.platforms.{name}"] = timed(lambda: platforms_data(ds, start, end), repeat)
+        _, results[f"view.time_analysis.{name}"] = timed(
+            lambda: time_analysis_data(ds, start, end), repeat
+        )
+
+    memory = analytics.memory_report(ds)
+    memory.pop("columns")
+    return {"rows": len(df), "days": int(cube.n_days), "memory": memory, "timings": results}
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} (median, ratio < 1 = faster)")
+    for size, data in current["sizes"].items():
+        old = baseline.get("sizes", {}).get(size)
+        if not old:
+            continue
+        for op, timing in data["timings"].items():
+            before = old["timings"].get(op)
+            if before:
+                ratio = timing["median"] / before["median"] if before["median"] else float("nan")
+                print(f"  {size:>5} {op:<32} {before['median'] * 1e3:10.3f}ms -> {timing['median'] * 1e3:10.3f}ms  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,100k,1M,10M")
+    parser.add_argument("--days", type=int, default=3 * 365, help="days of history in the synthetic sheet")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per per-rerun operation")
+    parser.add_argument("--load-repeat", type=int, default=3, help="runs per load / build operation")
+    parser.add_argument("--output", help="JSON file (default: bench/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "sizes": {}}
+    for size in args.sizes.split(","):
+        print(f"[{size}] ...", flush=True)
+        report["sizes"][size] = bench_size(size, args.repeat, args.load_repeat, args.days)
+        for op, timing in report["sizes"][size]["timings"].items():
+            print(f"  {op:<32} {timing['median'] * 1e3:10.3f}ms")
+        memory = report["sizes"][size]["memory"]
+        print(f"  {'memory':<32} {memory['bytes_per_row']:10.1f}B/row (64-bit: {memory['wide_bytes'] / max(memory['rows'], 1):.1f})")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
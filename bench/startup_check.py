@@ -0,0 +1,198 @@
+"""Measure the dashboard's time-to-first-render after a process restart.
+
+    python bench/startup_check.py                      # cold vs warm start, sheet served with a 2s delay
+    python bench/startup_check.py --budget-ms 2500     # exit 1 if the warm start is slower than this
+    python bench/startup_check.py --delay 0 --runs 5 --size 1M
+
+Every run is a fresh Python process that renders app.py once with Streamlit's
+AppTest, so interpreter start, imports, loading the data and drawing the page
+are all counted, from the moment the process started (/proc) to the end of
+the first render. The sheet is a synthetic CSV from bench/synth.py served by
+tools/sheet_server.py with --delay, like a slow network fetch.
+
+"cold" starts with an empty warm directory and has to wait for the sheet;
+"warm" starts from the snapshot the cold run left behind (CLINIC_WARM_DIR) and
+should render without waiting. Each run also reports whether heavy optional
+modules (Altair, vl-convert, matplotlib) were imported on the way; any of them
+fails the check. Results are written as JSON under bench/results/.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_benchmarks import DATA_DIR, RESULTS_DIR, environment  # noqa: E402
+from synth import ensure_sheet  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+SHEET_SERVER = os.path.join(ROOT, "tools", "sheet_server.py")
+# مش المفروض يتعملهم import قبل أول صفحة
+HEAVY_MODULES = ["altair", "vl_convert", "matplotlib"]
+
+
+# ======================
+# الـ child: process جديدة بترسم الصفحة مرة واحدة
+# ======================
+def child(timeout, wait_warm):
+    from streamlit.testing.v1 import AppTest
+
+    from perf import PROCESS_STARTED
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+    first_render = time.time() - PROCESS_STARTED
+    captions = [c.value for c in at.sidebar.caption]
+    result = {
+        "first_render_ms": first_render * 1000,
+        "warm": any(c.startswith("🟡") for c in captions),
+        "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+        "modules": len(sys.modules),
+        "errors": [e.message for e in at.exception],
+    }
+    # الـ refresher بيكتب الـ warm snapshot في الخلفية بعد أول تحميل: نستناه قبل ما الـ process تقفل
+    deadline = time.time() + wait_warm
+    warm_dir = os.environ["CLINIC_WARM_DIR"]
+    while wait_warm and time.time() < deadline:
+        if any(os.path.exists(os.path.join(root, "snapshot.json")) for root, _, _ in os.walk(warm_dir)):
+            break
+        time.sleep(0.05)
+    print(json.dumps(result))
+
+
+def run_child(env, timeout, wait_warm=0.0):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--timeout", str(timeout), "--wait-warm", str(wait_warm)],
+        env=env,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+    if out.returncode or not lines:
+        return {"first_render_ms": None, "warm": False, "heavy_modules": [], "modules": None,
+                "errors": [out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"exit {out.returncode}"]}
+    return json.loads(lines[-1])
+
+
+# ======================
+# السيرفر + السيناريوهات
+# ======================
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_sheet_server(csv_path, delay):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, SHEET_SERVER, csv_path, "--port", str(port), "--delay", str(delay)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server, f"http://127.0.0.1:{port}/sheet.csv"
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("sheet server didn't start")
+
+
+def summarize(runs):
+    times = [r["first_render_ms"] for r in runs if r["first_render_ms"] is not None]
+    return {
+        "runs": runs,
+        "p50_ms": float(np.median(times)) if times else None,
+        "max_ms": float(max(times)) if times else None,
+        "heavy_modules": sorted({m for r in runs for m in r["heavy_modules"]}),
+        "errors": [e for r in runs for e in r["errors"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="100k", help="rows in the synthetic sheet (1k, 100k, 1M or a count)")
+    parser.add_argument("--days", type=int, default=3 * 365, help="days of history in the synthetic sheet")
+    parser.add_argument("--delay", type=float, default=2.0, help="seconds the sheet server waits per request")
+    parser.add_argument("--runs", type=int, default=3, help="processes per scenario")
+    parser.add_argument("--timeout", type=float, default=120, help="first render timeout (s)")
+    parser.add_argument("--budget-ms", type=float, help="fail (exit 1) if the warm start's p50 is above this")
+    parser.add_argument("--output", help="JSON file (default: bench/results/startup-<timestamp>.json)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--wait-warm", type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.timeout, args.wait_warm)
+        return
+
+    csv_path = ensure_sheet(args.size, DATA_DIR, days=args.days)
+    server, url = start_sheet_server(csv_path, args.delay)
+    warm_dir = tempfile.mkdtemp(prefix="clinic-warm-")
+    env = dict(os.environ, CLINIC_DATA_SOURCE=url, CLINIC_WARM_DIR=warm_dir)
+    env.pop("CLINIC_BRANCHES", None)
+    report = {
+        "environment": environment(),
+        "sheet": {"size": args.size, "days": args.days, "delay_s": args.delay},
+        "budget_ms": args.budget_ms,
+    }
+    try:
+        cold_runs = []
+        for _ in range(args.runs):
+            shutil.rmtree(warm_dir, ignore_errors=True)
+            os.makedirs(warm_dir)
+            cold_runs.append(run_child(env, args.timeout, wait_warm=args.timeout))
+        # آخر cold run ساب الـ warm snapshot
+        warm_runs = [run_child(env, args.timeout) for _ in range(args.runs)]
+    finally:
+        server.kill()
+        shutil.rmtree(warm_dir, ignore_errors=True)
+
+    report["cold"] = summarize(cold_runs)
+    report["warm"] = summarize(warm_runs)
+    failed = False
+    for name in ("cold", "warm"):
+        scenario = report[name]
+        p50 = scenario["p50_ms"]
+        print(
+            f"{name:<5} first render p50 {p50 or float('nan'):8.0f}ms  max {scenario['max_ms'] or float('nan'):8.0f}ms  "
+            f"heavy imports: {', '.join(scenario['heavy_modules']) or 'none'}",
+            flush=True,
+        )
+        for error in scenario["errors"][:3]:
+            print(f"      error: {error}")
+        failed |= bool(scenario["errors"]) or bool(scenario["heavy_modules"])
+    if not all(r["warm"] for r in warm_runs):
+        print("      warm start didn't render from the warm snapshot")
+        failed = True
+    warm_p50 = report["warm"]["p50_ms"]
+    if args.budget_ms is not None and (warm_p50 is None or warm_p50 > args.budget_ms):
+        print(f"      warm start above --budget-ms {args.budget_ms:g}ms")
+        failed = True
+    report["failed"] = failed
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Generate synthetic sheets shaped like the clinic's Google Sheet.
+
+    python bench/synth.py 100k --out bench/.data/sheet-100k.csv
+    python bench/synth.py 1M --events --out bench/.data/events-1M.csv
+
+Columns are taken from the platform registry in metrics.py, so the names
+(including the ’ in "Didn’t Answer") match the real sheet exactly. Rows
+are spread over ``--days`` of history with dd/mm/yyyy dates, several
+rows per day once the size exceeds the number of days.
+
+With ``--events`` the file is a raw interaction log instead (one row per
+call or DM: timestamp, platform, outcome), in time order, as read by
+events.py.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import PLATFORM_NAMES, SOURCE_COLUMNS  # noqa: E402
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+CHUNK_ROWS = 500_000
+
+
+def parse_size(size):
+    return SIZES[size] if size in SIZES else int(size)
+
+
+def synth_frame(n_rows, days=3 * 365, start="2023-01-01", seed=0, offset=0, total_rows=None):
+    # offset / total_rows بيخلوا الـ chunks المتتالية تكمل نفس توزيع الأيام
+    total_rows = total_rows or offset + n_rows
+    rng = np.random.default_rng(seed + offset)
+    first = np.datetime64(start, "D")
+    # الصفوف مترتبة بالتاريخ زي الشيت، وكل يوم عنده نفس العدد تقريبًا
+    day = np.arange(offset, offset + n_rows, dtype=np.int64) * days // total_rows
+    labels = pd.to_datetime(first + np.arange(days)).strftime("%d/%m/%Y").to_numpy()
+
+    data = {"Date": labels[day]}
+    for col in SOURCE_COLUMNS:
+        scale = 40 if col.endswith(("Answered", "Received")) else 8
+        data[col] = rng.poisson(scale, n_rows).astype(np.int32)
+    return pd.DataFrame(data)
+
+
+def write_sheet(n_rows, path, days=3 * 365, seed=0):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8", newline="") as f:
+        for offset in range(0, n_rows, CHUNK_ROWS):
+            chunk = synth_frame(
+                min(CHUNK_ROWS, n_rows - offset),
+                days=days,
+                seed=seed,
+                offset=offset,
+                total_rows=n_rows,
+            )
+            chunk.to_csv(f, index=False, header=offset == 0)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# نسبة كل منصة ونتيجة في الـ log (الباقي "answered" من غير نتيجة)
+EVENT_PLATFORM_SHARE = [0.35, 0.35, 0.1, 0.2]
+EVENT_OUTCOME_SHARE = {
+    "bookings": 0.12,
+    "asked_dates": 0.15,
+    "interested": 0.15,
+    "not_interested": 0.1,
+    "no_reply": 0.13,
+}
+
+
+def synth_events(n_events, days=3 * 365, start="2023-01-01", seed=0, offset=0, total_events=None):
+    total_events = total_events or offset + n_events
+    rng = np.random.default_rng(seed + offset)
+    first = np.datetime64(start, "s")
+    # الـ events مترتبة بالوقت وموزعة على الأيام بالتساوي تقريبًا
+    seconds = (np.arange(offset, offset + n_events, dtype=np.int64) * days * 86400) // total_events
+    stamps = np.datetime_as_string(first + seconds, unit="s")
+    outcomes = ["answered"] + list(EVENT_OUTCOME_SHARE)
+    share = list(EVENT_OUTCOME_SHARE.values())
+    return pd.DataFrame({
+        "timestamp": stamps,
+        "platform": np.asarray(PLATFORM_NAMES)[rng.choice(len(PLATFORM_NAMES), n_events, p=EVENT_PLATFORM_SHARE)],
+        "outcome": np.asarray(outcomes)[rng.choice(len(outcomes), n_events, p=[1 - sum(share)] + share)],
+    })
+
+
+def write_events(n_events, path, days=3 * 365, seed=0):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8", newline="") as f:
+        for offset in range(0, n_events, CHUNK_ROWS):
+            chunk = synth_events(
+                min(CHUNK_ROWS, n_events - offset),
+                days=days,
+                seed=seed,
+                offset=offset,
+                total_events=n_events,
+            )
+            chunk.to_csv(f, index=False, header=offset == 0)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def ensure_sheet(size, data_dir, days=3 * 365):
+    path = os.path.join(data_dir, f"sheet-{size}-{days}d.csv")
+    if not os.path.exists(path):
+        write_sheet(parse_size(size), path, days=days)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("size", help="1k, 100k, 1M, 10M or a row count")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--events", action="store_true", help="raw interaction log instead of daily sheet rows")
+    args = parser.parse_args()
+    write = write_events if args.events else write_sheet
+    write(parse_size(args.size), args.out, days=args.days, seed=args.seed)
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import json
+import threading
+from collections import OrderedDict
+
+import pyarrow as pa
+
+# ======================
+# Cache للـ Vega-Lite specs: الـ spec وداتته (Arrow) بيتبنوا مرة واحدة
+# لكل (version الداتا, view, الفترة, المنصة, اسم الـ chart ...) ويتشاركوا بين كل السيشنز والـ reruns
+# الـ specs بتتكتب dicts على طول من غير Altair: مفيش import تقيل ولا schema validation في الـ rerun
+# ======================
+CHART_SPEC_CACHE = 256
+
+
+class SpecCache:
+    def __init__(self, max_entries=CHART_SPEC_CACHE):
+        self.max_entries = max_entries
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key, build):
+        # build() بيرجع spec (الداتا DataFrame في datasets)؛ بيتنادى بس لو الـ key مش موجود
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.stats["hits"] += 1
+                return spec
+            self.stats["misses"] += 1
+        spec = to_spec(build())
+        with self._lock:
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.max_entries:
+                self._specs.popitem(last=False)
+                self.stats["evictions"] += 1
+        return spec
+
+    def __len__(self):
+        return len(self._specs)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(len(data) for spec in self._specs.values() for data in spec.get("datasets", {}).values())
+
+
+def arrow_bytes(frame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def to_spec(spec):
+    # الـ spec ده متشارك: Streamlit بياخد نسخة منه قبل ما يشيل الـ datasets، فمحدش بيعدل فيه
+    out = dict(spec)
+    out["datasets"] = {name: arrow_bytes(frame) for name, frame in spec["datasets"].items()}
+    return out
+
+
+def inline_spec(spec, **props):
+    # للـ HTML / PNG برة Streamlit: الداتا JSON جوه الـ spec نفسه
+    out = {key: value for key, value in spec.items() if key != "datasets"}
+    frame = spec["datasets"][spec["data"]["name"]]
+    out["data"] = {"values": json.loads(frame.to_json(orient="records", date_format="iso"))}
+    out.update(props)
+    return out
+
+
+# ======================
+# الـ charts نفسها
+# ======================
+def _field(name, kind, **extra):
+    return {"field": name, "type": kind, **extra}
+
+
+def _chart(frame, **spec):
+    return {"data": {"name": "table"}, "datasets": {"table": frame}, "width": "container", **spec}
+
+
+def trend_chart(points, by_branch=False):
+    if by_branch:
+        # خط لكل فرع
+        return _chart(
+            points,
+            mark={"type": "line", "point": True},
+            encoding={
+                "x": _field("Date", "temporal"),
+                "y": _field("total_interactions", "quantitative"),
+                "color": _field("Branch", "nominal"),
+                "tooltip": [
+                    _field("Branch", "nominal"),
+                    _field("Date", "temporal"),
+                    _field("total_interactions", "quantitative"),
+                ],
+            },
+        )
+    # الخط المتقطع = متوسط آخر 7 أيام
+    return _chart(
+        points,
+        encoding={"x": _field("Date", "temporal")},
+        layer=[
+            {
+                "mark": {"type": "line", "point": True},
+                "encoding": {
+                    "y": _field("total_interactions", "quantitative"),
+                    "tooltip": [
+                        _field("Date", "temporal"),
+                        _field("total_interactions", "quantitative"),
+                        _field("avg_7d", "quantitative", format=".1f", title="7-day avg"),
+                    ],
+                },
+            },
+            {
+                "mark": {"type": "line", "strokeDash": [6, 4], "color": "#f59e0b"},
+                "encoding": {"y": _field("avg_7d", "quantitative")},
+            },
+        ],
+    )
+
+
+def sentiment_chart(sentiment_df):
+    return _chart(
+        sentiment_df,
+        mark="bar",
+        encoding={
+            "x": _field("Sentiment", "nominal"),
+            "y": _field("Count", "quantitative"),
+            "color": _field("Sentiment", "nominal"),
+            "tooltip": [_field("Sentiment", "nominal"), _field("Count", "quantitative")],
+        },
+    )
+
+
+def pie_chart(pie_df):
+    return _chart(
+        pie_df,
+        mark={"type": "arc", "innerRadius": 50},
+        encoding={
+            "theta": _field("Count", "quantitative"),
+            "color": _field("Platform", "nominal"),
+            "tooltip": [_field("Platform", "nominal"), _field("Count", "quantitative")],
+        },
+    )
+
+
+def bar_chart(frame, stack=True):
+    # بديل st.bar_chart: الـ index على محور x بنفس الترتيب، وكل عمود series
+    x = frame.index.name or "index"
+    wide = frame.reset_index()
+    wide[x] = wide[x].astype(str)
+    long = wide.melt(id_vars=x, var_name="Series", value_name="Value")
+    encoding = {
+        "x": _field(x, "nominal", sort=list(wide[x]), title=x),
+        "y": _field("Value", "quantitative", title=None, stack=True if stack else None),
+        "tooltip": [_field(x, "nominal"), _field("Series", "nominal"), _field("Value", "quantitative")],
+    }
+    if frame.shape[1] > 1:
+        encoding["color"] = _field("Series", "nominal", title=None)
+        if not stack:
+            encoding["xOffset"] = _field("Series", "nominal")
+    return _chart(long, mark="bar", encoding=encoding)
@@ -0,0 +1,156 @@
+"""Clinic KPIs from the command line, or as a small HTTP JSON service.
+
+    python cli.py kpis --range "This month"
+    python cli.py kpis --start 2024-01-01 --end 2024-01-31 --platform Instagram
+    python cli.py periods --granularity Month --periods 6 --platform WhatsApp
+    python cli.py last-days --days 7 --source data/clinic.parquet
+    python cli.py kpis --branch Downtown   # with CLINIC_BRANCHES / [data_source.branches]
+    python cli.py serve --port 8080        # GET /kpis?range=This%20month
+    python cli.py validate --source export.csv   # bad rows / missing columns
+    python cli.py report --out reports/ --workers 4   # HTML / PNG / CSV per platform × range
+    python cli.py ingest --source logs/ --ledger .clinic_cache/events   # fold new log lines into the rollups
+
+The numbers come from the same analytics module the dashboard uses, so
+they match the page for the same data and range. The data source is
+resolved like the dashboard's: --source, then [data_source] in
+.streamlit/secrets.toml, then CLINIC_DATA_SOURCE, then the published sheet.
+Without --start/--end/--range the whole history is used.
+"""
+import argparse
+import json
+import sys
+from datetime import date
+
+import analytics
+from events import EventLogSource
+from metrics import PLATFORM_NAMES, ROWS_COLUMN
+from sources import StreamingCSVSource, build_source, guess_source_type, source_config_for
+
+
+def add_range_args(parser, platform_default=None):
+    parser.add_argument("--start", help="YYYY-MM-DD (default: first day in the data)")
+    parser.add_argument("--end", help="YYYY-MM-DD (default: last day in the data)")
+    parser.add_argument("--range", choices=analytics.QUICK_RANGES, help="quick range instead of --start/--end")
+    parser.add_argument("--platform", choices=PLATFORM_NAMES, default=platform_default)
+    parser.add_argument("--branch", action="append", help="only this branch (repeat for several)")
+
+
+def run_query(args, ds):
+    if args.branch:
+        unknown = sorted(set(args.branch) - set(ds.branches))
+        if unknown:
+            raise ValueError(f"unknown branch(es) {unknown}; available: {ds.branches}")
+        ds = ds.subset(args.branch)
+    start, end = analytics.resolve_range(ds, args.start, args.end, args.range)
+    if args.command == "kpis":
+        return analytics.summary(ds, start, end, args.platform)
+    if args.command == "periods":
+        series = analytics.period_series(ds, args.granularity, start, end, args.platform, periods=args.periods)
+        return {"version": ds.version, "granularity": args.granularity, "platform": args.platform,
+                "periods": analytics.frame_records(series)}
+    day_agg = analytics.last_days(ds, start, end, args.platform, args.days)
+    return {"version": ds.version, "platform": args.platform,
+            "days": [] if day_agg is None else analytics.frame_records(day_agg)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", help="sheet URL, local .csv / .parquet / .sqlite file or a folder of event logs")
+    parser.add_argument("--table", help="SQLite table name")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    kpis = commands.add_parser("kpis", help="KPI totals, sentiment and per-platform metrics")
+    add_range_args(kpis)
+
+    periods = commands.add_parser("periods", help="interactions / bookings per day, week, month or quarter")
+    add_range_args(periods, platform_default=PLATFORM_NAMES[0])
+    periods.add_argument("--granularity", choices=analytics.GRANULARITIES, default="Week")
+    periods.add_argument("--periods", type=int, default=4, help="last N periods (0 = all)")
+
+    last_days = commands.add_parser("last-days", help="interactions / bookings for the last N days with data")
+    add_range_args(last_days, platform_default=PLATFORM_NAMES[0])
+    last_days.add_argument("--days", type=int, default=7)
+
+    serve = commands.add_parser("serve", help="HTTP JSON endpoint (/kpis, /periods, /last-days, /health)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+
+    commands.add_parser("validate", help="stream the CSV and report bad dates, bad values and missing columns")
+
+    ingest = commands.add_parser("ingest", help="read new lines of the raw event logs into the daily rollups")
+    ingest.add_argument("--ledger", help="rollup directory (default: CLINIC_EVENT_LEDGER_DIR)")
+
+    report = commands.add_parser("report", help="HTML / PNG / CSV for every platform × quick range and week")
+    report.add_argument("--out", default="reports", help="output directory (re-runs only redo what changed)")
+    report.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    report.add_argument("--weeks", type=int, help="only the last N weeks (default: every week)")
+    report.add_argument("--force", action="store_true", help="regenerate everything")
+
+    args = parser.parse_args(argv)
+    config = source_config_for(args.source, table=args.table) if args.source else analytics.resolve_source_config()
+
+    if args.command == "serve":
+        from api import serve as serve_api
+
+        serve_api(config, host=args.host, port=args.port)
+        return
+
+    if args.command == "validate":
+        location = config.get("url") or config.get("path")
+        if not location or guess_source_type(location) not in ("sheet", "csv"):
+            parser.error("validate needs a CSV file or sheet URL")
+        source = StreamingCSVSource(location)
+        source.load()
+        json.dump(source.report.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    if args.command == "ingest":
+        if args.ledger:
+            config["ledger_dir"] = args.ledger
+        source = build_source(config)
+        if not isinstance(source, EventLogSource):
+            parser.error("ingest needs a folder of event logs (or [data_source] type = \"events\")")
+        try:
+            frame, version = source.load()
+        except ValueError as e:
+            parser.error(str(e))
+        result = {
+            "version": version,
+            "days": len(frame),
+            "events": int(frame[ROWS_COLUMN].sum()) if len(frame) else 0,
+            **source.stats,
+            "report": source.report.to_dict(),
+        }
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    if args.command == "report":
+        from report import build_report
+
+        try:
+            ds = analytics.load_dataset(config)
+        except ValueError as e:
+            parser.error(str(e))
+        result = build_report(ds, args.out, workers=args.workers, weeks=args.weeks, force=args.force)
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    try:
+        # --start و --end الاتنين: مع الأرشيف بنقرا الشهور اللي بتقاطع الفترة بس
+        if args.start and args.end and not args.range:
+            start, end = sorted((date.fromisoformat(args.start), date.fromisoformat(args.end)))
+            ds = analytics.load_dataset(config, start, end)
+        else:
+            ds = analytics.load_dataset(config)
+        result = run_query(args, ds)
+    except ValueError as e:
+        parser.error(str(e))
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
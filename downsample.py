@@ -0,0 +1,48 @@
+import numpy as np
+
+# ======================
+# Largest-Triangle-Three-Buckets: بنقلل عدد النقط في الـ line chart لحد أقصى ثابت
+# من غير ما نضيع القمم والقيعان (كل bucket بيختار النقطة اللي بتعمل أكبر مثلث)
+# ======================
+DEFAULT_MAX_POINTS = 400
+
+
+def lttb_indices(x, y, n_out):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # متوسط الـ bucket اللي بعده (أو آخر نقطة)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample_series(df, x_col, y_col, max_points=DEFAULT_MAX_POINTS):
+    if len(df) <= max_points:
+        return df
+    x = df[x_col].to_numpy().astype("datetime64[D]").astype(np.int64)
+    return df.iloc[lttb_indices(x, df[y_col].to_numpy(), max_points)]
@@ -0,0 +1,371 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ingest import COMBINE_EVERY, MAX_REPORTED, IngestReport, _blank, _combine, read_chunks
+from metrics import (
+    OUTCOMES,
+    PLATFORM_COLS,
+    PLATFORM_NAMES,
+    PLATFORMS,
+    ROWS_COLUMN,
+    SOURCE_COLUMNS,
+    add_totals,
+    compact_frame,
+)
+from perf import span
+
+# ======================
+# Logs خام بدل المجاميع اليدوية: صف لكل تفاعل (call / DM) فيه الوقت والمنصة والنتيجة
+#   timestamp,platform,outcome
+#   2024-03-01T10:15:00,Instagram,booking
+# الـ log بيتقري chunks (generator) وكل event بيزود 1 في إجمالي المنصة (Answered / Received)
+# و 1 في عمود النتيجة بتاعها في PLATFORM_COLS، ويتجمع يوم بيوم على طول:
+# الذاكرة على قد chunk + صف لكل يوم مهما كان حجم الـ log، والناتج نفس الـ frame اليومي بتاع الشيت
+# ======================
+EVENT_COLUMNS = ["timestamp", "platform", "outcome"]
+
+# أسماء المنصات: الاسم، اللاحقة اللي في الشيت، أو اسم عمود الإجمالي (من غير فرق في الحروف)
+PLATFORM_CODES = {
+    alias.lower(): code
+    for code, platform in enumerate(PLATFORMS)
+    for alias in (platform["name"], platform["suffix"], platform["total"])
+}
+
+# النتيجة: مفاتيح OUTCOMES أو الأسماء اللي في الشيت؛ "total" = تفاعل من غير نتيجة معينة
+OUTCOME_NAMES = list(OUTCOMES)
+OUTCOME_ALIASES = {
+    "": "total",
+    "answered": "total",
+    "received": "total",
+    "other": "total",
+    "booking": "bookings",
+    "booked": "bookings",
+    "new booking": "bookings",
+    "new bookings": "bookings",
+    "asked about dates": "asked_dates",
+    "asked dates": "asked_dates",
+    "not interested": "not_interested",
+    "no reply": "no_reply",
+    "no answer": "no_reply",
+    "didn't answer": "no_reply",
+    "didn’t answer": "no_reply",
+}
+
+
+def _outcome_key(text):
+    return text.strip().lower().replace("_", " ").replace("-", " ")
+
+
+OUTCOME_CODES = {_outcome_key(name): code for code, name in enumerate(OUTCOME_NAMES)}
+OUTCOME_CODES.update({alias: OUTCOME_NAMES.index(name) for alias, name in OUTCOME_ALIASES.items()})
+
+# (منصة، نتيجة) → رقم العمود في SOURCE_COLUMNS؛ -1 للـ "total" (الإجمالي بيتزود لكل event)
+_COLUMN_INDEX = {col: j for j, col in enumerate(SOURCE_COLUMNS)}
+TOTAL_CELL = np.array([_COLUMN_INDEX[PLATFORM_COLS[p]["total"]] for p in PLATFORM_NAMES])
+OUTCOME_CELL = np.array(
+    [[-1 if o == "total" else _COLUMN_INDEX[PLATFORM_COLS[p][o]] for o in OUTCOME_NAMES] for p in PLATFORM_NAMES]
+)
+
+# بصمة الجزء اللي اتقري من الملف: أوله + آخر حتة قبل الـ offset
+HEAD_BYTES = 64 << 10
+TAIL_BYTES = 4 << 10
+LEDGER = "ledger.json"
+# pyarrow بيقرا ~16 block قدام: block صغير = الذاكرة ثابتة وصغيرة مهما كان حجم الـ log
+EVENT_BLOCK_BYTES = 1 << 20
+
+
+def _lookup(values, codes, key):
+    # القيم المختلفة في الـ chunk قليلة (كام منصة / نتيجة): بنحولها هي بس مش كل صف
+    index, uniques = pd.factorize(values.fillna(""))
+    table = np.array([codes.get(key(text), np.nan) for text in uniques], dtype=np.float64)
+    return table[index] if len(table) else np.full(len(values), np.nan)
+
+
+def fold_events(chunk, first_row, report):
+    # chunk events (نصوص) → مجاميع يومية لكل عمود في SOURCE_COLUMNS + عدد الـ events في Rows
+    rows = first_row + np.arange(len(chunk))
+    stamps, platforms, outcomes = chunk["timestamp"], chunk["platform"], chunk["outcome"]
+    blank_row = _blank(stamps) & _blank(platforms) & _blank(outcomes)
+    report.blank_rows += int(blank_row.sum())
+
+    # اليوم زي ما هو مكتوب في الـ log (الساعة المحلية)؛ أي timezone بعد كده مش بيغير اليوم
+    day_codes, day_labels = pd.factorize(stamps.str.slice(0, 10))
+    parsed = pd.to_datetime(pd.Series(day_labels, dtype=object), format="%Y-%m-%d", errors="coerce").to_numpy()
+    days = np.append(parsed.astype("datetime64[D]"), np.datetime64("NaT"))[day_codes]
+    bad_date = np.isnat(days) & ~blank_row
+    if bad_date.any():
+        report.bad_dates += int(bad_date.sum())
+        report.add(rows[bad_date], "timestamp", stamps.to_numpy()[bad_date], "missing or unreadable timestamp")
+
+    platform = _lookup(platforms, PLATFORM_CODES, lambda text: text.strip().lower())
+    bad_platform = np.isnan(platform) & ~blank_row
+    if bad_platform.any():
+        report.bad_values += int(bad_platform.sum())
+        report.add(rows[bad_platform], "platform", platforms.to_numpy()[bad_platform], "unknown platform")
+
+    # نتيجة مش معروفة: الـ event بيتحسب في الإجمالي بس
+    outcome = _lookup(outcomes, OUTCOME_CODES, _outcome_key)
+    bad_outcome = np.isnan(outcome) & ~blank_row
+    if bad_outcome.any():
+        report.bad_values += int(bad_outcome.sum())
+        report.add(
+            rows[bad_outcome], "outcome", outcomes.to_numpy()[bad_outcome], "unknown outcome (counted in the total only)"
+        )
+    outcome[bad_outcome] = OUTCOME_NAMES.index("total")
+
+    keep = ~np.isnan(platform) & ~bad_date & ~blank_row
+    if not keep.any():
+        return None
+    day = days[keep]
+    first = day.min()
+    day_idx = (day - first).astype(np.int64)
+    n_days = int(day_idx.max()) + 1
+    p = platform[keep].astype(np.int64)
+    o = outcome[keep].astype(np.int64)
+
+    # كل event = خانتين في (يوم × عمود): الإجمالي والنتيجة، متعدين بـ bincount مرة واحدة
+    n_cols = len(SOURCE_COLUMNS)
+    cell = OUTCOME_CELL[p, o]
+    has_outcome = cell >= 0
+    flat = np.concatenate([day_idx * n_cols + TOTAL_CELL[p], day_idx[has_outcome] * n_cols + cell[has_outcome]])
+    counts = np.bincount(flat, minlength=n_days * n_cols).reshape(n_days, n_cols)
+    events = np.bincount(day_idx, minlength=n_days)
+
+    present = np.flatnonzero(events)
+    frame = pd.DataFrame(counts[present], columns=SOURCE_COLUMNS, index=pd.DatetimeIndex(first + present))
+    frame[ROWS_COLUMN] = events[present]
+    return frame
+
+
+def iter_event_chunks(stream, names):
+    # generator: الـ log بيتقري حتة حتة (pyarrow / pandas chunks) ومفيش غير chunk واحد في الذاكرة
+    yield from read_chunks(stream, names, EVENT_COLUMNS, EVENT_BLOCK_BYTES)
+
+
+def ingest_events(stream, names=None, first_row=2):
+    # بيرجع (مجاميع يومية خام بـ index اليوم, report, أسماء الأعمدة)
+    # names=None: أول سطر header؛ غير كده الـ stream بيبدأ من نص الملف (بعد آخر مرة اتقري)
+    report = IngestReport()
+    if names is None:
+        header = stream.readline().decode("utf-8-sig")
+        names = next(csv.reader([header])) if header.strip() else []
+    missing = [c for c in EVENT_COLUMNS if c not in names]
+    if missing:
+        raise ValueError(f"Event log is missing column(s) {missing}; expected {', '.join(EVENT_COLUMNS)}")
+
+    parts = []
+    for chunk in iter_event_chunks(stream, names):
+        with span("load.fold"):
+            part = fold_events(chunk, first_row, report)
+        if part is not None:
+            parts.append(part)
+        first_row += len(chunk)
+        report.rows += len(chunk)
+        if len(parts) >= COMBINE_EVERY:
+            parts = [_combine(parts, SOURCE_COLUMNS)]
+    return _combine(parts, SOURCE_COLUMNS), report, names
+
+
+def daily_frame(daily):
+    # نفس شكل load_data(): Date + أعمدة الشيت + الإجماليات، index بالأيام
+    daily = daily.sort_index()
+    daily.index = daily.index.rename("Day")
+    daily.insert(0, "Date", daily.index)
+    return add_totals(compact_frame(daily))
+
+
+# ======================
+# الـ ledger: لكل ملف log اتقري لحد فين (offset على آخر سطر كامل) + بصمة الجزء ده،
+# ومجاميعه اليومية (rollup). نفس الـ log تاني = ولا حاجة، log كبر = الجزء الجديد بس،
+# log اتكتب من جديد = بيتقري من الأول ويحل محل القديم. من غير directory الـ ledger في الذاكرة بس
+# ======================
+def _fingerprint(f, offset):
+    sha = hashlib.sha256()
+    f.seek(0)
+    sha.update(f.read(min(offset, HEAD_BYTES)))
+    if offset > HEAD_BYTES:
+        tail_start = max(HEAD_BYTES, offset - TAIL_BYTES)
+        f.seek(tail_start)
+        sha.update(f.read(offset - tail_start))
+    return sha.hexdigest()[:16]
+
+
+def _complete_end(f, size, start):
+    # آخر سطر ممكن يكون لسه بيتكتب: بنقف عند آخر \n
+    pos = size
+    while pos > start:
+        block_start = max(start, pos - (64 << 10))
+        f.seek(block_start)
+        block = f.read(pos - block_start)
+        newline = block.rfind(b"\n")
+        if newline != -1:
+            return block_start + newline + 1
+        pos = block_start
+    return start
+
+
+class _Window:
+    # الجزء [offset, end) من الملف كـ stream
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+        self.closed = False
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def readline(self):
+        data = self.f.readline(self.remaining)
+        self.remaining -= len(data)
+        return data
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+class EventLedger:
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.entries = {}
+        self._rollups = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            try:
+                with open(os.path.join(directory, LEDGER), encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except FileNotFoundError:
+                pass
+
+    def rollup(self, key):
+        if key not in self._rollups:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            frame = pd.read_parquet(os.path.join(self.directory, entry["rollup"]))
+            self._rollups[key] = frame.set_index(pd.DatetimeIndex(frame.pop("Day")))
+        return self._rollups[key]
+
+    def commit(self, key, entry, rollup):
+        # الـ rollup بيتكتب باسم جديد الأول وبعدين الـ ledger يشاور عليه: لو وقعنا في النص
+        # الـ ledger القديم بيفضل يشاور على الـ rollup القديم، فالإعادة مش بتعد حاجة مرتين
+        if self.directory:
+            entry["rollup"] = f"rollup-{key}-{entry['offset']:x}.parquet"
+            path = os.path.join(self.directory, entry["rollup"])
+            rollup.rename_axis("Day").reset_index().to_parquet(f"{path}.tmp", index=False)
+            os.replace(f"{path}.tmp", path)
+            old = self.entries.get(key, {}).get("rollup")
+            entries = {**self.entries, key: entry}
+            ledger_path = os.path.join(self.directory, LEDGER)
+            with open(f"{ledger_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+            os.replace(f"{ledger_path}.tmp", ledger_path)
+            if old and old != entry["rollup"]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+        self.entries[key] = entry
+        self._rollups[key] = rollup
+
+    def frames(self):
+        return [self.rollup(key) for key in sorted(self.entries)]
+
+
+class EventLogSource:
+    # path = ملف log أو فولدر فيه logs (*.csv). الـ ledger بالمسار: ملف اتمسح بيفضل تاريخه محسوب،
+    # وملف اتعمله rotate (اتغير اسمه) بيتقري باسمه الجديد والاسم القديم بيتقري من الأول
+    kind = "events"
+
+    def __init__(self, path, ledger_dir=None):
+        self.path = path
+        self.ledger = EventLedger(ledger_dir)
+        self.frame = None
+        self.version = None
+        self.report = None
+        self.stats = {"events_read": 0, "bytes_read": 0, "files_skipped": 0, "files_rewritten": 0}
+        self._lock = threading.Lock()
+
+    def files(self):
+        if os.path.isdir(self.path):
+            return [
+                os.path.join(self.path, name)
+                for name in sorted(os.listdir(self.path))
+                if name.endswith(".csv")
+            ]
+        return [self.path]
+
+    def _key(self, path):
+        return hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+
+    def _ingest_file(self, path, report):
+        key = self._key(path)
+        entry = self.ledger.entries.get(key)
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            base, names, start, first_row = None, None, 0, 2
+            appended = entry is not None and size >= entry["offset"]
+            if appended and _fingerprint(f, entry["offset"]) == entry["fingerprint"]:
+                if size == entry["offset"]:
+                    self.stats["files_skipped"] += 1
+                    return False
+                # الملف اتزود عليه بس: نكمل من مكان ما وقفنا
+                base, names = self.ledger.rollup(key), entry["columns"]
+                start, first_row = entry["offset"], entry["rows"] + 2
+            elif entry is not None:
+                self.stats["files_rewritten"] += 1
+
+            end = _complete_end(f, size, start)
+            if end == start:
+                return False
+            f.seek(start)
+            daily, part_report, names = ingest_events(_Window(f, end - start), names, first_row)
+            fingerprint = _fingerprint(f, end)
+
+        rows = (entry["rows"] if base is not None else 0) + part_report.rows
+        rollup = daily if base is None else _combine([base, daily], SOURCE_COLUMNS)
+        self.ledger.commit(key, {
+            "path": os.path.abspath(path),
+            "offset": end,
+            "fingerprint": fingerprint,
+            "columns": names,
+            "rows": rows,
+            "events": int(rollup[ROWS_COLUMN].sum()),
+        }, rollup)
+        self.stats["events_read"] += int(daily[ROWS_COLUMN].sum())
+        self.stats["bytes_read"] += end - start
+        _merge_report(report, part_report)
+        return True
+
+    def load(self):
+        with self._lock:
+            report = IngestReport()
+            with span("load.events"):
+                changed = [self._ingest_file(path, report) for path in self.files()]
+            if self.frame is None or any(changed):
+                with span("load.derived"):
+                    self.frame = daily_frame(_combine(self.ledger.frames(), SOURCE_COLUMNS))
+                state = sorted((key, e["offset"], e["fingerprint"]) for key, e in self.ledger.entries.items())
+                self.version = hashlib.sha256(repr(state).encode("utf-8")).hexdigest()[:16]
+                self.report = report
+            return self.frame, self.version
+
+
+def _merge_report(total, part):
+    total.rows += part.rows
+    total.blank_rows += part.blank_rows
+    total.bad_dates += part.bad_dates
+    total.bad_values += part.bad_values
+    total.issues.extend(part.issues[:max(MAX_REPORTED - len(total.issues), 0)])
@@ -0,0 +1,272 @@
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import numpy as np
+import urllib3
+
+from perf import RECORDER, WINDOW
+
+# ======================
+# HTTP client واحد مشترك لكل طلبات الشيت (وكل الفروع): connection pool بـ keep-alive،
+# gzip، timeout للـ connect وللـ read، retry بـ exponential backoff + jitter،
+# و circuit breaker لكل host: بعد كام fetch فاشل ورا بعض بنبطل نكلم الـ host لفترة
+# (الـ Refresher بيفضل يعرض آخر داتا سليمة) وبعدها طلب واحد تجربة
+# ======================
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 30.0
+RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60.0
+POOL_SIZE = 4
+# الحالات دي بتتعاد (السيرفر مشغول أو واقع مؤقتًا)؛ باقي الـ 4xx / 5xx بتفشل على طول
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+DEFAULT_HEADERS = {"Accept-Encoding": "gzip", "User-Agent": "clinic-dashboard"}
+
+
+class FetchError(OSError):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(FetchError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                # half open: طلب واحد بس يجرب، والباقي مستنيين نتيجته
+                self.state = "half_open"
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def retry_in(self):
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def report(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_in": self.retry_in(),
+        }
+
+
+def _timeout(timeout):
+    # (connect, read) أو رقم واحد للاتنين
+    if timeout is None or isinstance(timeout, urllib3.Timeout):
+        return timeout
+    if isinstance(timeout, tuple):
+        return urllib3.Timeout(connect=timeout[0], read=timeout[1])
+    return urllib3.Timeout(connect=timeout, read=timeout)
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _read_all(response):
+    return response.read()
+
+
+class HttpClient:
+    def __init__(
+        self,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        retries=RETRIES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX,
+        breaker_threshold=BREAKER_THRESHOLD,
+        breaker_cooldown=BREAKER_COOLDOWN,
+        pool_size=POOL_SIZE,
+    ):
+        self.timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        # الـ retry بتاعنا إحنا (عشان الـ jitter والعدادات)؛ urllib3 بيتبع الـ redirects بس
+        # (الشيت المنشور بيعمل redirect لـ googleusercontent)
+        self.pool = urllib3.PoolManager(
+            maxsize=pool_size,
+            retries=urllib3.Retry(total=None, connect=0, read=0, status=0, other=0, redirect=5),
+            timeout=self.timeout,
+        )
+
+        self.stats = {
+            "fetches": 0,
+            "ok": 0,
+            "not_modified": 0,
+            "failures": 0,
+            "retries": 0,
+            "rejected": 0,
+            "wire_bytes": 0,
+        }
+        self.last_error = None
+        self._latency = deque(maxlen=WINDOW)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self._breakers[host]
+
+    def backoff(self, attempt, retry_after=None):
+        # full jitter: عشوائي بين 0 و base·2^attempt، عشان الـ processes اللي فشلت مع بعض متعيدش مع بعض
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url, headers=None, timeout=None, read=_read_all):
+        # بيرجع (status, read(response) أو None لو 304, headers)
+        # read بيقرا الـ body (كله أو stream)؛ لو الطلب وقع في النص بيتعاد من الأول
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise CircuitOpenError(
+                f"{urlsplit(url).netloc}: {breaker.failures} failed fetches in a row, "
+                f"next try in {breaker.retry_in():.0f}s"
+            )
+        headers = {**DEFAULT_HEADERS, **(headers or {})}
+        timeout = _timeout(timeout) or self.timeout
+        try:
+            return self._attempts(url, headers, timeout, read, breaker)
+        except FetchError:
+            # الـ breaker اتسجل فيه النتيجة خلاص
+            raise
+        except BaseException as e:
+            # read وقع بحاجة مش من الشبكة (HTML بدل CSV مثلًا): لازم تتحسب فشل، وإلا
+            # لو ده كان طلب الـ half open الـ breaker يفضل مستني نتيجته على طول
+            breaker.failure()
+            with self._lock:
+                self.stats["failures"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            raise
+
+    def _attempts(self, url, headers, timeout, read, breaker):
+        started = time.perf_counter()
+        error = None
+        retry_after = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(self.backoff(attempt - 1, retry_after))
+            retry_after = None
+            response = None
+            try:
+                response = self.pool.request("GET", url, headers=headers, timeout=timeout, preload_content=False)
+                if response.status in RETRY_STATUSES:
+                    retry_after = _retry_after(response)
+                    error = FetchError(f"HTTP {response.status} from {url}", response.status)
+                    continue
+                if response.status >= 400:
+                    # الـ host شغال والطلب نفسه غلط (404 مثلًا): مش بيتعاد ومش بيفتح الـ breaker
+                    breaker.success()
+                    with self._lock:
+                        self.stats["failures"] += 1
+                        self.last_error = f"HTTP {response.status} from {url}"
+                    raise FetchError(self.last_error, response.status)
+                body = None if response.status == 304 else read(response)
+                self._done(breaker, response, started)
+                return response.status, body, response.headers
+            except FetchError:
+                raise
+            except (urllib3.exceptions.HTTPError, OSError) as e:
+                reason = getattr(e, "reason", None) or e
+                error = FetchError(f"{type(reason).__name__}: {reason}")
+            finally:
+                if response is not None:
+                    response.drain_conn()
+                    response.release_conn()
+
+        breaker.failure()
+        with self._lock:
+            self.stats["failures"] += 1
+            self.last_error = str(error)
+        raise error
+
+    def _done(self, breaker, response, started):
+        elapsed = time.perf_counter() - started
+        breaker.success()
+        RECORDER.record("http.fetch", elapsed)
+        with self._lock:
+            self._latency.append(elapsed)
+            self.stats["fetches"] += 1
+            self.stats["not_modified" if response.status == 304 else "ok"] += 1
+            self.stats["wire_bytes"] += response.tell()
+            self.last_error = None
+
+    def report(self):
+        with self._lock:
+            stats = dict(self.stats)
+            latency = np.asarray(self._latency) * 1000
+            breakers = {host: breaker.report() for host, breaker in self._breakers.items()}
+        pools = [self.pool.pools[key] for key in self.pool.pools.keys()]
+        stats.update(
+            last_error=self.last_error,
+            p50_ms=float(np.percentile(latency, 50)) if len(latency) else None,
+            p95_ms=float(np.percentile(latency, 95)) if len(latency) else None,
+            # requests أكتر من connections = الـ keep-alive شغال
+            connections=sum(pool.num_connections for pool in pools),
+            requests=sum(pool.num_requests for pool in pools),
+            breakers=breakers,
+        )
+        return stats
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    # client واحد للـ process كله: كل الـ sources والفروع بيستخدموا نفس الـ pool
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HttpClient()
+        return _shared
@@ -0,0 +1,183 @@
+import csv
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from metrics import OPTIONAL_COLUMNS, REQUIRED_COLUMNS, ROWS_COLUMN, SOURCE_COLUMNS, add_totals, compact_frame
+from perf import span
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # من غير pyarrow بنقرا بـ pandas chunks
+    pa = None
+
+# ======================
+# قراية CSV كبير حتة حتة: كل chunk بيتراجع (التاريخ + الأرقام) ويتجمع على مستوى اليوم على طول،
+# فالذاكرة على قد chunk واحد + صف لكل يوم، مهما كان حجم الشيت
+# الصفوف الغلط مش بتختفي في صمت: بتتعد وأول MAX_REPORTED منها بتتسجل برقم الصف في الشيت
+# ======================
+CHUNK_BYTES = 8 << 20
+CHUNK_ROWS = 200_000
+MAX_REPORTED = 50
+# كل كام chunk نجمع الأيام اللي اتجمعت (اليوم ممكن يبقى متقسم على chunks)
+COMBINE_EVERY = 16
+
+
+class IngestReport:
+    def __init__(self):
+        self.rows = 0
+        self.blank_rows = 0
+        self.bad_dates = 0
+        self.bad_values = 0
+        self.missing_columns = []
+        # أعمدة اختيارية مش في الشيت (بتتحسب صفر): للمعلومية بس، مش مشكلة
+        self.absent_optional = []
+        self.issues = []
+
+    def add(self, rows, column, values, problem):
+        room = MAX_REPORTED - len(self.issues)
+        for row, value in list(zip(rows, values))[:max(room, 0)]:
+            value = None if pd.isna(value) else str(value)
+            self.issues.append({"row": int(row), "column": column, "value": value, "problem": problem})
+
+    @property
+    def problems(self):
+        return self.bad_dates + self.bad_values
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "blank_rows": self.blank_rows,
+            "bad_dates": self.bad_dates,
+            "bad_values": self.bad_values,
+            "missing_columns": self.missing_columns,
+            "absent_optional": self.absent_optional,
+            "issues": self.issues,
+        }
+
+
+class HashingReader:
+    # بيعدي الـ bytes زي ما هي وبيحسب sha256 في السكة (للـ version)
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha = hashlib.sha256()
+        self.closed = False
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.sha.update(data)
+        return data
+
+    def readline(self):
+        data = self.raw.readline()
+        self.sha.update(data)
+        return data
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+def _blank(raw):
+    return raw.isna().to_numpy() | (raw.str.strip() == "").to_numpy()
+
+
+def fold_chunk(chunk, first_row, columns, report):
+    # chunk كله نصوص → مجاميع يومية (والأرقام الغلط بتتحسب صفر وتتسجل)
+    rows = first_row + np.arange(len(chunk))
+    has_value = np.zeros(len(chunk), dtype=bool)
+    values = {}
+    for col in columns:
+        raw = chunk[col]
+        blank = _blank(raw)
+        has_value |= ~blank
+        numbers = np.array(pd.to_numeric(raw.where(~blank), errors="coerce"), dtype=np.float64)
+        bad = ~blank & (np.isnan(numbers) | (numbers < 0) | (np.nan_to_num(numbers) % 1 != 0))
+        if bad.any():
+            report.bad_values += int(bad.sum())
+            report.add(rows[bad], col, raw.to_numpy()[bad], "not a whole non-negative number")
+            numbers[bad] = 0
+        values[col] = np.nan_to_num(numbers)
+
+    raw_dates = chunk["Date"]
+    blank_date = _blank(raw_dates)
+    blank_row = blank_date & ~has_value
+    report.blank_rows += int(blank_row.sum())
+
+    dates = pd.to_datetime(raw_dates.where(~blank_date), dayfirst=True, errors="coerce")
+    bad_date = dates.isna().to_numpy() & ~blank_row
+    if bad_date.any():
+        report.bad_dates += int(bad_date.sum())
+        report.add(rows[bad_date], "Date", raw_dates.to_numpy()[bad_date], "missing or unreadable date")
+
+    keep = dates.notna().to_numpy()
+    day = pd.DatetimeIndex(dates[keep]).normalize()
+    frame = pd.DataFrame({col: arr[keep] for col, arr in values.items()}, index=day)
+    frame[ROWS_COLUMN] = 1
+    return frame.groupby(level=0).sum()
+
+
+def _combine(parts, columns):
+    if not parts:
+        return pd.DataFrame(
+            {col: np.zeros(0) for col in columns + [ROWS_COLUMN]}, index=pd.DatetimeIndex([])
+        )
+    return pd.concat(parts).groupby(level=0).sum()
+
+
+def read_chunks(stream, names, usecols, block_size=CHUNK_BYTES):
+    # الـ header اتقرا خلاص؛ كل الأعمدة نصوص عشان التراجع يبقى بتاعنا مش بتاع الـ parser
+    if pa is not None:
+        reader = pacsv.open_csv(
+            stream,
+            read_options=pacsv.ReadOptions(column_names=names, block_size=block_size),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=usecols,
+                column_types={col: pa.string() for col in usecols},
+                null_values=[""],
+                strings_can_be_null=True,
+            ),
+        )
+        for batch in reader:
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(
+        stream,
+        names=names,
+        header=None,
+        usecols=usecols,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=CHUNK_ROWS,
+    )
+
+
+def ingest_csv(stream):
+    # بيرجع (frame يومي بنفس شكل prepare_frame + عمود Rows, report)
+    report = IngestReport()
+    header = stream.readline().decode("utf-8-sig")
+    names = next(csv.reader([header])) if header.strip() else []
+    if "Date" not in names:
+        raise ValueError("Column 'Date' not found in sheet. تأكد إن أول عمود اسمه Date بالظبط.")
+    report.missing_columns = [c for c in REQUIRED_COLUMNS if c not in names]
+    report.absent_optional = [c for c in OPTIONAL_COLUMNS if c not in names]
+    columns = [c for c in SOURCE_COLUMNS if c in names]
+
+    parts = []
+    first_row = 2  # رقم الصف في الشيت (بعد الـ header)
+    for chunk in read_chunks(stream, names, ["Date"] + columns):
+        with span("load.fold"):
+            parts.append(fold_chunk(chunk, first_row, columns, report))
+        first_row += len(chunk)
+        report.rows += len(chunk)
+        if len(parts) >= COMBINE_EVERY:
+            parts = [_combine(parts, columns)]
+
+    daily = _combine(parts, columns)
+    daily.index = daily.index.rename("Day")
+    daily.insert(0, "Date", daily.index)
+    return add_totals(compact_frame(daily)), report
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from metrics import PLATFORM_COLS, ROWS_COLUMN, SOURCE_COLUMNS, TOTAL_COLUMNS, numeric_block
+
+# ======================
+# Cube: يوم × عمود (منصة × مقياس) بمجاميع تراكمية
+# أي مجموع لأي فترة = فرق صفين من الـ cumsum، من غير ما نلف على الصفوف
+# ======================
+
+
+def cube_columns(df):
+    wanted = list(TOTAL_COLUMNS) + SOURCE_COLUMNS
+    return [c for c in dict.fromkeys(wanted) if c in df.columns]
+
+
+class MetricCube:
+    def __init__(self, first_day, columns, cum, rows_cum):
+        self.first_day = first_day
+        self.columns = columns
+        self.col_index = {c: j for j, c in enumerate(columns)}
+        # cum[i] = مجموع الأيام من أول يوم لحد اليوم i-1 (الصف 0 كله أصفار)
+        self.cum = cum
+        self.rows_cum = rows_cum
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        if columns is None:
+            columns = cube_columns(df)
+        columns = list(columns)
+
+        if df.empty:
+            return cls(None, columns, np.zeros((1, len(columns)), dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+        days = df["Date"].to_numpy().astype("datetime64[D]")
+        first_day = days.min()
+        n_days = int((days.max() - first_day).astype(np.int64)) + 1
+        day_idx = (days - first_day).astype(np.int64)
+
+        block = numeric_block(df, columns)
+        # داتا متجمعة يوم بيوم: كل صف بيمثل أكتر من صف في الشيت
+        weights = df[ROWS_COLUMN].to_numpy() if ROWS_COLUMN in df.columns else None
+        if not (day_idx[1:] >= day_idx[:-1]).all():
+            order = np.argsort(day_idx, kind="stable")
+            day_idx, block = day_idx[order], block[order]
+            if weights is not None:
+                weights = weights[order]
+
+        # الداتا مترتبة بالتاريخ، فكل يوم عبارة عن صفوف ورا بعض
+        starts = np.flatnonzero(np.r_[True, day_idx[1:] != day_idx[:-1]])
+        daily = np.zeros((n_days, len(columns)), dtype=np.float64)
+        daily[day_idx[starts]] = np.add.reduceat(block, starts, axis=0)
+        rows = np.bincount(day_idx, weights=weights, minlength=n_days)
+        if weights is not None:
+            rows = np.rint(rows).astype(np.int64)
+
+        cum = np.zeros((n_days + 1, len(columns)), dtype=np.int64)
+        np.cumsum(np.rint(daily).astype(np.int64), axis=0, out=cum[1:])
+        rows_cum = np.zeros(n_days + 1, dtype=np.int64)
+        np.cumsum(rows, out=rows_cum[1:])
+        return cls(first_day, columns, cum, rows_cum)
+
+    @property
+    def n_days(self):
+        return len(self.rows_cum) - 1
+
+    def _bounds(self, start, end):
+        if self.first_day is None:
+            return 0, 0
+        i = int((np.datetime64(start, "D") - self.first_day).astype(np.int64))
+        j = int((np.datetime64(end, "D") - self.first_day).astype(np.int64)) + 1
+        i = min(max(i, 0), self.n_days)
+        j = min(max(j, i), self.n_days)
+        return i, j
+
+    def first_changed_day(self, other):
+        # أول يوم (index على محور الأيام) مجاميعه مختلفة عن cube تاني؛ n_days لو مفيش اختلاف
+        if other.first_day is None or self.first_day != other.first_day or self.columns != other.columns:
+            return 0
+        n = min(self.n_days, other.n_days)
+        same = (self.cum[1:n + 1] == other.cum[1:n + 1]).all(axis=1) & (
+            self.rows_cum[1:n + 1] == other.rows_cum[1:n + 1]
+        )
+        changed = np.flatnonzero(~same)
+        return int(changed[0]) if len(changed) else n
+
+    def has(self, column):
+        return column in self.col_index
+
+    def row_count(self, start, end):
+        i, j = self._bounds(start, end)
+        return int(self.rows_cum[j] - self.rows_cum[i])
+
+    def sum(self, start, end, column):
+        if column not in self.col_index:
+            return 0
+        i, j = self._bounds(start, end)
+        k = self.col_index[column]
+        return int(self.cum[j, k] - self.cum[i, k])
+
+    def sums(self, start, end, columns=None):
+        i, j = self._bounds(start, end)
+        totals = self.cum[j] - self.cum[i]
+        if columns is None:
+            columns = self.columns
+        return {
+            c: int(totals[self.col_index[c]]) if c in self.col_index else 0
+            for c in columns
+        }
+
+    def platform_sums(self, start, end, platform):
+        cols_map = PLATFORM_COLS[platform]
+        totals = self.sums(start, end, cols_map.values())
+        return {metric: totals[col] for metric, col in cols_map.items()}
+
+    def by_platform(self, start, end, outcome):
+        # نفس الـ outcome لكل المنصات اللي ليها العمود ده في الشيت
+        columns = {p: cols_map[outcome] for p, cols_map in PLATFORM_COLS.items() if self.has(cols_map[outcome])}
+        totals = self.sums(start, end, columns.values())
+        return {p: totals[col] for p, col in columns.items()}
+
+    def daily(self, start, end, columns):
+        # مجاميع يومية للأيام اللي فيها صفوف بس (زي groupby("Date"))
+        i, j = self._bounds(start, end)
+        present = [c for c in columns if c in self.col_index]
+        values = np.diff(self.cum[i:j + 1][:, [self.col_index[c] for c in present]], axis=0)
+        has_rows = np.diff(self.rows_cum[i:j + 1]) > 0
+
+        days = self.first_day + np.arange(i, j) if self.first_day is not None else np.array([], dtype="datetime64[D]")
+        out = pd.DataFrame(values[has_rows], columns=present)
+        out.insert(0, "Date", pd.to_datetime(days[has_rows]))
+        return out
@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+
+# ======================
+# Registry المنصات × النتائج
+# كل منصة سطر واحد هنا (اسم العمود الإجمالي + اللاحقة اللي في أسماء الأعمدة)،
+# وكل حاجة تانية (PLATFORM_COLS، الأعمدة الإجمالية، الـ matrix) بتتبني منه
+# ======================
+# outcome -> (قالب اسم العمود في الشيت، العمود الإجمالي)
+# هنا استخدمنا نفس الـ apostrophe اللي في الشيت: Didn’t
+OUTCOMES = {
+    "total": (None, "total_interactions"),
+    "bookings": ("New Bookings - {suffix}", "total_new_bookings"),
+    "asked_dates": ("Asked About Dates - {suffix}", "total_asked_dates"),
+    "interested": ("Interested - {suffix}", "total_interested"),
+    "not_interested": ("Not Interested - {suffix}", "total_not_interested"),
+    "no_reply": ("Didn’t Answer - {suffix}", "total_no_reply"),
+}
+
+PLATFORMS = [
+    {"name": "Instagram", "total": "Instagram Answered", "suffix": "Insta"},
+    {"name": "WhatsApp", "total": "WhatsApp Answered", "suffix": "Whats"},
+    {"name": "TikTok", "total": "TikTok Answered", "suffix": "TikTok"},
+    # الكولز مالهاش Interested / Not Interested / Asked About Dates في الإجماليات،
+    # والأعمدة دي (و Didn’t Answer) ممكن متبقاش في الشيت أصلًا: بتتحسب صفر من غير تحذير
+    {
+        "name": "Calls",
+        "total": "Total Calls Received",
+        "suffix": "Call",
+        "totals_exclude": ("asked_dates", "interested", "not_interested"),
+        "optional": ("asked_dates", "interested", "not_interested", "no_reply"),
+    },
+]
+
+
+def _platform_columns(platform):
+    return {
+        outcome: platform["total"] if template is None else template.format(suffix=platform["suffix"])
+        for outcome, (template, _) in OUTCOMES.items()
+    }
+
+
+# ======================
+# تعريف خريطة المنصات (متولدة من الـ registry)
+# ======================
+PLATFORM_COLS = {p["name"]: _platform_columns(p) for p in PLATFORMS}
+PLATFORM_NAMES = list(PLATFORM_COLS)
+
+# ======================
+# الأعمدة الإجمالية المحسوبة من أعمدة الشيت
+# ======================
+def _total_columns():
+    totals = {total: [] for _, total in OUTCOMES.values()}
+    for platform in PLATFORMS:
+        for outcome, col in PLATFORM_COLS[platform["name"]].items():
+            if outcome not in platform.get("totals_exclude", ()):
+                totals[OUTCOMES[outcome][1]].append(col)
+    return totals
+
+
+TOTAL_COLUMNS = _total_columns()
+
+SOURCE_COLUMNS = list(dict.fromkeys(c for cols in PLATFORM_COLS.values() for c in cols.values()))
+OPTIONAL_COLUMNS = [
+    PLATFORM_COLS[p["name"]][outcome] for p in PLATFORMS for outcome in p.get("optional", ())
+]
+REQUIRED_COLUMNS = [c for c in SOURCE_COLUMNS if c not in OPTIONAL_COLUMNS]
+
+# الداتا اللي اتجمعت يوم بيوم وقت القراية (ingest.py) بيبقى فيها عدد صفوف الشيت لكل يوم هنا
+ROWS_COLUMN = "Rows"
+
+
+def numeric_block(df, columns, dtype=np.float64):
+    # الخلايا الفاضية أو اللي مش أرقام بتتحسب صفر
+    block = np.zeros((len(df), len(columns)), dtype=dtype)
+    for j, col in enumerate(columns):
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+        block[:, j] = np.nan_to_num(values.to_numpy(dtype=np.float64, na_value=0.0))
+    return block
+
+
+# ======================
+# Schema مضغوط: الأعداد unsigned بأصغر نوع يكفي أكبر قيمة (الفاضي = صفر)،
+# والتاريخ على مستوى اليوم والـ index بيشاور على نفس الـ buffer بتاعه
+# ======================
+UINT_DTYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+
+def smallest_uint(values):
+    top = int(values.max()) if len(values) else 0
+    for dtype in UINT_DTYPES:
+        if top <= np.iinfo(dtype).max:
+            return values.astype(dtype, copy=False)
+
+
+def compact_counts(values):
+    if pd.api.types.is_integer_dtype(values) and (
+        pd.api.types.is_unsigned_integer_dtype(values) or values.min() >= 0
+    ):
+        return smallest_uint(values.to_numpy())
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(values, errors="coerce")
+    arr = np.nan_to_num(values.to_numpy(dtype=np.float64, na_value=0.0))
+    # كسور أو أرقام سالبة: العمود يفضل float (والفاضي صفر برضه)
+    if (arr < 0).any() or (arr != np.floor(arr)).any():
+        return arr
+    return smallest_uint(arr.astype(np.int64))
+
+
+def compact_frame(df):
+    for col in SOURCE_COLUMNS + list(TOTAL_COLUMNS) + [ROWS_COLUMN]:
+        if col in df.columns:
+            df[col] = compact_counts(df[col])
+    df["Date"] = df["Date"].dt.normalize().astype("datetime64[s]")
+    df.index = pd.DatetimeIndex(df["Date"], name="Day")
+    return df
+
+
+def frame_memory(df):
+    # bytes لكل عمود؛ الـ index مش بيتحسب تاني لو بيشارك الـ Date
+    columns = df.memory_usage(index=False, deep=True)
+    shared = "Date" in df.columns and np.shares_memory(df.index.asi8, df["Date"].to_numpy().view(np.int64))
+    index_bytes = 0 if shared else int(df.index.nbytes)
+    total = int(columns.sum()) + index_bytes
+    # نفس الداتا لو كل عمود عدد int64 / float64 والـ Date والـ index كل واحد لوحده
+    counts = [c for c in df.columns if c in TOTAL_COLUMNS or c in SOURCE_COLUMNS]
+    other = int(columns.drop(counts + ["Date"], errors="ignore").sum())
+    wide = len(df) * 8 * (len(counts) + 2) + other
+    rows = len(df)
+    return {
+        "rows": rows,
+        "bytes": total,
+        "bytes_per_row": total / rows if rows else 0.0,
+        "wide_bytes": wide,
+        "index_shares_date": bool(shared),
+        "columns": {c: (str(df[c].dtype), int(columns[c])) for c in df.columns},
+    }
+
+
+def selection_matrix(columns):
+    # matrix (أعمدة الشيت × الأعمدة الإجمالية): 1 لو العمود داخل في الإجمالي
+    totals = list(TOTAL_COLUMNS)
+    matrix = np.zeros((len(columns), len(totals)), dtype=np.float64)
+    col_index = {c: i for i, c in enumerate(columns)}
+    for k, name in enumerate(totals):
+        for col in TOTAL_COLUMNS[name]:
+            if col in col_index:
+                matrix[col_index[col], k] = 1.0
+    return totals, matrix
+
+
+def add_totals(df):
+    # كل الإجماليات في ضربة matrix واحدة بدل sum لكل إجمالي لوحده
+    present = [c for c in SOURCE_COLUMNS if c in df.columns]
+    totals, matrix = selection_matrix(present)
+    result = numeric_block(df, present) @ matrix
+    integer = [pd.api.types.is_unsigned_integer_dtype(df[c]) for c in present]
+    for k, name in enumerate(totals):
+        # الإجمالي يفضل عدد صحيح لو كل الأعمدة اللي داخلة فيه أعداد، بأصغر نوع يكفيه
+        if all(integer[i] for i in np.flatnonzero(matrix[:, k])):
+            df[name] = smallest_uint(np.rint(result[:, k]).astype(np.int64))
+        else:
+            df[name] = result[:, k]
+    return df
+
+
+def prepare_frame(df):
+    # نتأكد إن اسم العمود Date مكتوب صح
+    if "Date" not in df.columns:
+        raise ValueError("Column 'Date' not found in sheet. تأكد إن أول عمود اسمه Date بالظبط.")
+
+    # نحول التاريخ
+    df["Date"] = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
+    df = df.dropna(subset=["Date"]).sort_values("Date", kind="stable")
+
+    # أعداد مضغوطة + index مترتب على مستوى اليوم عشان الفلترة تبقى binary search
+    df = compact_frame(df)
+
+    # نعمل أعمدة إجمالية
+    return add_totals(df)
+
+
+# ======================
+# فلترة بالتاريخ على الـ index المترتب (من غير mask ولا copy)
+# ======================
+def slice_days(df, start, end):
+    i = df.index.searchsorted(pd.Timestamp(start), side="left")
+    j = df.index.searchsorted(pd.Timestamp(end), side="right")
+    return df.iloc[i:j]
+
+
+def last_n_days(df, n):
+    # آخر n أيام مختلفة: كل خطوة binary search لأول صف في اليوم اللي قبله
+    start = len(df)
+    for _ in range(n):
+        if start == 0:
+            break
+        start = df.index.searchsorted(df.index[start - 1], side="left")
+    return df.iloc[start:]
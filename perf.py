@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# ======================
+# قياس الوقت: spans حوالين كل مرحلة (تحميل، فلترة، KPIs، كل view)
+# آخر WINDOW قياس لكل span بيتحفظوا عشان p50 / p95،
+# ويتصدروا Prometheus text أو JSON log
+# ======================
+WINDOW = 200
+
+
+def process_started():
+    # وقت بداية الـ process (epoch) من /proc على Linux، وإلا وقت import الموديول ده
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+# عشان time-to-first-render: من بداية الـ process لحد ما أول صفحة تترسم
+PROCESS_STARTED = process_started()
+
+
+class SpanRecorder:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._spans = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            if name not in self._spans:
+                self._spans[name] = deque(maxlen=self.window)
+                self._counts[name] = 0
+            self._spans[name].append(seconds)
+            self._counts[name] += 1
+
+    @contextmanager
+    def span(self, name, into=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.record(name, elapsed)
+            if into is not None:
+                into[name] = elapsed
+
+    def summary(self):
+        with self._lock:
+            spans = {name: list(values) for name, values in self._spans.items()}
+            counts = dict(self._counts)
+        out = {}
+        for name, values in sorted(spans.items()):
+            arr = np.asarray(values)
+            out[name] = {
+                "count": counts[name],
+                "last": float(arr[-1]),
+                "mean": float(arr.mean()),
+                "p50": float(np.percentile(arr, 50)),
+                "p95": float(np.percentile(arr, 95)),
+                "max": float(arr.max()),
+            }
+        return out
+
+    def to_prometheus(self, prefix="clinic_dashboard"):
+        lines = [
+            f"# HELP {prefix}_span_seconds Duration of dashboard spans over the last {self.window} runs.",
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        for name, stats in self.summary().items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{prefix}_span_seconds{{span="{label}",quantile="0.5"}} {stats["p50"]:.6f}')
+            lines.append(f'{prefix}_span_seconds{{span="{label}",quantile="0.95"}} {stats["p95"]:.6f}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{label}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+RECORDER = SpanRecorder()
+span = RECORDER.span
+
+
+def export(path, rerun_timings=None, recorder=RECORDER):
+    # .json / .jsonl: سطر JSON لكل rerun؛ غير كده: ملف Prometheus بيتكتب من جديد
+    if path.endswith((".json", ".jsonl")):
+        entry = {"ts": time.time(), "pid": os.getpid(), "spans": rerun_timings or {}}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(recorder.to_prometheus())
+    os.replace(tmp_path, path)
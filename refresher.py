@@ -0,0 +1,142 @@
+import threading
+import time
+
+# ======================
+# Refresher في الخلفية: بيجيب الداتا كل فترة ويبدل الـ snapshot مرة واحدة
+# السيشنز دايمًا بتقرا آخر snapshot سليم ومش بتستنى الشبكة أبدًا
+# ولو التحميل فشل بنفضل نعرض الداتا القديمة
+# ومع warm_dir: آخر snapshot سليم بيتحفظ على الديسك، وبعد restart بيتعرض على طول
+# (status = "warm") لحد ما أول تحميل من المصدر يخلص في الخلفية
+# ======================
+
+
+class Refresher:
+    def __init__(self, source, interval=5.0, warm_dir=None):
+        self.source = source
+        self.interval = interval
+        self.warm_store = None
+        if warm_dir:
+            from shared_snapshot import SnapshotStore
+
+            self.warm_store = SnapshotStore(warm_dir)
+
+        # (frame, version, as_of) — بيتبدل كله مرة واحدة
+        self.snapshot = None
+        self.last_attempt = None
+        self.last_success = None
+        self.last_error = None
+        self.consecutive_failures = 0
+        self.refresh_count = 0
+        # True طول ما المعروض جاي من الـ warm snapshot ولسه مفيش تحميل نجح
+        self.warm = False
+        self.warm_version = None
+        self.warm_error = None
+
+        self._stop = threading.Event()
+        self._lock = threading.RLock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.load_warm()
+            self._thread = threading.Thread(target=self._run, name="data-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.refresh_once():
+                self.save_warm()
+            self._stop.wait(self.interval)
+
+    def load_warm(self):
+        if self.warm_store is None or self.snapshot is not None:
+            return False
+        manifest = self.warm_store.read_manifest()
+        if manifest is None:
+            return False
+        try:
+            frame = self.warm_store.read(manifest)
+        except Exception as e:
+            self.warm_error = f"{type(e).__name__}: {e}"
+            return False
+        with self._lock:
+            if self.snapshot is None:
+                self.snapshot = (frame, manifest["version"], manifest["written_at"])
+                self.warm = True
+                self.warm_version = manifest["version"]
+        return self.warm
+
+    def save_warm(self):
+        # بيتكتب بس لما الـ version تتغير، من الـ thread بتاع الـ refresher (مش في rerun)
+        snapshot = self.snapshot
+        if self.warm_store is None or snapshot is None or self.warm or snapshot[1] == self.warm_version:
+            return False
+        try:
+            self.warm_store.write(snapshot[0], snapshot[1])
+        except Exception as e:
+            self.warm_error = f"{type(e).__name__}: {e}"
+            return False
+        self.warm_version = snapshot[1]
+        self.warm_error = None
+        return True
+
+    def refresh_once(self):
+        with self._lock:
+            self.last_attempt = time.time()
+            try:
+                frame, version = self.source.load()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.consecutive_failures += 1
+                return False
+
+            now = time.time()
+            self.snapshot = (frame, version, now)
+            self.last_success = now
+            self.last_error = None
+            self.consecutive_failures = 0
+            self.refresh_count += 1
+            self.warm = False
+            return True
+
+    def get(self):
+        snapshot = self.snapshot
+        if snapshot is None:
+            # أول تحميل في الـ process: مفيش snapshot لسه فلازم نستنى مرة واحدة
+            with self._lock:
+                if self.snapshot is None and not self.refresh_once():
+                    raise RuntimeError(f"Couldn't load data: {self.last_error}")
+            snapshot = self.snapshot
+        return snapshot
+
+    def health(self):
+        now = time.time()
+        if self.snapshot is None:
+            status = "starting" if self.consecutive_failures == 0 else "down"
+        elif self.consecutive_failures:
+            status = "stale"
+        elif self.warm:
+            status = "warm"
+        elif self._thread is not None and not self._thread.is_alive():
+            status = "stopped"
+        else:
+            status = "ok"
+        return {
+            "status": status,
+            "as_of": self.snapshot[2] if self.snapshot else None,
+            "age_seconds": now - self.last_success if self.last_success else None,
+            "last_attempt": self.last_attempt,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "refresh_count": self.refresh_count,
+            "interval": self.interval,
+            "warm_version": self.warm_version,
+            "warm_error": self.warm_error,
+        }
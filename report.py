@@ -0,0 +1,256 @@
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import chart_specs
+from metrics import PLATFORM_COLS, PLATFORM_NAMES
+
+try:
+    import vl_convert
+except ImportError:  # من غير vl-convert-python مفيش PNG، والـ HTML / CSV بيطلعوا عادي
+    vl_convert = None
+
+# ======================
+# تقرير batch: كل منصة × (كل Quick Range + كل أسبوع) → HTML + PNG + CSV
+# الداتا بتتحمل مرة واحدة وبتتبعت لكل worker مرة واحدة (initializer)، والتركيبات بتتوزع على process pool
+# وكل artifact ليه fingerprint من أرقام الأيام اللي بيعرضها: اللي داتته متغيرتش مبيتعملش تاني
+# ======================
+MANIFEST = "manifest.json"
+# لو شكل التقرير اتغير، زود الرقم ده عشان كل حاجة تتعمل من الأول
+REPORT_FORMAT = 2
+CHART_WIDTH = 560
+# الفترات الأطول من كده بتترسم أسابيع بدل أيام
+DAILY_CHART_DAYS = 31
+
+_dataset = None
+
+
+def slug(text):
+    return "".join(c.lower() if c.isalnum() else "-" for c in text).strip("-")
+
+
+def report_ranges(ds, weeks=None):
+    # [(اسم, start, end)]: الـ Quick Ranges زي الداشبورد، وبعدين كل أسبوع (إتنين → أحد) فيه داتا
+    ranges = [(name, *analytics.preset_range(name, ds.min_date, ds.max_date)) for name in analytics.QUICK_RANGES]
+    _, keys, labels = ds.buckets._bucket_edges("Week")
+    week_ranges = []
+    for key, label in zip(keys, labels):
+        monday = pd.Timestamp(key).date()
+        start, end = max(monday, ds.min_date), min(monday + timedelta(days=6), ds.max_date)
+        if ds.cube.row_count(start, end):
+            week_ranges.append((f"Week {label}", start, end))
+    if weeks is not None:
+        week_ranges = week_ranges[-weeks:] if weeks else []
+    return ranges + week_ranges
+
+
+def fingerprint(ds, platform, start, end):
+    # الأيام اللي التقرير بيقرا منها: الفترة نفسها، الفترة اللي قبلها (المقارنة)، وآخر 28 يوم (rolling)
+    first = analytics.context_start(start, end)
+    cube = ds.cube
+    i, j = cube._bounds(first, end)
+    columns = [cube.col_index[c] for c in PLATFORM_COLS[platform].values() if cube.has(c)]
+    digest = hashlib.sha256(repr((REPORT_FORMAT, platform, start, end, first)).encode("utf-8"))
+    digest.update(np.ascontiguousarray(np.diff(cube.cum[i:j + 1][:, columns], axis=0)).tobytes())
+    digest.update(np.diff(cube.rows_cum[i:j + 1]).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def plan(ds, out_dir, weeks=None, force=False):
+    # كل التركيبات + أنهي منها محتاج يتعمل تاني
+    manifest = {} if force else load_manifest(out_dir)
+    jobs, skipped = [], []
+    for name, start, end in report_ranges(ds, weeks):
+        for platform in PLATFORM_NAMES:
+            key = f"{slug(name)}/{slug(platform)}"
+            job = {
+                "key": key,
+                "range": name,
+                "start": start,
+                "end": end,
+                "platform": platform,
+                "fingerprint": fingerprint(ds, platform, start, end),
+            }
+            entry = manifest.get(key)
+            done = entry is not None and entry["fingerprint"] == job["fingerprint"] and all(
+                os.path.exists(os.path.join(out_dir, path)) for path in entry["files"]
+            )
+            (skipped if done else jobs).append(job)
+    return jobs, skipped
+
+
+# ======================
+# الـ worker
+# ======================
+def _init_worker(frame, version):
+    # بيتنادى مرة واحدة لكل process: الـ cube بيتبني مرة ويخدم كل التركيبات اللي الـ worker هياخدها
+    global _dataset
+    _dataset = analytics.Dataset(frame, version)
+
+
+def _charts(ds, results, platform, start, end):
+    cols_map = PLATFORM_COLS[platform]
+    present = {metric: col for metric, col in cols_map.items() if ds.cube.has(col)}
+    if (end - start).days + 1 > DAILY_CHART_DAYS:
+        # نفس الفترات اللي الـ Time analysis بيرسمها
+        series = results.periods("Week", platform)
+        series = series.rename(columns={col: metric for metric, col in present.items()})
+        unit = "week"
+    else:
+        series = ds.cube.daily(start, end, list(present.values())).set_index("Date")
+        series = series.rename(columns={col: metric for metric, col in present.items()})
+        series.index = series.index.strftime("%Y-%m-%d").rename("Day")
+        unit = "day"
+    over_time = series[[m for m in ("total", "bookings") if m in series.columns]]
+    metrics = results.platform(platform)
+    outcomes = pd.DataFrame({"Count": metrics}).rename_axis("Metric")
+    return series, [
+        (f"Interactions and new bookings per {unit}", chart_specs.bar_chart(over_time, stack=False)),
+        ("Outcomes", chart_specs.bar_chart(outcomes)),
+    ]
+
+
+def _kpi_rows(results, platform):
+    metrics = results.platform(platform)
+    previous = results.platform_comparison(platform)
+    rolling = results.platform_rolling(platform)
+    rows = []
+    for metric, value in metrics.items():
+        change = previous["change"][metric]
+        rows.append({
+            "metric": metric,
+            "value": value,
+            "previous": previous["values"][metric] if previous["has_data"] else None,
+            "change": None if change is None else round(change, 4),
+            "avg_7d": rolling["7d"][metric],
+            "avg_28d": rolling["28d"][metric],
+        })
+    conversion = analytics.conversion_rate(metrics["bookings"], metrics["total"])
+    return rows, conversion, previous
+
+
+def _html(job, rows, conversion, previous, charts):
+    def fmt(value, spec=",.1f"):
+        return "—" if value is None else format(value, spec)
+
+    body_rows = "".join(
+        f"<tr><td>{html.escape(r['metric'])}</td><td>{r['value']:,}</td><td>{fmt(r['previous'], ',')}</td>"
+        f"<td>{fmt(r['change'], '+.1%')}</td><td>{fmt(r['avg_7d'])}</td><td>{fmt(r['avg_28d'])}</td></tr>"
+        for r in rows
+    )
+    chart_divs = "".join(
+        f'<h3>{html.escape(title)}</h3><div id="chart{n}"></div>' for n, (title, _) in enumerate(charts)
+    )
+    embeds = "".join(
+        f'vegaEmbed("#chart{n}", {json.dumps(chart)}, {{actions: false}});'
+        for n, (_, chart) in enumerate(charts)
+    )
+    title = f"{job['platform']} — {job['range']}"
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<script src="https://cdn.jsdelivr.net/npm/vega@5"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-lite@5"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-embed@6"></script>
+<style>body{{font-family:sans-serif;margin:24px;color:#2c3e50}}table{{border-collapse:collapse}}
+td,th{{padding:4px 12px;border-bottom:1px solid #eee;text-align:right}}td:first-child,th:first-child{{text-align:left}}</style>
+</head><body>
+<h1>{html.escape(title)}</h1>
+<p>{job['start']:%Y-%m-%d} → {job['end']:%Y-%m-%d} · conversion {fmt(conversion, '.1%')}
+· previous period {previous['start']:%Y-%m-%d} → {previous['end']:%Y-%m-%d}</p>
+<table><tr><th>Metric</th><th>Value</th><th>Previous</th><th>Change</th><th>7d avg/day</th><th>28d avg/day</th></tr>
+{body_rows}</table>
+{chart_divs}
+<script>{embeds}</script>
+</body></html>
+"""
+
+
+def render_job(job, out_dir):
+    ds = _dataset
+    start, end, platform = job["start"], job["end"], job["platform"]
+    results = ds.range(start, end)
+    series, charts = _charts(ds, results, platform, start, end)
+    charts = [(title, chart_specs.inline_spec(chart, width=CHART_WIDTH, height=260)) for title, chart in charts]
+    rows, conversion, previous = _kpi_rows(results, platform)
+
+    base = os.path.join(out_dir, job["key"])
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    files = [job["key"] + ".html", job["key"] + ".csv"]
+    with open(base + ".html", "w", encoding="utf-8") as f:
+        f.write(_html(job, rows, conversion, previous, charts))
+    series.to_csv(base + ".csv")
+    if vl_convert is not None:
+        spec = {"vconcat": [chart for _, chart in charts]}
+        with open(base + ".png", "wb") as f:
+            f.write(vl_convert.vegalite_to_png(vl_spec=spec, scale=2))
+        files.append(job["key"] + ".png")
+    return {"key": job["key"], "fingerprint": job["fingerprint"], "files": files,
+            "range": job["range"], "platform": platform}
+
+
+def write_index(out_dir, manifest):
+    by_range = {}
+    for key, entry in sorted(manifest.items()):
+        by_range.setdefault(entry["range"], []).append(entry)
+    sections = "".join(
+        f"<h2>{html.escape(name)}</h2><ul>"
+        + "".join(
+            f'<li><a href="{html.escape(e["files"][0])}">{html.escape(e["platform"])}</a> '
+            + " ".join(f'<a href="{html.escape(path)}">{os.path.splitext(path)[1][1:]}</a>' for path in e["files"][1:])
+            + "</li>"
+            for e in entries
+        )
+        + "</ul>"
+        for name, entries in by_range.items()
+    )
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Clinic report</title></head>'
+                f"<body><h1>Clinic report</h1>{sections}</body></html>\n")
+
+
+def build_report(ds, out_dir, workers=None, weeks=None, force=False):
+    os.makedirs(out_dir, exist_ok=True)
+    jobs, skipped = plan(ds, out_dir, weeks, force)
+    manifest = {} if force else load_manifest(out_dir)
+    if jobs:
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(ds.frame, ds.version)
+            ) as pool:
+                futures = [pool.submit(render_job, job, out_dir) for job in jobs]
+                for future in as_completed(futures):
+                    entry = future.result()
+                    manifest[entry.pop("key")] = entry
+        finally:
+            # اللي خلص يتسجل حتى لو worker وقع، فالمرة الجاية تكمل من مكانها
+            write_manifest(out_dir, manifest)
+    write_index(out_dir, manifest)
+    return {
+        "version": ds.version,
+        "out": out_dir,
+        "written": len(jobs),
+        "skipped": len(skipped),
+        "png": vl_convert is not None,
+    }
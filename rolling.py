@@ -0,0 +1,66 @@
+import numpy as np
+
+# ======================
+# مجاميع rolling (آخر 7 / 28 يوم) لكل يوم على محور الأيام في الـ cube
+# كل نافذة = فرق صفين من الـ cumsum، فمفيش لف على الصفوف ولا على التاريخ كله في الـ rerun
+# ولما تيجي version جديدة بنكمل من الـ version اللي قبلها: النوافذ اللي قبل أول يوم اتغير
+# زي ما هي، وبنحسب بس النوافذ اللي فيها يوم جديد أو متعدل
+# ======================
+ROLLING_WINDOWS = (7, 28)
+
+
+class RollingWindows:
+    def __init__(self, cube, previous=None):
+        self.cube = cube
+        self._sums = {}
+        self.stats = {"reused_days": 0, "computed_days": 0}
+        if previous is not None:
+            self._extend(previous)
+
+    def _extend(self, previous):
+        # الـ cum بتاع اليوم d بيتغير لو أي يوم قبله اتغير، فأول صف مختلف = أول يوم اتغير
+        # والنافذة اللي بتخلص عند يوم d محتاجة الأيام من d-w+1 لحد d بس
+        changed = self.cube.first_changed_day(previous.cube)
+        for window, old in previous._sums.items():
+            self._sums[window] = self._compute(window, changed, old[:changed])
+
+    def _compute(self, window, start=0, head=None):
+        cum = self.cube.cum
+        n_days = self.cube.n_days
+        ends = np.arange(start + 1, n_days + 1)
+        tail = cum[ends] - cum[np.maximum(ends - window, 0)]
+        self.stats["computed_days"] += len(ends)
+        if head is None or not len(head):
+            return tail
+        self.stats["reused_days"] += len(head)
+        return np.concatenate([head, tail])
+
+    def sums(self, window):
+        # sums[d, k] = مجموع العمود k في آخر window يوم لحد اليوم d
+        if window not in self._sums:
+            self._sums[window] = self._compute(window)
+        return self._sums[window]
+
+    def averages(self, day, window, columns):
+        # متوسط اليوم في آخر window يوم لحد day (الأيام اللي مفيهاش صفوف بتتحسب صفر)
+        cube = self.cube
+        _, j = cube._bounds(day, day)
+        if j == 0:
+            return {c: None for c in columns}
+        span_days = min(window, j)
+        row = self.sums(window)[j - 1]
+        return {c: float(row[cube.col_index[c]] / span_days) if cube.has(c) else None for c in columns}
+
+    def series(self, days, window, column):
+        # المتوسط عند أيام معينة (مثلًا نقط الـ trend بعد الـ downsampling)
+        cube = self.cube
+        if cube.first_day is None or not cube.has(column):
+            return np.zeros(len(days))
+        idx = (np.asarray(days, dtype="datetime64[D]") - cube.first_day).astype(np.int64)
+        idx = np.clip(idx, 0, cube.n_days - 1)
+        span_days = np.minimum(window, idx + 1)
+        return self.sums(window)[idx, cube.col_index[column]] / span_days
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self._sums.values())
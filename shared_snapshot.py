@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # Windows: مفيش file lock، فكل process بيحمل لنفسه
+    fcntl = None
+
+# ======================
+# Snapshot مشترك على الديسك بين كل الـ processes (Arrow IPC)
+# process واحد بس (اللي ماسك الـ lock) بيحمل من المصدر ويكتب الـ snapshot،
+# والباقي بيفتحوه memory-mapped ويعيدوا القراية بس لما الـ version يتغير
+# ======================
+MANIFEST = "snapshot.json"
+LOCK_FILE = "refresh.lock"
+KEEP_FILES = 2
+
+
+def frame_to_table(frame):
+    data = frame.reset_index()
+    try:
+        return pa.Table.from_pandas(data, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # عمود فيه أنواع مختلفة (أرقام ونصوص): نحوله نص
+        for col in data.columns:
+            if data[col].dtype == object:
+                data[col] = data[col].astype("string")
+        return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def table_to_frame(table):
+    # split_blocks: الأعمدة الرقمية من غير nulls بتفضل zero-copy على الـ mmap
+    frame = table.to_pandas(split_blocks=True, self_destruct=False)
+    return frame.set_index("Day")
+
+
+class SnapshotStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # ----- leader election: أول process يمسك الـ lock يفضل ماسكه لحد ما يقفل -----
+    def try_acquire(self):
+        if self._lock_fd is not None:
+            return True
+        if fcntl is None:
+            return True
+        fd = os.open(self._path(LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def release(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    # ----- manifest + ملفات الـ snapshot -----
+    def read_manifest(self):
+        try:
+            with open(self._path(MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write(self, frame, version):
+        file_name = f"snapshot-{version}.arrow"
+        path = self._path(file_name)
+        table = frame_to_table(frame)
+        with pa.OSFile(path + ".tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(path + ".tmp", path)
+
+        manifest = {
+            "version": version,
+            "file": file_name,
+            "rows": len(frame),
+            "written_at": time.time(),
+            "writer_pid": os.getpid(),
+        }
+        with open(self._path(MANIFEST + ".tmp"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(self._path(MANIFEST + ".tmp"), self._path(MANIFEST))
+        self._prune(file_name)
+        return manifest
+
+    def _prune(self, current):
+        # الملفات القديمة بتتمسح؛ أي process فاتحها mmap بيفضل يقراها عادي لحد ما يقفلها
+        files = sorted(
+            (f for f in os.listdir(self.directory) if f.startswith("snapshot-") and f.endswith(".arrow")),
+            key=lambda f: os.path.getmtime(self._path(f)),
+        )
+        for name in files[:-KEEP_FILES]:
+            if name != current:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+
+    def read(self, manifest):
+        source = pa.memory_map(self._path(manifest["file"]), "r")
+        table = pa.ipc.open_file(source).read_all()
+        return table_to_frame(table)
+
+
+class SharedSnapshotSource:
+    # بيلف حوالين أي مصدر: الـ leader بيحمل من المصدر ويكتب، والباقي بيقروا الـ snapshot
+    kind = "shared"
+
+    def __init__(self, source, directory):
+        self.source = source
+        self.store = SnapshotStore(directory)
+        self.frame = None
+        self.version = None
+        self.role = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.store.try_acquire():
+                self.role = "leader"
+                frame, version = self.source.load()
+                manifest = self.store.read_manifest()
+                if manifest is None or manifest["version"] != version:
+                    self.store.write(frame, version)
+                self.frame, self.version = frame, version
+                return self.frame, self.version
+
+            self.role = "follower"
+            manifest = self.store.read_manifest()
+            if manifest is None:
+                # لسه مفيش snapshot مكتوب: نحمل من المصدر مرة لحد ما الـ leader يكتب
+                if self.frame is None:
+                    self.frame, self.version = self.source.load()
+                return self.frame, self.version
+            if manifest["version"] != self.version:
+                self.frame = self.store.read(manifest)
+                self.version = manifest["version"]
+            return self.frame, self.version
+
+    def close(self):
+        self.store.release()
@@ -0,0 +1,117 @@
+import hashlib
+import io
+import threading
+import time
+
+import pandas as pd
+
+from http_client import shared_client
+from metrics import compact_frame, prepare_frame
+from perf import span
+
+# ======================
+# تحميل الشيت بطلبات مشروطة (ETag / Last-Modified)
+# لو مفيش تغيير مش بنعمل parse تاني، ولو في صفوف جديدة في الآخر بس
+# بنعمل parse للصفوف الجديدة ونضيفها على الداتا اللي عندنا
+# الطلب نفسه بيروح من الـ HTTP client المشترك (http_client.py): keep-alive، gzip، timeouts و retry
+# ======================
+
+
+def _split_header(body):
+    end = body.find(b"\n")
+    if end == -1:
+        return body + b"\n"
+    return body[: end + 1]
+
+
+class SheetLoader:
+    def __init__(self, url, min_interval=5.0, timeout=None, client=None):
+        self.url = url
+        self.min_interval = min_interval
+        # (connect, read) بالثواني؛ None = الـ default بتاع الـ client
+        self.timeout = timeout
+        self.client = client or shared_client()
+
+        self.etag = None
+        self.last_modified = None
+        self.body = None
+        self.digest = None
+        self.frame = None
+        self.version = None
+        self.checked_at = None
+        self.stats = {"not_modified": 0, "unchanged": 0, "appended": 0, "full": 0}
+
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            fresh = (
+                self.checked_at is not None
+                and time.monotonic() - self.checked_at < self.min_interval
+            )
+            if self.frame is None or not fresh:
+                self._refresh()
+            return self.frame, self.version
+
+    def _fetch(self):
+        headers = {}
+        if self.body is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+        return self.client.get(self.url, headers=headers, timeout=self.timeout)
+
+    def _refresh(self):
+        with span("load.fetch"):
+            status, body, headers = self._fetch()
+        self.checked_at = time.monotonic()
+
+        if status == 304 and self.frame is not None:
+            self.stats["not_modified"] += 1
+            return
+
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+
+        digest = hashlib.sha256(body).hexdigest()
+        if digest == self.digest:
+            self.stats["unchanged"] += 1
+            return
+
+        appended = self._appended_part(body)
+        if appended is None:
+            with span("load.parse"):
+                raw = pd.read_csv(io.BytesIO(body))
+            with span("load.derived"):
+                self.frame = prepare_frame(raw)
+            self.stats["full"] += 1
+        else:
+            with span("load.parse"):
+                raw = pd.read_csv(io.BytesIO(_split_header(body) + appended))
+            with span("load.derived"):
+                new_rows = prepare_frame(raw)
+            if not new_rows.empty:
+                frame = pd.concat([self.frame, new_rows])
+                if not frame["Date"].is_monotonic_increasing:
+                    frame = frame.sort_values("Date", kind="stable")
+                self.frame = compact_frame(frame)
+            self.stats["appended"] += 1
+
+        self.body = body
+        self.digest = digest
+        self.version = digest[:16]
+
+    def _appended_part(self, body):
+        # الصفوف القديمة لازم تفضل زي ما هي بالظبط، والجديد يبدأ من أول سطر
+        old = self.body
+        if self.frame is None or old is None or not body.startswith(old):
+            return None
+        tail = body[len(old):]
+        if old.endswith(b"\n"):
+            return tail
+        if tail.startswith(b"\r\n"):
+            return tail[2:]
+        if tail.startswith(b"\n"):
+            return tail[1:]
+        return None
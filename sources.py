@@ -0,0 +1,376 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import pandas as pd
+
+import http_client
+from archive import ArchiveSource
+from events import EventLogSource
+from ingest import HashingReader, ingest_csv
+from metrics import compact_frame, prepare_frame
+from perf import span
+from sheet_fetch import SheetLoader
+
+# ======================
+# رابط الـ CSV بتاع Google Sheets
+# ======================
+GOOGLE_SHEET_CSV_URL = (
+    "https://docs.google.com/spreadsheets/d/e/"
+    "2PACX-1vTbn8mE8Z8QSRfb73Lk63htHUK31I59W5ZDaDTb81dtVK0Q61tczvnfGgGVQMYndidyxG8IdKuuVZ4o/"
+    "pub?gid=551101663&single=true&output=csv"
+)
+
+# ======================
+# مصادر الداتا: الشيت المنشور، أو CSV / Parquet / SQLite محلي
+# كل مصدر عنده load() بيرجع (الداتا, version) والـ version بيتغير لما الداتا تتغير
+# ======================
+
+
+class SheetSource:
+    kind = "sheet"
+
+    def __init__(self, url, min_interval=5.0, timeout=None):
+        self.loader = SheetLoader(url, min_interval=min_interval, timeout=timeout)
+
+    @property
+    def version(self):
+        return self.loader.version
+
+    def load(self):
+        return self.loader.load()
+
+
+class _FileSource:
+    kind = None
+
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+        self.frame = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        # الملف بيتقري تاني بس لو اتعدل (وقت التعديل أو الحجم اتغير)
+        with self._lock:
+            stat = os.stat(self.path)
+            version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+            if self.frame is None or version != self.version:
+                with span("load.parse"):
+                    raw = self._read()
+                with span("load.derived"):
+                    self.frame = prepare_frame(raw)
+                self.version = version
+            return self.frame, self.version
+
+    def _read(self):
+        raise NotImplementedError
+
+
+class CSVFileSource(_FileSource):
+    kind = "csv"
+
+    def _read(self):
+        return pd.read_csv(self.path)
+
+
+class ParquetSource(_FileSource):
+    kind = "parquet"
+
+    def _read(self):
+        return pd.read_parquet(self.path)
+
+
+class SQLiteSource(_FileSource):
+    kind = "sqlite"
+
+    def __init__(self, path, table="clinic_data"):
+        super().__init__(path)
+        self.table = table
+
+    def _read(self):
+        with closing(sqlite3.connect(self.path)) as conn:
+            return pd.read_sql_query(
+                f'SELECT * FROM "{self.table}"', conn, parse_dates=["Date"]
+            )
+
+
+class StreamingCSVSource:
+    # CSV (رابط أو ملف) بيتقري chunks ويتجمع يوم بيوم وهو بيتقري (ingest.py)
+    # الذاكرة على قد chunk واحد، والصفوف الغلط في self.report
+    kind = "stream"
+
+    def __init__(self, location, timeout=None, client=None):
+        self.location = location
+        self.timeout = timeout
+        self.client = client or http_client.shared_client()
+        self.is_url = location.startswith(("http://", "https://"))
+        self.frame = None
+        self.version = None
+        self.report = None
+        self.etag = None
+        self.last_modified = None
+        self._stat = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.is_url:
+                self._load_url()
+            else:
+                self._load_file()
+            return self.frame, self.version
+
+    def _ingest(self, raw):
+        reader = HashingReader(raw)
+        with span("load.parse"):
+            frame, report = ingest_csv(reader)
+        # باقي الـ body (لو في) عشان الـ hash يبقى على الملف كله
+        while reader.read(1 << 20):
+            pass
+        version = reader.sha.hexdigest()[:16]
+        if version != self.version:
+            self.frame, self.version, self.report = frame, version, report
+
+    def _load_file(self):
+        stat = os.stat(self.location)
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self.frame is None or key != self._stat:
+            with open(self.location, "rb") as f:
+                self._ingest(f)
+            self._stat = key
+
+    def _load_url(self):
+        headers = {}
+        if self.frame is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+        # الـ body بيتقري stream من الـ connection (gzip بيتفك في السكة)
+        status, _, response_headers = self.client.get(
+            self.location, headers=headers, timeout=self.timeout, read=self._ingest
+        )
+        if status != 304:
+            self.etag = response_headers.get("ETag")
+            self.last_modified = response_headers.get("Last-Modified")
+
+
+# ======================
+# أكتر من فرع: كل فرع ليه شيت (أو ملف) بنفس الشكل
+# كل الفروع بتتحمل في نفس الوقت على thread pool، فوقت التحميل ≈ أبطأ فرع بس،
+# وبعدين بيتدمجوا في frame واحد فيه عمود Branch
+# ======================
+BRANCH_COLUMN = "Branch"
+
+
+class MultiSource:
+    kind = "multi"
+
+    def __init__(self, sources):
+        # sources: {اسم الفرع: source} بالترتيب اللي هيظهر بيه في الداشبورد
+        self.sources = dict(sources)
+        self.version = None
+        self.frame = None
+        self.branch_versions = {}
+        self.branch_errors = {}
+        self._frames = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="branch-load")
+
+    def load(self):
+        with self._lock:
+            futures = {name: self._pool.submit(source.load) for name, source in self.sources.items()}
+            for name, future in futures.items():
+                try:
+                    self._frames[name], self.branch_versions[name] = future.result()
+                    self.branch_errors.pop(name, None)
+                except Exception as e:
+                    # فرع واحد واقع مايوقفش الباقيين: بنفضل على آخر داتا سليمة ليه
+                    self.branch_errors[name] = f"{type(e).__name__}: {e}"
+                    if name not in self._frames:
+                        raise
+
+            key = "|".join(f"{name}={self.branch_versions[name]}" for name in self.sources)
+            version = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+            if self.frame is None or version != self.version:
+                with span("load.merge"):
+                    self.frame = self._merge()
+                self.version = version
+            return self.frame, self.version
+
+    def _merge(self):
+        names = list(self.sources)
+        parts = []
+        for name in names:
+            part = self._frames[name].copy(deep=False)
+            part[BRANCH_COLUMN] = pd.Categorical([name] * len(part), categories=names)
+            parts.append(part)
+        merged = pd.concat(parts)
+        # stable: جوه نفس اليوم الصفوف بتفضل بترتيب الفروع وترتيب الشيت
+        return compact_frame(merged.sort_index(kind="stable"))
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        for source in self.sources.values():
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+
+SOURCE_TYPES = {
+    "sheet": SheetSource,
+    "stream": StreamingCSVSource,
+    "csv": CSVFileSource,
+    "parquet": ParquetSource,
+    "sqlite": SQLiteSource,
+    "events": EventLogSource,
+}
+
+
+def build_source(config):
+    config = dict(config)
+    # archive_dir: الشهور اللي خلصت بتتحفظ Parquet (شهر لكل ملف) ومبتتقراش من الشيت تاني
+    archive_dir = config.pop("archive_dir", None) or os.environ.get("CLINIC_ARCHIVE_DIR")
+    if config.get("branches"):
+        branches = {}
+        for name, branch in config["branches"].items():
+            branch = source_config_for(branch) if isinstance(branch, str) else dict(branch)
+            if archive_dir:
+                # كل فرع ليه أرشيف لوحده
+                branch["archive_dir"] = os.path.join(archive_dir, name)
+            branches[name] = build_source(branch)
+        return MultiSource(branches)
+    source = _build_single(config)
+    if archive_dir:
+        source = ArchiveSource(source, archive_dir)
+    return source
+
+
+def _build_single(config):
+    kind = config.pop("type", None) or guess_source_type(
+        config.get("url") or config.get("path", "")
+    )
+    if kind not in SOURCE_TYPES:
+        raise ValueError(f"Unknown data source type: {kind!r}")
+    if kind == "sheet":
+        # الـ Refresher هو اللي بيحدد كل قد إيه نجيب الداتا
+        return SheetSource(config["url"], min_interval=float(config.get("min_interval", 0)), timeout=_timeout(config))
+    if kind == "sqlite":
+        return SQLiteSource(config["path"], table=config.get("table", "clinic_data"))
+    if kind == "stream":
+        return StreamingCSVSource(config.get("url") or config["path"], timeout=_timeout(config))
+    if kind == "events":
+        # ledger_dir: المكان اللي بيتحفظ فيه لحد فين كل log اتقري (من غيره بيتقري من الأول في كل process)
+        ledger_dir = config.get("ledger_dir") or os.environ.get("CLINIC_EVENT_LEDGER_DIR")
+        return EventLogSource(config["path"], ledger_dir=ledger_dir)
+    return SOURCE_TYPES[kind](config["path"])
+
+
+def _timeout(config):
+    # connect_timeout / read_timeout في [data_source] (بالثواني)؛ من غيرهم الـ default بتاع http_client
+    if "connect_timeout" not in config and "read_timeout" not in config:
+        return None
+    return (
+        float(config.get("connect_timeout", http_client.CONNECT_TIMEOUT)),
+        float(config.get("read_timeout", http_client.READ_TIMEOUT)),
+    )
+
+
+def source_layers(source):
+    # الـ wrappers (shared snapshot / archive) حوالين بعض: {kind: wrapper} + المصدر اللي جواهم كلهم
+    # (شيت / ملف / multi). الـ report مثلًا على المصدر الأخير بس
+    layers = {}
+    while getattr(source, "source", None) is not None:
+        layers[source.kind] = source
+        source = source.source
+    return layers, source
+
+
+def guess_source_type(location):
+    if location.startswith(("http://", "https://")):
+        return "sheet"
+    if os.path.isdir(location):
+        # فولدر = logs خام (events.py)
+        return "events"
+    ext = os.path.splitext(location)[1].lower()
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    if ext in (".sqlite", ".sqlite3", ".db"):
+        return "sqlite"
+    return "csv"
+
+
+def default_source_config():
+    return {"type": "sheet", "url": GOOGLE_SHEET_CSV_URL}
+
+
+def source_config_from_env(environ=os.environ):
+    # CLINIC_DATA_SOURCE=/data/clinic.parquet  أو  https://...output=csv
+    # CLINIC_BRANCHES="Downtown=https://...output=csv;Maadi=/data/maadi.parquet"
+    branches = environ.get("CLINIC_BRANCHES")
+    if branches:
+        return {"branches": parse_branches(branches)}
+    location = environ.get("CLINIC_DATA_SOURCE")
+    if not location:
+        return None
+    return source_config_for(
+        location,
+        kind=environ.get("CLINIC_DATA_SOURCE_TYPE"),
+        table=environ.get("CLINIC_DATA_SOURCE_TABLE"),
+    )
+
+
+def parse_branches(spec):
+    branches = {}
+    for item in spec.split(";"):
+        if item.strip():
+            name, sep, location = item.partition("=")
+            if not sep or not name.strip() or not location.strip():
+                raise ValueError(f"Expected Branch=location, got {item!r}")
+            branches[name.strip()] = location.strip()
+    return branches
+
+
+def source_config_for(location, kind=None, table=None):
+    key = "url" if location.startswith(("http://", "https://")) else "path"
+    config = {"type": kind or guess_source_type(location), key: location}
+    if table:
+        config["table"] = table
+    return config
+
+
+def source_config_from_secrets_file(path):
+    # نفس الـ [data_source] اللي الداشبورد بيقراه من st.secrets، بس من غير Streamlit
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        section = tomllib.load(f).get("data_source")
+    return dict(section) if section else None
+
+
+# ======================
+# حفظ snapshot محلي (Parquet / SQLite) من أي مصدر
+# ======================
+def write_snapshot(frame, path, table="clinic_data"):
+    kind = guess_source_type(path)
+    tmp_path = path + ".tmp"
+    if kind == "parquet":
+        frame.to_parquet(tmp_path, index=False)
+    elif kind == "sqlite":
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with closing(sqlite3.connect(tmp_path)) as conn:
+            frame.to_sql(table, conn, index=False)
+            conn.commit()
+    elif kind == "csv":
+        out = frame.copy()
+        out["Date"] = out["Date"].dt.strftime("%d/%m/%Y")
+        out.to_csv(tmp_path, index=False)
+    else:
+        raise ValueError(f"Can't write a snapshot to {path!r}")
+    os.replace(tmp_path, path)
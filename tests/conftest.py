@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.synth import synth_frame  # noqa: E402
+from metrics import prepare_frame  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def raw_sheet():
+    # 200 يوم من 2023-01-01 بكذا صف في اليوم، وشوية أيام من غير صفوف (إجازات)
+    raw = synth_frame(3000, days=200, seed=1)
+    gaps = {"05/01/2023", "14/02/2023", "15/02/2023", "01/04/2023", "02/05/2023"}
+    return raw[~raw["Date"].isin(gaps)].reset_index(drop=True)
+
+
+@pytest.fixture(scope="session")
+def frame(raw_sheet):
+    return prepare_frame(raw_sheet.copy())
+
+
+@pytest.fixture(scope="session")
+def sheet_csv(raw_sheet, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("sheet") / "sheet.csv")
+    raw_sheet.to_csv(path, index=False)
+    return path
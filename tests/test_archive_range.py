@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+import cli
+from bench.synth import write_sheet
+
+# synth بيبدأ من 2023-01-01: الفترات دي كلها في شهور مقفولة (من الأرشيف) أو بتعدي على أولها
+RANGES = [
+    ("2023-06-01", "2023-06-30"),
+    ("2023-06-10", "2023-06-10"),
+    ("2023-02-20", "2023-03-05"),
+    ("2023-01-03", "2023-01-09"),
+    ("2024-01-20", "2024-02-04"),
+]
+
+
+@pytest.fixture(scope="module")
+def sheet(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("sheet") / "sheet.csv")
+    write_sheet(20_000, path, days=400)
+    return path
+
+
+def run_kpis(capsys, sheet, start, end, platform=None):
+    argv = ["--source", sheet, "kpis", "--start", start, "--end", end]
+    if platform:
+        argv += ["--platform", platform]
+    cli.main(argv)
+    result = json.loads(capsys.readouterr().out)
+    result.pop("version")
+    return result
+
+
+@pytest.mark.parametrize("start,end", RANGES)
+@pytest.mark.parametrize("platform", [None, "WhatsApp"])
+def test_archive_range_matches_full_load(sheet, tmp_path, monkeypatch, capsys, start, end, platform):
+    monkeypatch.delenv("CLINIC_ARCHIVE_DIR", raising=False)
+    expected = run_kpis(capsys, sheet, start, end, platform)
+
+    archive_dir = tmp_path / "archive"
+    monkeypatch.setenv("CLINIC_ARCHIVE_DIR", str(archive_dir))
+    # أول مرة بتكتب الأرشيف، والتانية بتقرا الفترة من الأرشيف بس
+    first = run_kpis(capsys, sheet, start, end, platform)
+    assert any(archive_dir.iterdir())
+    second = run_kpis(capsys, sheet, start, end, platform)
+
+    assert first == expected
+    assert second == expected
+    # الفترة اللي قبلها موجودة في الداتا: المقارنة لازم تطلع أرقام مش None
+    if start > "2023-01-09":
+        assert None not in expected["previous"]["change"].values()
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bucketing import GRANULARITIES, TimeBuckets
+from metric_cube import MetricCube
+from metrics import PLATFORM_COLS
+
+# نفس التقسيم بتاع الكود القديم: أسبوع بيبدأ الإتنين، شهر، ربع سنة
+PERIOD_FREQ = {"Day": "D", "Week": "W", "Month": "M", "Quarter": "Q"}
+COLUMNS = [PLATFORM_COLS["WhatsApp"]["total"], PLATFORM_COLS["WhatsApp"]["bookings"], "total_interactions"]
+RANGES = [("2023-01-01", "2023-07-19"), ("2023-02-08", "2023-05-17"), ("2023-03-30", "2023-04-02")]
+
+
+@pytest.fixture(scope="module")
+def buckets(frame):
+    return TimeBuckets(MetricCube.from_frame(frame))
+
+
+def pandas_periods(frame, granularity, start, end):
+    rows = frame[(frame["Date"] >= pd.Timestamp(start)) & (frame["Date"] <= pd.Timestamp(end))]
+    starts = rows["Date"].dt.to_period(PERIOD_FREQ[granularity]).dt.start_time
+    return rows.groupby(starts)[COLUMNS].sum()
+
+
+@pytest.mark.parametrize("granularity", GRANULARITIES)
+@pytest.mark.parametrize("start,end", RANGES)
+def test_bucket_totals_match_pandas(frame, buckets, granularity, start, end):
+    expected = pandas_periods(frame, granularity, start, end)
+    got = buckets.series(granularity, start, end, COLUMNS)
+    assert list(got["Start"]) == list(expected.index)
+    assert np.array_equal(got[COLUMNS].to_numpy(), expected.to_numpy())
+
+
+def test_labels(buckets):
+    assert list(buckets.series("Week", "2023-01-02", "2023-01-15", COLUMNS).index) == ["2023-01-02", "2023-01-09"]
+    assert list(buckets.series("Month", "2023-01-20", "2023-02-10", COLUMNS).index) == ["2023-01", "2023-02"]
+    assert list(buckets.series("Quarter", "2023-03-20", "2023-04-10", COLUMNS).index) == ["2023-Q1", "2023-Q2"]
+
+
+def test_periods_keeps_the_last_buckets(buckets):
+    everything = buckets.series("Week", "2023-01-01", "2023-07-19", COLUMNS)
+    assert buckets.series("Week", "2023-01-01", "2023-07-19", COLUMNS, periods=3).equals(everything.tail(3))
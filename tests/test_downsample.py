@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from downsample import downsample_series, lttb_indices
+
+
+@pytest.fixture(scope="module")
+def daily(frame):
+    # نفس الـ series اللي الـ trend بيرسمها: مجموع اليوم بـ groupby
+    return frame.groupby("Date", as_index=False)["total_interactions"].sum()
+
+
+@pytest.mark.parametrize("max_points", [3, 10, 50, 120])
+def test_point_count_and_endpoints(daily, max_points):
+    out = downsample_series(daily, "Date", "total_interactions", max_points=max_points)
+    assert len(out) == max_points
+    assert out.iloc[0].equals(daily.iloc[0])
+    assert out.iloc[-1].equals(daily.iloc[-1])
+    # نقط من الـ series الأصلية بالترتيب، من غير تكرار
+    positions = daily.index.get_indexer(out.index)
+    assert (positions >= 0).all() and (np.diff(positions) > 0).all()
+    assert out["total_interactions"].equals(daily.loc[out.index, "total_interactions"])
+
+
+def test_short_series_is_unchanged(daily):
+    assert downsample_series(daily, "Date", "total_interactions", max_points=len(daily)) is daily
+
+
+def test_spike_is_kept():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[437] = 50.0
+    assert 437 in lttb_indices(x, y, 40)
@@ -0,0 +1,138 @@
+import pandas as pd
+import pytest
+
+from events import EventLogSource
+from metrics import SOURCE_COLUMNS
+
+HEADER = "timestamp,platform,outcome\n"
+# مش مترتبة، وفيها event متكرر بالظبط (بيتحسب مرتين: مفيش event id نعمل بيه dedup)
+LOG = [
+    "2024-03-02T09:00:00,Instagram,booking\n",
+    "2024-03-01T10:15:00,Instagram,booking\n",
+    "2024-03-01T10:15:00,Instagram,booking\n",
+    "2024-03-01T11:00:00,whats,no reply\n",
+    "2024-03-02T12:00:00,Calls,answered\n",
+    "2024-03-01T13:00:00,TikTok,interested\n",
+    "2024-03-03T08:00:00,Fax,booking\n",
+    "not-a-date,Instagram,booking\n",
+    "2024-03-02T14:00:00,WhatsApp,something else\n",
+]
+
+# المحسوب باليد: {يوم: {عمود: عدد}}، وباقي الأعمدة صفر
+EXPECTED = {
+    "2024-03-01": {
+        "Instagram Answered": 2,
+        "New Bookings - Insta": 2,
+        "WhatsApp Answered": 1,
+        "Didn’t Answer - Whats": 1,
+        "TikTok Answered": 1,
+        "Interested - TikTok": 1,
+        "Rows": 4,
+    },
+    "2024-03-02": {
+        "Instagram Answered": 1,
+        "New Bookings - Insta": 1,
+        "Total Calls Received": 1,
+        "WhatsApp Answered": 1,
+        "Rows": 3,
+    },
+}
+
+
+def write(path, lines, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+def expected_frame(expected):
+    days = sorted(expected)
+    cells = {col: [expected[day].get(col, 0) for day in days] for col in SOURCE_COLUMNS + ["Rows"]}
+    return pd.DataFrame(cells, index=pd.DatetimeIndex(days, name="Day").astype("datetime64[s]"))
+
+
+def check(frame, expected):
+    want = expected_frame(expected)
+    got = frame[SOURCE_COLUMNS + ["Rows"]].astype("int64")
+    assert list(got.index) == list(want.index)
+    pd.testing.assert_frame_equal(got, want, check_names=False, check_freq=False)
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "events.csv"
+    write(path, [HEADER] + LOG)
+    return path
+
+
+def test_rollup_matches_hand_counts(log):
+    source = EventLogSource(str(log))
+    frame, version = source.load()
+    check(frame, EXPECTED)
+    assert list(frame["Date"]) == list(frame.index)
+    assert frame.loc["2024-03-01", "total_interactions"] == 4
+    assert frame.loc["2024-03-01", "total_new_bookings"] == 2
+    assert frame.loc["2024-03-02", "total_interactions"] == 3
+
+    report = source.report
+    assert report.rows == len(LOG)
+    assert report.bad_dates == 1
+    # منصة مش معروفة (الصف مش بيتحسب) + نتيجة مش معروفة (بتتحسب في الإجمالي بس)
+    assert report.bad_values == 2
+    assert {issue["column"] for issue in report.issues} == {"timestamp", "platform", "outcome"}
+
+
+def test_reingest_is_idempotent(log, tmp_path):
+    ledger = str(tmp_path / "ledger")
+    frame, version = EventLogSource(str(log), ledger_dir=ledger).load()
+
+    again = EventLogSource(str(log), ledger_dir=ledger)
+    frame2, version2 = again.load()
+    assert version2 == version
+    assert again.stats["events_read"] == 0 and again.stats["files_skipped"] == 1
+    check(frame2, EXPECTED)
+    # نفس الـ instance تاني: ولا حاجة اتقرت
+    assert again.load()[1] == version and again.stats["bytes_read"] == 0
+
+
+def test_appended_lines_only_are_read(log, tmp_path):
+    source = EventLogSource(str(log), ledger_dir=str(tmp_path / "ledger"))
+    source.load()
+    read_before = source.stats["bytes_read"]
+
+    # event قديم (يوم فات) + سطر لسه بيتكتب من غير \n
+    write(log, ["2024-03-01T18:00:00,Instagram,booking\n", "2024-03-04T09:00:00,TikTok,boo"], mode="a")
+    frame, _ = source.load()
+    assert source.stats["events_read"] == len(LOG) - 2 + 1
+    expected = {day: dict(cells) for day, cells in EXPECTED.items()}
+    expected["2024-03-01"].update({"Instagram Answered": 3, "New Bookings - Insta": 3, "Rows": 5})
+    check(frame, expected)
+
+    write(log, ["king\n"], mode="a")
+    frame, _ = source.load()
+    expected["2024-03-04"] = {"TikTok Answered": 1, "New Bookings - TikTok": 1, "Rows": 1}
+    check(frame, expected)
+    # الجزء الجديد بس اتقري، مش الملف كله
+    assert source.stats["bytes_read"] - read_before == len("2024-03-01T18:00:00,Instagram,booking\n") + len(
+        "2024-03-04T09:00:00,TikTok,booking\n"
+    )
+
+
+def test_rewritten_file_replaces_its_rollup(log, tmp_path):
+    ledger = str(tmp_path / "ledger")
+    EventLogSource(str(log), ledger_dir=ledger).load()
+
+    write(log, [HEADER, "2024-03-05T09:00:00,WhatsApp,booking\n"])
+    source = EventLogSource(str(log), ledger_dir=ledger)
+    frame, _ = source.load()
+    assert source.stats["files_rewritten"] == 1
+    check(frame, {"2024-03-05": {"WhatsApp Answered": 1, "New Bookings - Whats": 1, "Rows": 1}})
+
+
+def test_folder_of_logs_sums_per_day(tmp_path):
+    folder = tmp_path / "logs"
+    folder.mkdir()
+    write(folder / "a.csv", [HEADER] + LOG[:4])
+    write(folder / "b.csv", [HEADER] + LOG[4:])
+    write(folder / "notes.txt", ["not a log\n"])
+    frame, _ = EventLogSource(str(folder)).load()
+    check(frame, EXPECTED)
@@ -0,0 +1,150 @@
+import pytest
+import urllib3
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError, FetchError, HttpClient
+
+
+class FakeResponse:
+    def __init__(self, status, body=b"Date\n2024-01-01\n"):
+        self.status = status
+        self.body = body
+        self.headers = urllib3.HTTPHeaderDict()
+
+    def read(self):
+        return self.body
+
+    def tell(self):
+        return len(self.body)
+
+    def drain_conn(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakePool:
+    # بيرجع الردود (أو يرمي الـ exceptions) اللي في الطابور بالترتيب
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.pools = {}
+
+    def request(self, method, url, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+URL = "http://sheet.test/sheet.csv"
+
+
+def make_client(*outcomes, threshold=2):
+    client = HttpClient(retries=0, backoff_base=0, breaker_threshold=threshold, breaker_cooldown=60)
+    client.pool = FakePool(*outcomes)
+    return client
+
+
+def expire(breaker):
+    # كأن الـ cooldown خلص
+    breaker.opened_at -= breaker.cooldown
+
+
+def test_breaker_opens_after_threshold_and_closes_on_success():
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.failure()
+    assert breaker.state == "closed"
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    expire(breaker)
+    assert breaker.allow() and breaker.state == "half_open"
+    # طلب تجربة واحد بس
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.failures == 0 and breaker.allow()
+
+
+def test_failed_half_open_trial_reopens():
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    breaker.failure()
+    breaker.failure()
+    expire(breaker)
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open" and breaker.times_opened == 2 and not breaker.allow()
+
+
+def test_client_rejects_while_open_then_recovers():
+    timeout = urllib3.exceptions.ReadTimeoutError(None, URL, "read timed out")
+    client = make_client(timeout, timeout, FakeResponse(200))
+    for _ in range(2):
+        with pytest.raises(FetchError):
+            client.get(URL)
+    breaker = client.breaker(URL)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.get(URL)
+    assert client.stats["rejected"] == 1
+
+    expire(breaker)
+    status, body, _ = client.get(URL)
+    assert status == 200 and body.startswith(b"Date")
+    assert breaker.state == "closed"
+
+
+def test_exception_from_read_in_half_open_trial_reopens_breaker():
+    timeout = urllib3.exceptions.ReadTimeoutError(None, URL, "read timed out")
+    client = make_client(timeout, timeout, FakeResponse(200, b"<html>"), FakeResponse(200))
+    for _ in range(2):
+        with pytest.raises(FetchError):
+            client.get(URL)
+    breaker = client.breaker(URL)
+    expire(breaker)
+
+    def parse(response):
+        raise ValueError("Sheet has no Date column")
+
+    with pytest.raises(ValueError):
+        client.get(URL, read=parse)
+    # مش متعلق في half_open: اتفتح تاني وبيستنى الـ cooldown
+    assert breaker.state == "open"
+    assert client.stats["failures"] == 3
+    assert "no Date column" in client.last_error
+    with pytest.raises(CircuitOpenError):
+        client.get(URL)
+
+    expire(breaker)
+    status, _, _ = client.get(URL)
+    assert status == 200 and breaker.state == "closed"
+
+
+def test_exception_from_read_counts_as_failure_when_closed():
+    client = make_client(FakeResponse(200), FakeResponse(200), threshold=2)
+
+    def parse(response):
+        raise ValueError("bad body")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            client.get(URL, read=parse)
+    assert client.breaker(URL).state == "open"
+
+
+def test_client_error_does_not_open_breaker():
+    client = make_client(FakeResponse(404), FakeResponse(404), FakeResponse(404))
+    for _ in range(3):
+        with pytest.raises(FetchError) as info:
+            client.get(URL)
+        assert info.value.status == 404
+    assert client.breaker(URL).state == "closed"
+
+
+def test_retries_retryable_status(monkeypatch):
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+    client = make_client(FakeResponse(503), FakeResponse(200))
+    client.retries = 1
+    status, _, _ = client.get(URL)
+    assert status == 200 and client.stats["retries"] == 1
@@ -0,0 +1,22 @@
+import io
+
+from ingest import ingest_csv
+from metrics import OPTIONAL_COLUMNS
+
+
+def csv_bytes(raw, drop=()):
+    return io.BytesIO(raw.drop(columns=list(drop)).head(50).to_csv(index=False).encode("utf-8"))
+
+
+def test_absent_optional_columns_are_not_missing(raw_sheet):
+    frame, report = ingest_csv(csv_bytes(raw_sheet, OPTIONAL_COLUMNS))
+    assert report.missing_columns == []
+    assert report.absent_optional == OPTIONAL_COLUMNS
+    # مش في الـ frame (الـ cube بيحسبها صفر) ومفيش تحذير
+    assert not any(col in frame.columns and frame[col].sum() for col in OPTIONAL_COLUMNS)
+
+
+def test_absent_required_column_is_reported(raw_sheet):
+    _, report = ingest_csv(csv_bytes(raw_sheet, ["WhatsApp Answered", OPTIONAL_COLUMNS[0]]))
+    assert report.missing_columns == ["WhatsApp Answered"]
+    assert report.absent_optional == [OPTIONAL_COLUMNS[0]]
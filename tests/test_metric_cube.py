@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from metric_cube import MetricCube
+from metrics import PLATFORM_COLS, SOURCE_COLUMNS, TOTAL_COLUMNS
+
+# الداتا من 2023-01-01 لـ 2023-07-19، وفيها أيام من غير صفوف (05/01 و 14-15/02 ...)
+RANGES = [
+    ("2023-01-01", "2023-07-19"),
+    ("2023-02-14", "2023-02-15"),
+    ("2023-02-10", "2023-02-20"),
+    ("2023-03-31", "2023-03-31"),
+    ("2022-12-01", "2023-01-10"),
+    ("2023-07-01", "2023-09-30"),
+    ("2024-01-01", "2024-01-31"),
+]
+COLUMNS = list(TOTAL_COLUMNS) + SOURCE_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def cube(frame):
+    return MetricCube.from_frame(frame)
+
+
+def pandas_slice(frame, start, end):
+    return frame[(frame["Date"] >= pd.Timestamp(start)) & (frame["Date"] <= pd.Timestamp(end))]
+
+
+@pytest.mark.parametrize("start,end", RANGES)
+def test_range_sums_match_pandas(frame, cube, start, end):
+    rows = pandas_slice(frame, start, end)
+    assert cube.row_count(start, end) == len(rows)
+    assert cube.sums(start, end, COLUMNS) == {c: int(rows[c].sum()) for c in COLUMNS}
+    for platform, cols_map in PLATFORM_COLS.items():
+        assert cube.platform_sums(start, end, platform) == {m: int(rows[c].sum()) for m, c in cols_map.items()}
+
+
+@pytest.mark.parametrize("start,end", RANGES)
+def test_daily_matches_groupby(frame, cube, start, end):
+    rows = pandas_slice(frame, start, end)
+    expected = rows.groupby("Date")[SOURCE_COLUMNS].sum().reset_index()
+    got = cube.daily(start, end, SOURCE_COLUMNS)
+    assert list(got["Date"]) == list(expected["Date"])
+    assert np.array_equal(got[SOURCE_COLUMNS].to_numpy(), expected[SOURCE_COLUMNS].to_numpy())
+
+
+def test_unsorted_rows_give_same_cube(frame, cube):
+    shuffled = MetricCube.from_frame(frame.sample(frac=1, random_state=0))
+    assert np.array_equal(shuffled.cum, cube.cum)
+    assert np.array_equal(shuffled.rows_cum, cube.rows_cum)
+
+
+def test_days_without_rows(cube):
+    # أيام الإجازة في الـ fixture: صفر صفوف وصفر في كل عمود
+    assert cube.row_count("2023-02-14", "2023-02-15") == 0
+    assert not any(cube.sums("2023-02-14", "2023-02-15").values())
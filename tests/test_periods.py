@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import analytics
+import cli
+from api import BadRequest, handle
+
+
+class Datasets:
+    def __init__(self, ds):
+        self.ds = ds
+
+    def get(self):
+        return self.ds
+
+
+@pytest.fixture(scope="module")
+def ds(frame):
+    return analytics.Dataset(frame, "test")
+
+
+def api_periods(ds, periods):
+    query = {"granularity": ["Week"], "start": ["2023-01-01"], "end": ["2023-07-19"], "periods": [periods]}
+    return handle(Datasets(ds), "/periods", query)["periods"]
+
+
+def test_period_series_zero_means_all(ds):
+    start, end = ds.min_date, ds.max_date
+    everything = analytics.period_series(ds, "Week", start, end, "WhatsApp")
+    assert len(everything) > 4
+    assert analytics.period_series(ds, "Week", start, end, "WhatsApp", periods=0).equals(everything)
+    assert analytics.period_series(ds, "Week", start, end, "WhatsApp", periods=3).equals(everything.tail(3))
+    with pytest.raises(ValueError):
+        analytics.period_series(ds, "Week", start, end, "WhatsApp", periods=-2)
+
+
+def test_api_periods(ds):
+    everything = api_periods(ds, "0")
+    assert len(everything) > 4
+    assert api_periods(ds, "2") == everything[-2:]
+    with pytest.raises(BadRequest, match="periods must be >= 0"):
+        api_periods(ds, "-2")
+
+
+def test_cli_periods_matches_api(ds, sheet_csv, capsys, monkeypatch):
+    monkeypatch.delenv("CLINIC_ARCHIVE_DIR", raising=False)
+    argv = ["--source", sheet_csv, "periods", "--start", "2023-01-01", "--end", "2023-07-19"]
+    cli.main(argv + ["--periods", "0"])
+    assert json.loads(capsys.readouterr().out)["periods"] == api_periods(ds, "0")
+    with pytest.raises(SystemExit):
+        cli.main(argv + ["--periods", "-2"])
+    assert "periods must be >= 0" in capsys.readouterr().err
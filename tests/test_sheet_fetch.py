@@ -0,0 +1,87 @@
+import io
+
+import pandas as pd
+
+from metrics import prepare_frame
+from sheet_fetch import SheetLoader
+
+URL = "http://sheet.test/sheet.csv"
+
+
+class FakeClient:
+    # بيرجع الردود اللي في الطابور بالترتيب وبيسجل الـ headers اللي اتبعتت
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        status, body = self.responses.pop(0)
+        response_headers = {} if status == 304 else {"ETag": f'"{len(self.requests)}"'}
+        return status, body, response_headers
+
+
+def csv_body(raw):
+    return raw.to_csv(index=False).encode("utf-8")
+
+
+def full_parse(body):
+    return prepare_frame(pd.read_csv(io.BytesIO(body)))
+
+
+def assert_same_data(frame, expected):
+    pd.testing.assert_frame_equal(frame, expected, check_dtype=False, check_freq=False)
+
+
+def make_loader(*responses):
+    client = FakeClient(*responses)
+    return SheetLoader(URL, min_interval=0, client=client), client
+
+
+def test_not_modified_reuses_frame(raw_sheet):
+    body = csv_body(raw_sheet.head(100))
+    loader, client = make_loader((200, body), (304, None))
+    frame, version = loader.load()
+    assert loader.stats["full"] == 1
+
+    frame2, version2 = loader.load()
+    assert frame2 is frame and version2 == version
+    assert loader.stats["not_modified"] == 1
+    # الطلب التاني مشروط بالـ ETag اللي رجع
+    assert client.requests[1]["If-None-Match"] == '"1"'
+
+
+def test_same_body_is_not_reparsed(raw_sheet):
+    body = csv_body(raw_sheet.head(100))
+    loader, _ = make_loader((200, body), (200, body))
+    frame, version = loader.load()
+    assert loader.load() == (frame, version)
+    assert loader.stats == {"not_modified": 0, "unchanged": 1, "appended": 0, "full": 1}
+
+
+def test_appended_rows_extend_frame(raw_sheet):
+    old, new = csv_body(raw_sheet.head(100)), csv_body(raw_sheet.head(160))
+    assert new.startswith(old)
+    loader, _ = make_loader((200, old), (200, new))
+    frame, version = loader.load()
+
+    frame2, version2 = loader.load()
+    assert loader.stats["appended"] == 1 and loader.stats["full"] == 1
+    assert version2 != version
+    assert len(frame2) > len(frame)
+    # الجزء القديم زي ما هو، والنتيجة نفس parse الملف كله
+    assert_same_data(frame2.iloc[:len(frame)], frame)
+    assert_same_data(frame2, full_parse(new))
+
+
+def test_rewritten_body_is_reparsed(raw_sheet):
+    old = csv_body(raw_sheet.head(100))
+    edited = raw_sheet.head(120).copy()
+    edited.loc[3, "WhatsApp Answered"] += 100
+    rewritten = csv_body(edited)
+    loader, _ = make_loader((200, old), (200, rewritten))
+    loader.load()
+
+    frame, _ = loader.load()
+    assert loader.stats["full"] == 2 and loader.stats["appended"] == 0
+    assert_same_data(frame, full_parse(rewritten))
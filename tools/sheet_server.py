@@ -0,0 +1,101 @@
+"""Serve a local CSV file the way the published Google Sheet does.
+
+    python tools/sheet_server.py data.csv --port 8765
+
+Then point the dashboard at http://127.0.0.1:8765/sheet.csv. The server
+answers conditional requests (If-None-Match / If-Modified-Since) with 304,
+so the conditional and append-only paths of ``SheetLoader`` can be
+exercised offline by editing or appending to the file.
+
+Like Google it speaks HTTP/1.1 with keep-alive and gzips the body when the
+client asks for it, so the pooled client in ``http_client.py`` reuses its
+connection. To exercise timeouts, retries and the circuit breaker:
+
+    python tools/sheet_server.py data.csv --delay 2          # slow network
+    python tools/sheet_server.py data.csv --fail-rate 0.5    # half the requests get a 503
+    python tools/sheet_server.py data.csv --fail-rate 1 --fail-status 500
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import random
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(path, delay=0.0, fail_rate=0.0, fail_status=503):
+    class SheetHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if delay:
+                time.sleep(delay)
+            if fail_rate and random.random() < fail_rate:
+                self.send_response(fail_status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            mtime = int(os.path.getmtime(path))
+            etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+            last_modified = formatdate(mtime, usegmt=True)
+
+            if self._not_modified(etag, mtime):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=6)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _not_modified(self, etag, mtime):
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match is not None:
+                return if_none_match == etag
+            if_modified_since = self.headers.get("If-Modified-Since")
+            if if_modified_since:
+                try:
+                    since = parsedate_to_datetime(if_modified_since).timestamp()
+                except (TypeError, ValueError):
+                    return False
+                return mtime <= since
+            return False
+
+        def log_message(self, format, *args):
+            pass
+
+    return SheetHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.csv_path, args.delay, args.fail_rate, args.fail_status))
+    print(f"Serving {args.csv_path} on http://{args.host}:{args.port}/sheet.csv")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Copy the dashboard data into a local Parquet / SQLite / CSV snapshot.
+
+    python tools/snapshot_sheet.py data/clinic.parquet
+    python tools/snapshot_sheet.py data/clinic.sqlite --source https://...output=csv
+
+Without --source the published Google Sheet is used. Point the dashboard
+at the snapshot with CLINIC_DATA_SOURCE=data/clinic.parquet or a
+[data_source] section in .streamlit/secrets.toml.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sources import GOOGLE_SHEET_CSV_URL, build_source, write_snapshot  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="target file (.parquet, .sqlite/.db or .csv)")
+    parser.add_argument("--source", default=GOOGLE_SHEET_CSV_URL, help="sheet URL or local file")
+    parser.add_argument("--table", default="clinic_data", help="SQLite table name")
+    args = parser.parse_args()
+
+    key = "url" if args.source.startswith(("http://", "https://")) else "path"
+    source = build_source({key: args.source})
+
+    started = time.perf_counter()
+    frame, _ = source.load()
+    loaded = time.perf_counter()
+    write_snapshot(frame, args.output, table=args.table)
+    written = time.perf_counter()
+
+    print(
+        f"{len(frame)} rows: loaded in {loaded - started:.3f}s, "
+        f"written to {args.output} in {written - loaded:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()